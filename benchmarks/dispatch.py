@@ -0,0 +1,64 @@
+"""
+Benchmark the throughput of `Router.dispatch` on simple commands, with the
+tokenization of repeated lines cached (or not, with distinct lines), and of
+`Router.dispatch_argv` on arguments that are already split.
+
+    python benchmarks/dispatch.py --count 200000 --rounds 5
+"""
+
+import sys
+import time
+from collections.abc import Callable
+
+from startle import Router, start
+
+
+def deploy(svc: str, *, canary: int = 0, dry: bool = False) -> str:
+    return svc
+
+
+def status(svc: str, /) -> str:
+    return svc
+
+
+def timed(label: str, f: Callable[[], None], count: int, rounds: int) -> None:
+    best = float("inf")
+    for _ in range(rounds):
+        start_ = time.process_time()
+        f()
+        best = min(best, time.process_time() - start_)
+    print(f"{label:<40} {count / best:12,.0f} /s")
+
+
+def main(*, count: int = 200_000, rounds: int = 5) -> None:
+    """
+    Benchmark the throughput of dispatching simple commands.
+
+    Args:
+        count: Number of dispatches per measurement.
+        rounds: Number of times to repeat each measurement, keeping the fastest.
+    """
+    router = Router({"deploy": deploy, "status": status})
+
+    def repeated() -> None:
+        lines = ["deploy svc --canary 5", "status svc"]
+        for i in range(count):
+            router.dispatch(lines[i & 1])
+
+    def distinct() -> None:
+        # longer than the cache, so that every line is split again
+        for i in range(count):
+            router.dispatch(f"deploy svc-{i} --canary {i % 100}")
+
+    def argv() -> None:
+        argv = ["deploy", "svc", "--canary", "5"]
+        for _ in range(count):
+            router.dispatch_argv(argv)
+
+    timed("dispatch (repeated lines)", repeated, count, rounds)
+    timed("dispatch (distinct lines)", distinct, count, rounds)
+    timed("dispatch_argv", argv, count, rounds)
+
+
+if __name__ == "__main__":
+    sys.exit(start(main))
@@ -0,0 +1,75 @@
+"""
+Benchmark help rendering for a spec with many options, one of which has a
+large number of choices.
+
+    python benchmarks/help.py --options 1000 --choices 3000
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from contextlib import redirect_stdout
+from dataclasses import make_dataclass
+from enum import Enum
+from typing import Any
+
+from rich.console import Console
+
+from startle import start
+from startle._inspect.make_args import make_args_from_class
+
+
+def timed(label: str, f: Callable[[], Any], repeat: int) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        start_ = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - start_)
+    print(f"{label:<32} {best * 1000:9.2f} ms")
+
+
+def main(*, options: int = 1000, choices: int = 3000, repeat: int = 5) -> None:
+    """
+    Benchmark help rendering.
+
+    Args:
+        options: Number of options in the spec.
+        choices: Number of members of the Enum typed option.
+        repeat: Number of runs per measurement (the best is reported).
+    """
+    Big: Any = Enum("Big", [f"member_{i}" for i in range(choices)])
+    fields: list[Any] = [("choice", Big, Big["member_0"])]
+    fields += [(f"option_{i}", int, i) for i in range(options)]
+    cls = make_dataclass("Spec", fields)
+
+    def build() -> Any:
+        return make_args_from_class(cls, program_name="bench")
+
+    def rich_help() -> None:
+        console = Console(file=io.StringIO(), width=100)
+        build().print_help(console)
+
+    def plain_help() -> None:
+        os.environ["STARTLE_CACHE_DIR"] = ""
+        with redirect_stdout(io.StringIO()):
+            build().print_help()
+
+    def cached_help() -> None:
+        os.environ["STARTLE_CACHE_DIR"] = cache
+        with redirect_stdout(io.StringIO()):
+            build().print_help()
+
+    with tempfile.TemporaryDirectory() as cache:
+        print(f"{options} options, {choices} choices")
+        timed("build parser", build, repeat)
+        timed("help (rich)", rich_help, repeat)
+        timed("help (plain, uncached)", plain_help, repeat)
+        cached_help()  # warm up the cache
+        timed("help (plain, cached)", cached_help, repeat)
+
+
+if __name__ == "__main__":
+    sys.exit(start(main))
@@ -0,0 +1,90 @@
+"""
+Benchmark the memory footprint of parsers: per argument of a large spec, per
+unknown option parsed into `**kwargs`, and per leaf while building a spec
+recursively (i.e. the transient `Param`s and tree nodes).
+
+    python benchmarks/memory.py --leaves 5000 --options 2000
+"""
+
+import gc
+import sys
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import field, make_dataclass
+from typing import Any
+
+from startle import start
+from startle._inspect.make_args import make_args_from_class, make_args_from_func
+from startle.arg import Arg, Name
+
+
+def measured(f: Callable[[], Any]) -> tuple[Any, int, int]:
+    """
+    Call `f`, and return its result, with the memory retained by the result and
+    the peak memory allocated during the call (in bytes).
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = f()
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, peak
+
+
+def shallow(obj: object) -> int:
+    """
+    Size of an instance, including its `__dict__` (if it has one).
+    """
+    return sys.getsizeof(obj) + (
+        sys.getsizeof(obj.__dict__) if hasattr(obj, "__dict__") else 0
+    )
+
+
+def report(label: str, total: int, count: int) -> None:
+    print(f"{label:<40} {total / count:9.1f} B")
+
+
+def main(*, leaves: int = 5000, options: int = 2000) -> None:
+    """
+    Benchmark the memory footprint of parsers.
+
+    Args:
+        leaves: Number of arguments (leaves) of the specs.
+        options: Number of unknown options to parse into `**kwargs`.
+    """
+    arg = Arg(name=Name(long="x"), type_=int, is_named=True)
+    print(f"{'Arg instance (shallow)':<40} {shallow(arg):9.1f} B")
+    print(f"{'Name instance (shallow)':<40} {shallow(arg.name):9.1f} B")
+
+    flat = make_dataclass("Flat", [(f"leaf_{i}", int, i) for i in range(leaves)])
+    _, retained, peak = measured(lambda: make_args_from_class(flat))
+    report(f"spec with {leaves} args, per arg", retained, leaves)
+    report("  peak while building, per arg", peak, leaves)
+
+    group = make_dataclass("Group", [(f"leaf_{i}", int, i) for i in range(10)])
+    nested = make_dataclass(
+        "Nested",
+        [
+            (f"group_{i}", group, field(default_factory=group))
+            for i in range(leaves // 10)
+        ],
+    )
+    _, retained, peak = measured(
+        lambda: make_args_from_class(nested, recurse=True, naming="nested")
+    )
+    report(f"nested spec with {leaves} leaves, per leaf", retained, leaves)
+    report("  peak while building, per leaf", peak, leaves)
+
+    def kwargs(**kwargs: int) -> dict[str, int]:
+        return kwargs
+
+    args = make_args_from_func(kwargs)
+    argv = [f"--flag-{i}={i}" for i in range(options)]
+    _, retained, peak = measured(lambda: args.parse(argv))
+    report(f"{options} unknown options, per option", retained, options)
+    report("  peak while parsing, per option", peak, options)
+
+
+if __name__ == "__main__":
+    sys.exit(start(main))
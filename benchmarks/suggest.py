@@ -0,0 +1,52 @@
+"""
+Benchmark "did you mean" suggestions over a large set of option names, such as
+those of a recursive, flat-named spec.
+
+    python benchmarks/suggest.py --groups 100 --options 100
+"""
+
+import sys
+import time
+
+from startle import start
+from startle._suggest import NameIndex
+
+
+def report(label: str, seconds: float) -> None:
+    print(f"{label:<40} {seconds * 1e3:8.3f} ms")
+
+
+def main(*, groups: int = 100, options: int = 100, repeat: int = 200) -> None:
+    """
+    Benchmark building the name index and querying it with typical typos.
+
+    Args:
+        groups: Number of option groups.
+        options: Number of options per group.
+        repeat: Number of lookups per query, keeping the median.
+    """
+    names = [f"group-{i}-option-{j}" for i in range(groups) for j in range(options)]
+    start_ = time.perf_counter()
+    index = NameIndex(names)
+    report(f"build ({len(names)} names)", time.perf_counter() - start_)
+
+    queries = [
+        "group-4-otpion-17",  # transposition
+        "group-4-option-1x",  # substitution
+        "gruop-5-option-5",  # transposition near the start
+        "grop-7-option-3",  # deletion
+        "group-42-option-17xy",  # two insertions
+        "something-else-entirely",  # no match
+    ]
+    for query in queries:
+        times: list[float] = []
+        for _ in range(repeat):
+            start_ = time.perf_counter()
+            index.suggest(query)
+            times.append(time.perf_counter() - start_)
+        times.sort()
+        report(query, times[len(times) // 2])
+
+
+if __name__ == "__main__":
+    sys.exit(start(main))
@@ -4,7 +4,16 @@ from collections import abc
 from collections.abc import Callable
 from typing import Any, TextIO, Union, get_args, get_origin
 
-from startle import parse, register, start
+from startle import (
+    completion_script,
+    load_manifest,
+    parse,
+    parse_records,
+    register,
+    run_batch,
+    start,
+    start_async,
+)
 from startle._inspect.make_args import parse_docstring
 
 
@@ -141,5 +150,10 @@ if __name__ == "__main__":
     with open("docs/api/functions.md", "w") as f:
         print("# Functions\n", file=f)
         func_api(start, f)
+        func_api(start_async, f)
         func_api(parse, f)
+        func_api(parse_records, f)
         func_api(register, f)
+        func_api(run_batch, f)
+        func_api(completion_script, f)
+        func_api(load_manifest, f)
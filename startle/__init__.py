@@ -1,3 +1,11 @@
+from ._batch import run_batch as run_batch
+from ._completion import completion_script as completion_script
+from ._manifest import load_manifest as load_manifest
+from ._memo import Cache as Cache
 from ._parse import parse as parse
+from ._records import parse_records as parse_records
 from ._register import register as register
+from ._registry import Registry as Registry
 from ._start import start as start
+from ._start import start_async as start_async
+from .router import Router as Router
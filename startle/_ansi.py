@@ -0,0 +1,760 @@
+"""
+A fast renderer of help messages that does not depend on `rich`.
+
+Output is plain text, or text with ANSI escape codes when writing to a color
+capable terminal. Briefs are rendered from the common subset of Markdown, as
+`rich.markdown.Markdown` would. Rendered help is cached on disk per (spec
+fingerprint, startle version, terminal width, color mode), so that repeated
+`--help` invocations only write bytes.
+"""
+
+import os
+import re
+import sys
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from functools import cache
+from pathlib import PurePath
+from types import CodeType
+from typing import Any, Literal, Union
+from unicodedata import east_asian_width
+
+from .arg import Arg, Name
+
+FORMAT = 4
+# bump whenever the rendering changes, to invalidate previously cached help
+
+MAX_CHOICES = 10
+# longer lists of choices are truncated in help (see `--help-choices`)
+
+PAGER_ENV = "STARTLE_PAGER"
+# the pager command to show long help through, if any
+
+
+class Sty:
+    name = "bold"
+    pos_name = "bold"
+    opt = "green"
+    var = "blue"
+    literal_var = ""
+    title = "bold underline dim"
+
+
+_CODES = {
+    "bold": "1",
+    "dim": "2",
+    "italic": "3",
+    "underline": "4",
+    "red": "31",
+    "green": "32",
+    "yellow": "33",
+    "blue": "34",
+    "cyan": "36",
+}
+_COLORS = {"red", "green", "yellow", "blue", "cyan"}
+
+
+def _sgr(style: str) -> str:
+    """
+    Resolve a rich-like style string (e.g. "bold green not dim") to SGR codes.
+    Later words take precedence over earlier ones.
+    """
+    attrs: dict[str, None] = {}
+    words = iter(style.split())
+    for word in words:
+        if word == "not":
+            attrs.pop(next(words, ""), None)
+            continue
+        if word in _COLORS:
+            for color in _COLORS:
+                attrs.pop(color, None)
+        attrs.pop(word, None)
+        attrs[word] = None
+    return ";".join(sorted(_CODES[a] for a in attrs if a in _CODES))
+
+
+def cell_len(text: str) -> int:
+    """
+    Number of terminal cells needed to display `text`.
+    """
+    if text.isascii():
+        return len(text)
+    return sum(2 if east_asian_width(c) in "WF" else 1 for c in text)
+
+
+Part = Union[str, tuple[str, str], "Styled"]
+
+
+class Styled:
+    """
+    A sequence of (text, style) segments; a minimal stand-in for `rich.text.Text`.
+    """
+
+    __slots__ = ("segments",)
+
+    def __init__(self, *parts: Part, style: str = "") -> None:
+        self.segments: list[tuple[str, str]] = []
+        for part in parts:
+            if isinstance(part, Styled):
+                self.segments += part.segments
+            elif isinstance(part, str):
+                self.segments.append((part, ""))
+            else:
+                self.segments.append(part)
+        if style:
+            self.stylize(style)
+
+    def stylize(self, style: str) -> "Styled":
+        """
+        Apply `style` on top of the styles of all segments. Consecutive unstyled
+        segments become one, as they would in `rich`.
+        """
+        segments: list[tuple[str, str]] = []
+        for text, sty in self.segments:
+            if segments and not sty and not segments[-1][1]:
+                segments[-1] = (segments[-1][0] + text, "")
+            else:
+                segments.append((text, sty))
+        self.segments = [(text, f"{sty} {style}") for text, sty in segments]
+        return self
+
+    @property
+    def plain(self) -> str:
+        return "".join(text for text, _ in self.segments)
+
+    def __len__(self) -> int:
+        return cell_len(self.plain)
+
+    def __bool__(self) -> bool:
+        return any(text for text, _ in self.segments)
+
+    def render(self, color: bool) -> str:
+        if not color:
+            return self.plain
+        out: list[str] = []
+        for text, style in self.segments:
+            codes = _sgr(style)
+            out.append(f"\x1b[{codes}m{text}\x1b[0m" if codes and text else text)
+        return "".join(out)
+
+    def join(self, items: list["Styled"]) -> "Styled":
+        out = Styled()
+        for i, item in enumerate(items):
+            if i:
+                out.segments += self.segments
+            out.segments += item.segments
+        return out
+
+    def wrap(self, width: int) -> list["Styled"]:
+        """
+        Greedily word-wrap into lines of at most `width` cells (words longer than
+        `width` are kept whole), preserving hard line breaks and indentation.
+        """
+        # split into lines of words, where words may span multiple segments
+        # and each word carries the whitespace preceding it
+        hard: list[list[tuple[list[tuple[str, str]], list[tuple[str, str]]]]] = [[]]
+        gap: list[tuple[str, str]] = []
+        word: list[tuple[str, str]] = []
+        for text, style in self.segments:
+            for i, line in enumerate(text.split("\n")):
+                if i:
+                    if word:
+                        hard[-1].append((gap, word))
+                    hard.append([])
+                    gap, word = [], []
+                for j, piece in enumerate(line.split(" ")):
+                    if j:
+                        if word:
+                            hard[-1].append((gap, word))
+                            gap, word = [], []
+                        gap.append((" ", style))
+                    if piece:
+                        word.append((piece, style))
+        if word:
+            hard[-1].append((gap, word))
+
+        lines: list[Styled] = []
+        for words in hard:
+            lines.append(Styled())
+            current = 0
+            for gap, word in words:
+                size = sum(cell_len(text) for text, _ in word)
+                if current and current + len(gap) + size > width:
+                    lines.append(Styled())
+                    current = 0
+                else:
+                    # the gap is dropped at soft line breaks only
+                    lines[-1].segments += gap
+                    current += len(gap)
+                lines[-1].segments += word
+                current += size
+        return lines
+
+
+def name_usage(name: Name, kind: Literal["listing", "usage line"]) -> Styled:
+    """
+    Format the name of an argument for either detailed options table (kind: listing)
+    or the brief usage line (kind: usage line).
+    """
+
+    def fmt(name: str, short: bool) -> Styled:
+        if name.startswith("<") and name.endswith(">"):
+            # very special case for var kwargs.
+            name_ = name.strip("<>")
+            return Styled(
+                ("--", f"{Sty.name} {Sty.opt} not dim"),
+                ("<", "cyan not dim"),
+                (name_, f"{Sty.name} cyan not dim"),
+                (">", "cyan not dim"),
+            )
+        return Styled((
+            f"-{name}" if short else f"--{name}",
+            f"{Sty.name} {Sty.opt} not dim",
+        ))
+
+    if kind == "listing":
+        name_list: list[Styled] = []
+        if name.short:
+            name_list.append(fmt(name.short, True))
+        if name.long:
+            name_list.append(fmt(name.long, False))
+        return Styled(("|", f"{Sty.opt} dim")).join(name_list)
+    else:
+        if name.long:
+            return fmt(name.long, False)
+        else:
+            return fmt(name.short, True)
+
+
+def shown_choices(metavar: list[str]) -> tuple[list[str], int]:
+    """
+    The choices to display in help, and the number of those left out.
+    """
+    if len(metavar) <= MAX_CHOICES:
+        return metavar, 0
+    shown = metavar[: MAX_CHOICES // 2]
+    return shown, len(metavar) - len(shown)
+
+
+def hidden_choices(arg: Arg) -> int:
+    """
+    Number of choices of `arg` that are left out of the help message.
+    """
+    return shown_choices(arg.metavar)[1] if isinstance(arg.metavar, list) else 0
+
+
+def choices_note(arg: Arg) -> str:
+    name = arg.name.long or arg.name.short
+    return f"(+{hidden_choices(arg)} more, see --help-choices {name})"
+
+
+def _meta(metavar: list[str] | str) -> Styled:
+    if isinstance(metavar, str):
+        return Styled(metavar)
+    shown, hidden = shown_choices(metavar)
+    items = [Styled((m, f"{Sty.literal_var} not dim")) for m in shown]
+    if hidden:
+        items.append(Styled(("...", "dim")))
+    return Styled(("|", "dim")).join(items)
+
+
+def _repeated(text: Styled) -> Styled:
+    return Styled(text, " ", Styled("[", text, " ...]", style="dim"))
+
+
+def _pos_usage(arg: Arg) -> Styled:
+    text = Styled(
+        "<", (f"{arg.name}:", Sty.pos_name), _meta(arg.metavar), ">", style=Sty.var
+    )
+    return _repeated(text) if arg.is_nary else text
+
+
+def _opt_usage(arg: Arg, kind: Literal["listing", "usage line"]) -> Styled:
+    if isinstance(arg.metavar, list):
+        option = _meta(arg.metavar).stylize(Sty.var)
+    else:
+        option = Styled((f"<{arg.metavar}>", Sty.var))
+    if arg.is_nary:
+        option = _repeated(option)
+    return Styled(name_usage(arg.name, kind), " ", option)
+
+
+def usage(arg: Arg, kind: Literal["listing", "usage line"] = "listing") -> Styled:
+    """
+    Format an argument (possibly with its metavar) for either detailed options
+    table (kind: listing) or the brief usage line (kind: usage line).
+    """
+    if arg.is_positional and not arg.is_named:
+        text = _pos_usage(arg)
+    elif arg.is_flag:
+        text = name_usage(arg.name, kind)
+        if kind == "listing":
+            text = Styled(text, " ")
+    else:
+        text = _opt_usage(arg, kind)
+
+    if not arg.required and kind == "usage line":
+        text = Styled("[", text, "]")
+    return text
+
+
+def default_value(val: Any) -> Styled:
+    if isinstance(val, str) and isinstance(val, Enum):
+        return Styled((val.value, Sty.opt))
+    if isinstance(val, Enum):
+        return Styled((val.name.lower().replace("_", "-"), Sty.opt))
+    if isinstance(val, str) and val == "":
+        return Styled(('""', f"{Sty.opt} dim"))
+    return Styled((str(val), Sty.opt))
+
+
+def help(arg: Arg) -> Styled:
+    text = _status(arg)
+    if hidden_choices(arg):
+        return Styled(text, " ", (choices_note(arg), "dim"))
+    return text
+
+
+def _status(arg: Arg) -> Styled:
+    from .args import Missing
+
+    helptext = Styled((arg.help, "italic"))
+    delim = " " if arg.help else ""
+    if str(arg.name) == "":
+        return Styled(helptext, delim, ("(unknown positional arguments)", "cyan"))
+    if arg.name.long == "<key>":
+        return Styled(helptext, delim, ("(unknown options)", "cyan"))
+    if arg.is_flag:
+        return Styled(helptext, delim, ("(flag)", Sty.opt))
+    if arg.required:
+        return Styled(helptext, delim, ("(required)", "yellow"))
+    if arg.default is Missing:
+        return Styled(helptext, delim, ("(optional)", Sty.opt))
+    if arg.default_factory is not None:
+        def_val = default_value(arg.default_factory())
+    else:
+        def_val = default_value(arg.default)
+    return Styled(helptext, delim, ("(default: ", Sty.opt), def_val, (")", Sty.opt))
+
+
+def _code_key(code: CodeType) -> tuple[Any, ...]:
+    consts = tuple(
+        _code_key(c) if isinstance(c, CodeType) else repr(c) for c in code.co_consts
+    )
+    return code.co_code, consts, code.co_names
+
+
+def _factory_key(factory: Callable[[], Any]) -> tuple[Any, ...]:
+    """
+    Identify a default factory without calling it: by its qualified name, its
+    code (for functions, e.g. lambdas), and the modification time and size of
+    the file of its module (e.g. for classes).
+    """
+    module = getattr(factory, "__module__", None)
+    code = getattr(factory, "__code__", None)
+    stat = None
+    if file := getattr(sys.modules.get(module or ""), "__file__", None):
+        try:
+            stat = os.stat(file)
+        except OSError:
+            pass
+    return (
+        module,
+        getattr(factory, "__qualname__", None),
+        _code_key(code) if isinstance(code, CodeType) else None,
+        (stat.st_mtime_ns, stat.st_size) if stat is not None else None,
+    )
+
+
+class Unstable(Exception):
+    """
+    Raised for help that depends on values without a stable `repr`, e.g. the
+    default `<object at 0x...>`, which is not to be cached.
+    """
+
+
+_STABLE = (type(None), bool, int, float, complex, str, bytes, type, Enum, PurePath)
+
+_STABLE_NAMES = {
+    ("datetime", "date"),
+    ("datetime", "datetime"),
+    ("datetime", "time"),
+    ("datetime", "timedelta"),
+    ("decimal", "Decimal"),
+    ("fractions", "Fraction"),
+    ("uuid", "UUID"),
+}
+# by name, so that their modules are not imported just to check
+
+
+def _stable(value: Any) -> bool:
+    """
+    Whether `value` is of a type whose `repr` (and `str`) is known to be the
+    same across runs, e.g. not depending on its `id`.
+    """
+    if isinstance(value, list | tuple | set | frozenset):
+        return all(_stable(v) for v in value)  # type: ignore
+    if isinstance(value, dict):
+        return all(_stable(k) and _stable(v) for k, v in value.items())  # type: ignore
+    if isinstance(value, _STABLE):
+        return True
+    return (type(value).__module__, type(value).__qualname__) in _STABLE_NAMES
+
+
+def arg_key(arg: Arg) -> tuple[Any, ...]:
+    """
+    The parts of an argument that affect its help, without calling its default
+    factory (which is identified by its code and module file instead).
+
+    Raises:
+        Unstable: If the default has no stable `repr`.
+    """
+    factory = arg.default_factory
+    if factory is not None:
+        default = _factory_key(factory)
+    elif arg.required:
+        default = None  # not shown
+    elif _stable(arg.default):
+        default = repr(arg.default)
+    else:
+        raise Unstable(type(arg.default).__qualname__)
+    return (
+        arg.name.short,
+        arg.name.long,
+        arg.metavar,
+        arg.help,
+        arg.required,
+        arg.is_positional,
+        arg.is_named,
+        arg.is_nary,
+        arg.is_flag,
+        default,
+    )
+
+
+def var_args_usage_line(arg: Arg) -> Styled:
+    return Styled("[", _pos_usage(arg), "]")
+
+
+def var_kwargs_usage_line(arg: Arg) -> Styled:
+    return Styled("[", _repeated(_opt_usage(arg, "usage line")), "]")
+
+
+def wrap_usage(name: str, components: list[Styled], width: int) -> list[Styled]:
+    """
+    Word-wrap a usage line without splitting individual components
+    (e.g. "--foo bar" or "[--foo bar]" stay together).
+    Continuation lines are indented to align after the program name.
+    """
+    indent = len(name) + 1
+    lines: list[Styled] = []
+    current = Styled(f"{name} ")
+    current_len = indent
+
+    for comp in components:
+        comp_len = len(comp)
+        if current_len > indent and current_len + comp_len + 1 > width:
+            lines.append(current)
+            current = Styled(" " * indent, comp)
+            current_len = indent + comp_len
+        else:
+            if current_len > indent:
+                current.segments.append((" ", ""))
+                current_len += 1
+            current.segments += comp.segments
+            current_len += comp_len
+
+    lines.append(current)
+    return lines
+
+
+def table(rows: list[list[Styled]], width: int, min_width: int = 12) -> list[Styled]:
+    """
+    Lay out `rows` as borderless columns, each indented by two spaces.
+    If the columns do not fit into `width`, the widest ones are word-wrapped
+    (down to `min_width`).
+    """
+    if not rows:
+        return []
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    excess = sum(widths) + 2 * len(widths) - width
+    while excess > 0 and max(widths) > min_width:
+        widest = widths.index(max(widths))
+        widths[widest] -= 1
+        excess -= 1
+
+    lines: list[Styled] = []
+    for row in rows:
+        cells = [
+            cell.wrap(w) if len(cell) > w else [cell]
+            for cell, w in zip(row, widths, strict=True)
+        ]
+        for i in range(max(len(cell) for cell in cells)):
+            line = Styled()
+            for cell, w in zip(cells, widths, strict=True):
+                part = cell[i] if i < len(cell) else Styled()
+                line.segments += [
+                    ("  ", ""),
+                    *part.segments,
+                    (" " * (w - len(part)), ""),
+                ]
+            lines.append(line)
+    return lines
+
+
+def text_block(text: str, width: int) -> list[Styled]:
+    """
+    Word-wrap free text (such as a brief), keeping its line breaks.
+    """
+    return Styled(text).wrap(width)
+
+
+_INLINE = re.compile(
+    r"\*\*(?P<b1>.+?)\*\*|(?<!\w)__(?P<b2>.+?)__(?!\w)"
+    r"|\*(?P<i1>[^\s*](?:.*?[^\s*])?)\*|(?<!\w)_(?P<i2>[^\s_](?:.*?[^\s_])?)_(?!\w)"
+    r"|`(?P<code>[^`]+)`|\[(?P<link>[^\]]+)\]\([^)]*\)"
+)
+_ITEM = re.compile(
+    r"\s{0,3}(?:(?P<bullet>[-*+])|(?P<number>\d{1,9})[.)])\s+(?P<text>.*)"
+)
+_HEADING = re.compile(r"\s{0,3}#{1,6}\s+(?P<text>.*?)\s*#*\s*$")
+_FENCE = re.compile(r"\s{0,3}(```|~~~)")
+
+
+def _inline(text: str, style: str = "") -> Styled:
+    """
+    Style inline Markdown: `**bold**`, `*italic*`, `` `code` `` and `[links](...)`
+    (as their underlined text).
+    """
+    out = Styled()
+    pos = 0
+    for m in _INLINE.finditer(text):
+        out.segments.append((text[pos : m.start()], style))
+        if (bold := m["b1"] or m["b2"]) is not None:
+            out.segments += _inline(bold, f"{style} bold").segments
+        elif (italic := m["i1"] or m["i2"]) is not None:
+            out.segments += _inline(italic, f"{style} italic").segments
+        elif m["code"] is not None:
+            out.segments.append((m["code"], f"{style} bold cyan"))
+        else:
+            out.segments += _inline(m["link"], f"{style} underline blue").segments
+        pos = m.end()
+    out.segments.append((text[pos:], style))
+    return out
+
+
+def markdown_block(text: str, width: int) -> list[Styled]:
+    """
+    Render Markdown (such as a brief) into word-wrapped lines: paragraphs are
+    reflowed, list items are bulleted (or numbered) with a hanging indent,
+    headings are bold, and fenced code is kept as is. Blocks are separated by an
+    empty line.
+    """
+    blocks: list[list[Styled]] = []
+    paragraph: list[str] = []
+    item: tuple[Styled, list[str]] | None = None
+    in_list = False
+    lines = iter(text.splitlines())
+
+    def flush() -> None:
+        nonlocal item, in_list
+        if paragraph:
+            blocks.append(_inline(" ".join(paragraph)).wrap(width))
+            paragraph.clear()
+        if item is not None:
+            prefix, words = item
+            indent = " " * len(prefix)
+            wrapped = _inline(" ".join(words)).wrap(max(width - len(prefix), 1))
+            rendered = [
+                Styled(prefix if i == 0 else indent, line)
+                for i, line in enumerate(wrapped)
+            ]
+            if in_list:
+                blocks[-1] += rendered
+            else:
+                blocks.append(rendered)
+            item, in_list = None, True
+
+    for line in lines:
+        if not line.strip():
+            flush()
+            in_list = False
+        elif _FENCE.match(line):
+            flush()
+            in_list = False
+            code = [Styled()]
+            for code_line in lines:
+                if _FENCE.match(code_line):
+                    break
+                code.append(Styled(f" {code_line}"))
+            blocks.append([*code, Styled()])
+        elif m := _HEADING.match(line):
+            flush()
+            in_list = False
+            blocks.append(_inline(m["text"], "bold").wrap(width))
+        elif m := _ITEM.match(line):
+            if paragraph:
+                flush()
+                in_list = False
+            flush()
+            if m["bullet"]:
+                prefix = Styled((" • ", "bold"))
+            else:
+                prefix = Styled((f" {m['number']} ", "cyan"))
+            item = (prefix, [m["text"].strip()])
+        elif item is not None:
+            item[1].append(line.strip())  # continuation of the item
+        else:
+            paragraph.append(line.strip())
+    flush()
+
+    out: list[Styled] = []
+    for i, block in enumerate(blocks):
+        if i:
+            out.append(Styled())
+        out += block
+    return out
+
+
+def terminal(isatty: bool | None = None) -> tuple[int, bool]:
+    """
+    Detect the width of the output and whether it supports colors.
+    Follows the conventions of `COLUMNS`, `NO_COLOR`, `FORCE_COLOR` and `TERM`.
+    If `isatty` is None, whether the output is a terminal is detected as well.
+    """
+    tty = sys.stdout.isatty() if isatty is None else isatty
+    width = 80
+    if columns := os.environ.get("COLUMNS", "").strip():
+        width = int(columns) if columns.isdigit() else width
+    elif tty:
+        try:
+            width = os.get_terminal_size(sys.stdout.fileno()).columns
+        except (OSError, ValueError):
+            pass
+    if os.environ.get("NO_COLOR"):
+        color = False
+    elif os.environ.get("FORCE_COLOR"):
+        color = True
+    else:
+        color = tty and os.environ.get("TERM") != "dumb"
+    return width, color
+
+
+def page(data: bytes) -> bool:
+    """
+    Show `data` through the pager command in `$STARTLE_PAGER` (e.g. `less`) if
+    stdout is a terminal that it does not fit into. Paging is opt-in: without
+    `STARTLE_PAGER` (or with it empty), help is simply printed.
+
+    Returns:
+        Whether `data` was shown.
+    """
+    command = os.environ.get(PAGER_ENV, "")
+    if not command or not sys.stdout.isatty():
+        return False
+    try:
+        height = os.get_terminal_size(sys.stdout.fileno()).lines
+    except (OSError, ValueError):
+        return False
+    if data.count(b"\n") < height:
+        return False
+
+    import shlex
+    import subprocess
+
+    env = {"LESS": "FRX", **os.environ}  # -R to keep colors, -F to exit if short
+    try:
+        subprocess.run(shlex.split(command), input=data, env=env, check=False)
+    except OSError:
+        return False
+    return True
+
+
+@cache
+def _version() -> str:
+    """
+    The version of startle, or (e.g. in a source checkout, where the version
+    file is not generated) the modification time of this module.
+    """
+    try:
+        from importlib import import_module
+
+        return import_module("._version", __package__).__version__
+    except ImportError:
+        return str(os.stat(__file__).st_mtime_ns)
+
+
+_CAPTURED: ContextVar[list[str] | None] = ContextVar("startle_output", default=None)
+
+
+@contextmanager
+def capture_output() -> Generator[list[str]]:
+    """
+    Capture what parsers write before exiting (e.g. help upon `--help`) into a
+    list of texts, instead of writing it to stdout. Unlike redirecting
+    `sys.stdout`, this only affects the current context (e.g. thread).
+    """
+    texts: list[str] = []
+    token = _CAPTURED.set(texts)
+    try:
+        yield texts
+    finally:
+        _CAPTURED.reset(token)
+
+
+def write_text(text: str) -> None:
+    """
+    Write text to stdout, or to the captured output if any.
+    """
+    if (texts := _CAPTURED.get()) is not None:
+        texts.append(text)
+    else:
+        sys.stdout.write(text)
+
+
+def write_help(
+    key: tuple[Any, ...] | None, render: Callable[[int], list[Styled]]
+) -> None:
+    """
+    Write help to stdout (or to the captured output, as plain text), reusing the
+    cached rendering for `key` if available.
+
+    Args:
+        key: The fingerprint of everything that the help depends on, or None
+            if the help is not to be cached.
+        render: Renders the help lines for a given width, upon a cache miss.
+    """
+    from ._cache import cache_key, read, write
+
+    texts = _CAPTURED.get()
+    if texts is None:
+        width, color = terminal()
+        encoding = getattr(sys.stdout, "encoding", None) or "utf-8"
+    else:
+        (width, _), color, encoding = terminal(isatty=False), False, "utf-8"
+    entry = None
+    if key is not None:
+        entry = cache_key(FORMAT, _version(), key, width, color, encoding)
+    data = read("help", entry) if entry is not None else None
+    if data is None:
+        text = "".join(line.render(color).rstrip() + "\n" for line in render(width))
+        data = text.encode(encoding, errors="replace")
+        if entry is not None:
+            write("help", entry, data)
+
+    if texts is not None:
+        texts.append(data.decode(encoding))
+        return
+    if page(data):
+        return
+    out = sys.stdout
+    buffer = getattr(out, "buffer", None)
+    if buffer is None:
+        out.write(data.decode(encoding, errors="replace"))
+        out.flush()
+    else:
+        out.flush()
+        buffer.write(data)
+        buffer.flush()
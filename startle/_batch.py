@@ -0,0 +1,310 @@
+"""
+Batch mode: run a command per line of input, reusing the same parsers, and
+report the results as JSON lines.
+"""
+
+import shlex
+import sys
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Literal, Protocol, TextIO, TypeVar, cast
+
+from ._ansi import capture_output
+from ._inspect.make_args import make_args_from_func
+from ._start import Funcs, call_func, make_cmds
+from .error import (
+    CmdsRecurseError,
+    ParserConfigError,
+    ParserOptionError,
+    ParserValueError,
+    SingleFunctionDefaultCommandError,
+    UnsupportedExecutorError,
+)
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+Executor = Literal["thread", "process", "async"]
+
+EXECUTORS: tuple[Executor, ...] = ("thread", "process", "async")
+
+H = TypeVar("H", bound="_Handle")
+
+
+@dataclass
+class _Job:
+    """
+    A parsed line, ready to be invoked.
+    """
+
+    line: int
+    func: Callable[..., Any]
+    args: list[Any] = field(default_factory=list[Any])
+    kwargs: dict[str, Any] = field(default_factory=dict[str, Any])
+
+
+@dataclass
+class _Outcome:
+    status: int
+    result: Any = None
+    error: str | None = None
+
+
+def _exit_status(e: SystemExit) -> int:
+    return e.code if isinstance(e.code, int) else 0 if e.code is None else 1
+
+
+def _invoke(
+    func: Callable[..., Any], args: list[Any], kwargs: dict[str, Any]
+) -> _Outcome:
+    """
+    Invoke a command, turning its failures into an outcome.
+    Module-level so that it can be used with a process pool.
+    """
+    try:
+        return _Outcome(0, call_func(func, args, kwargs, None))
+    except SystemExit as e:
+        return _Outcome(_exit_status(e))
+    except Exception as e:
+        return _Outcome(1, error=f"{type(e).__name__}: {e}")
+
+
+async def _ainvoke(
+    func: Callable[..., Any], args: list[Any], kwargs: dict[str, Any]
+) -> _Outcome:
+    """
+    Invoke a command on the running loop, with sync commands run in a thread.
+    """
+    import asyncio
+    from inspect import iscoroutinefunction
+
+    try:
+        if iscoroutinefunction(func):
+            return _Outcome(0, await func(*args, **kwargs))
+        return _Outcome(0, await asyncio.to_thread(func, *args, **kwargs))
+    except SystemExit as e:
+        return _Outcome(_exit_status(e))
+    except Exception as e:
+        return _Outcome(1, error=f"{type(e).__name__}: {e}")
+
+
+def _preparer(
+    obj: "Callable[..., Any] | Funcs",
+    name: str | None,
+    default: str | None,
+    recurse: bool,
+    naming: Literal["flat", "nested"],
+) -> Callable[[list[str]], tuple[Callable[..., Any], list[Any], dict[str, Any]]]:
+    """
+    Build the parsers once, and return a function to parse arguments into a
+    function call with them.
+    """
+    if isinstance(obj, list) or isinstance(obj, dict):
+        if recurse:
+            raise CmdsRecurseError()
+        cmds, path2func = make_cmds(cast(Funcs, obj), name or "", default or "")
+
+        def prepare_cmd(argv: list[str]):
+            path, args, remaining = cmds.get_cmd_parser(argv)
+            f_args, f_kwargs = args.parse(remaining).make_func_args()
+            return path2func[path], f_args, f_kwargs
+
+        return prepare_cmd
+
+    if default is not None:
+        raise SingleFunctionDefaultCommandError()
+    func = obj
+    args_ = make_args_from_func(func, name or "", recurse=recurse, naming=naming)
+
+    def prepare_func(argv: list[str]):
+        f_args, f_kwargs = args_.parse(argv).make_func_args()
+        return func, f_args, f_kwargs
+
+    return prepare_func
+
+
+def _parse_lines(
+    prepare: Callable[
+        [list[str]], tuple[Callable[..., Any], list[Any], dict[str, Any]]
+    ],
+    lines: Iterable[str],
+) -> Iterator[_Job | tuple[int, _Outcome]]:
+    """
+    Parse each non-empty, non-comment line. Lines that fail to parse are
+    yielded with their (failed) outcome directly, and so are lines that exit
+    early (e.g. with `--help`), with what they would have printed as error.
+    """
+    for lineno, line in enumerate(lines, 1):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        item: _Job | tuple[int, _Outcome]
+        with capture_output() as printed:
+            try:
+                func, f_args, f_kwargs = prepare(shlex.split(line))
+                item = _Job(lineno, func, f_args, f_kwargs)
+            except (ParserOptionError, ParserValueError) as e:
+                item = lineno, _Outcome(2, error=str(e))
+            except ParserConfigError as e:  # e.g. of a lazily built command
+                item = lineno, _Outcome(2, error=f"{type(e).__name__}: {e}")
+            except ValueError as e:  # from shlex
+                item = lineno, _Outcome(2, error=str(e))
+            except SystemExit as e:  # e.g. --help
+                item = lineno, _Outcome(_exit_status(e), error="".join(printed))
+        yield item
+
+
+class _Handle(Protocol):
+    """
+    A job in flight, e.g. a `concurrent.futures.Future` or an `asyncio.Task`.
+    """
+
+    def done(self) -> bool: ...
+
+
+def _ordered(
+    items: Iterable[_Job | tuple[int, _Outcome]],
+    submit: Callable[[_Job], H],
+    wait: Callable[[H], _Outcome],
+    window: int,
+) -> Iterator[tuple[int, _Outcome]]:
+    """
+    Submit jobs, keeping at most `window` of them in flight, and yield their
+    outcomes in the order of the input, as soon as they (and all the ones
+    before them) are done.
+    """
+    pending: deque[tuple[int, H | _Outcome]] = deque()
+
+    def ready() -> bool:
+        handle = pending[0][1]
+        return isinstance(handle, _Outcome) or handle.done()
+
+    def pop() -> tuple[int, _Outcome]:
+        line, handle = pending.popleft()
+        return line, handle if isinstance(handle, _Outcome) else wait(handle)
+
+    for item in items:
+        pending.append((item.line, submit(item)) if isinstance(item, _Job) else item)
+        while pending and (len(pending) > window or ready()):
+            yield pop()
+    while pending:
+        yield pop()
+
+
+def _run_pool(
+    items: Iterable[_Job | tuple[int, _Outcome]],
+    pool: "ThreadPoolExecutor | ProcessPoolExecutor",
+    window: int,
+) -> Iterator[tuple[int, _Outcome]]:
+    def submit(job: _Job) -> "Future[_Outcome]":
+        return pool.submit(_invoke, job.func, job.args, job.kwargs)
+
+    def wait(future: "Future[_Outcome]") -> _Outcome:
+        return future.result()
+
+    return _ordered(items, submit, wait, window)
+
+
+def _run_async(
+    items: Iterable[_Job | tuple[int, _Outcome]], jobs: int, window: int
+) -> Iterator[tuple[int, _Outcome]]:
+    """
+    Run jobs on a single event loop, at most `jobs` at a time.
+    """
+    import asyncio
+
+    loop = asyncio.new_event_loop()
+    semaphore = asyncio.Semaphore(jobs)
+
+    async def bounded(job: _Job) -> _Outcome:
+        async with semaphore:
+            return await _ainvoke(job.func, job.args, job.kwargs)
+
+    def submit(job: _Job) -> "asyncio.Task[_Outcome]":
+        return loop.create_task(bounded(job))
+
+    def wait(task: "asyncio.Task[_Outcome]") -> _Outcome:
+        # runs the loop, hence all the other tasks in flight as well
+        return loop.run_until_complete(task)
+
+    try:
+        yield from _ordered(items, submit, wait, window)
+    finally:
+        loop.close()
+
+
+def run_batch(
+    obj: "Callable[..., Any] | Funcs",
+    lines: Iterable[str],
+    *,
+    jobs: int = 1,
+    executor: Executor = "thread",
+    output: TextIO | None = None,
+    name: str | None = None,
+    default: str | None = None,
+    recurse: bool = False,
+    naming: Literal["flat", "nested"] = "flat",
+) -> int:
+    """
+    Given a function, or a container of functions `obj`, run a command per line
+    of `lines`, as if each line were the command-line arguments of `start()`.
+
+    Parsers are built only once. Each line is parsed in order, and the commands
+    are run concurrently. For each line, a JSON object with the line number,
+    exit status (0 on success, 2 for parse errors), the return value of the
+    command (or the error message) is written to `output` as soon as it and all
+    lines before it are done.
+
+    Empty lines, and lines starting with `#` are skipped. Lines that exit early
+    (e.g. with `--help`) report what they would have printed as their error.
+
+    Args:
+        obj: The function or functions to parse the arguments for and invoke.
+            See `start()`.
+        lines: The lines, each containing the arguments for a command.
+        jobs: The maximum number of commands to run concurrently.
+        executor: How to run the commands: in a pool of threads, a pool of processes
+            (functions, arguments and return values should then be picklable), or
+            on a single event loop ("async", where sync commands run in threads).
+        output: Where to write the results to. If None, uses stdout.
+        name: The name of the program.
+        default: The default subcommand. See `start()`.
+        recurse: (experimental) Whether to recursively parse objects using their
+            initializers. See `start()`.
+        naming: How to name nested arguments when `recurse` is True. See `start()`.
+    Returns:
+        0 if all the commands succeeded, 1 otherwise.
+    """
+    if executor not in EXECUTORS:
+        raise UnsupportedExecutorError(executor, EXECUTORS)
+    out = sys.stdout if output is None else output
+    prepare = _preparer(obj, name, default, recurse, naming)
+    items = _parse_lines(prepare, lines)
+
+    window = 4 * jobs  # bounds the number of parsed lines held in memory
+
+    if executor == "async":
+        return _write(_run_async(items, jobs, window), out)
+
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    pool_type = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+    with pool_type(max_workers=jobs) as pool:
+        return _write(_run_pool(items, pool, window), out)
+
+
+def _write(outcomes: Iterable[tuple[int, _Outcome]], output: TextIO) -> int:
+    import json
+
+    status = 0
+    for line, outcome in outcomes:
+        record: dict[str, Any] = {"line": line, "status": outcome.status}
+        if outcome.error is not None:
+            record["error"] = outcome.error
+        else:
+            record["result"] = outcome.result
+        output.write(json.dumps(record, default=str) + "\n")
+        output.flush()
+        if outcome.status:
+            status = 1
+    return status
@@ -0,0 +1,171 @@
+"""
+A small on-disk cache for data derived from parser specs (e.g. rendered help),
+config files, or the results of commands, so that repeated invocations of a
+program can reuse it across processes.
+
+The cache lives in `$STARTLE_CACHE_DIR`, falling back to `$XDG_CACHE_HOME/startle`
+or `~/.cache/startle`. Setting `STARTLE_CACHE_DIR` to an empty string disables it.
+Failures to read or write the cache are never fatal.
+"""
+
+import os
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, BinaryIO
+
+
+def cache_dir() -> Path | None:
+    """
+    Get the root directory of the cache, or None if caching is disabled.
+    """
+    root = os.environ.get("STARTLE_CACHE_DIR")
+    if root is not None:
+        return Path(root) if root else None
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    return Path(xdg or Path.home() / ".cache") / "startle"
+
+
+def cache_key(*parts: Any) -> str:
+    """
+    Hash the given parts (which should have a deterministic `repr`) into a key.
+    """
+    import hashlib
+
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+
+def read(namespace: str, key: str, *, touch: bool = False) -> bytes | None:
+    """
+    Read the entry `key` from the `namespace` of the cache, if it exists. If
+    `touch`, mark it as recently used, so that it is evicted last.
+    """
+    if (file := open_entry(namespace, key, touch=touch)) is None:
+        return None
+    try:
+        with file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def open_entry(namespace: str, key: str, *, touch: bool = False) -> BinaryIO | None:
+    """
+    Open the entry `key` of the `namespace` of the cache for reading (e.g. bit by
+    bit), if it exists. If `touch`, mark it as recently used.
+    """
+    if (root := cache_dir()) is None:
+        return None
+    path = root / namespace / key
+    try:
+        file = open(path, "rb")
+    except OSError:
+        return None
+    if touch:
+        with suppress(OSError):
+            os.utime(path)
+    return file
+
+
+def write(
+    namespace: str,
+    key: str,
+    data: bytes,
+    *,
+    max_entries: int | None = 256,
+    max_bytes: int | None = None,
+) -> None:
+    """
+    Atomically write the entry `key` into the `namespace` of the cache, evicting
+    the least recently modified entries if there are more than `max_entries`, or
+    more than `max_bytes` in total. Entries larger than `max_bytes` are not
+    written at all.
+    """
+    if max_bytes is not None and len(data) > max_bytes:
+        return
+    entry = Pending(namespace, key, max_entries=max_entries, max_bytes=max_bytes)
+    entry.write(data)
+    entry.commit()
+
+
+class Pending:
+    """
+    An entry of the cache written bit by bit (e.g. as the items of a stream are
+    produced) into a temporary file, which only replaces the entry `key` once
+    committed, as in `write()`. It is dropped if abandoned instead (e.g. when the
+    stream is not consumed to its end), or once larger than `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        key: str,
+        *,
+        max_entries: int | None = 256,
+        max_bytes: int | None = None,
+    ) -> None:
+        self.max_entries, self.max_bytes, self.size = max_entries, max_bytes, 0
+        self.file: BinaryIO | None = None
+        if (root := cache_dir()) is None:
+            return
+        self.path = root / namespace / key
+        self.tmp = self.path.with_name(f".{key}.{os.getpid()}.{id(self):x}.tmp")
+        with suppress(OSError):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = open(self.tmp, "wb")
+
+    def write(self, data: bytes) -> None:
+        if self.file is None:
+            return
+        self.size += len(data)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            return self.abandon()
+        try:
+            self.file.write(data)
+        except OSError:
+            self.abandon()
+
+    def commit(self) -> None:
+        if (file := self.file) is None:
+            return
+        self.file = None
+        try:
+            file.close()
+            os.replace(self.tmp, self.path)
+            prune(self.path.parent, self.max_entries, self.max_bytes)
+        except OSError:
+            with suppress(OSError):
+                self.tmp.unlink(missing_ok=True)
+
+    def abandon(self) -> None:
+        if (file := self.file) is None:
+            return
+        self.file = None
+        with suppress(OSError):
+            file.close()
+        with suppress(OSError):
+            self.tmp.unlink(missing_ok=True)
+
+
+def prune(
+    directory: Path, max_entries: int | None, max_bytes: int | None = None
+) -> None:
+    """
+    Remove the oldest entries of `directory` so that at most `max_entries`
+    remain, of at most `max_bytes` in total.
+    """
+    entries = [
+        (stat.st_mtime_ns, stat.st_size, e.path)
+        for e in os.scandir(directory)
+        if not e.name.startswith(".")
+        for stat in [e.stat()]
+    ]
+    count, size = len(entries), sum(entry[1] for entry in entries)
+    entries.sort()
+    for _, entry_size, path in entries:
+        if (max_entries is None or count <= max_entries) and (
+            max_bytes is None or size <= max_bytes
+        ):
+            break
+        with suppress(OSError):
+            os.unlink(path)
+        count, size = count - 1, size - entry_size
@@ -0,0 +1,616 @@
+"""
+Static shell completion: self-contained bash, zsh and fish completion scripts,
+generated from a completion spec (see `Args.completion_spec()`), so that
+completing a command line does not need to start Python at all.
+
+The spec is compiled into lookup functions (`case`/`switch` statements keyed
+by the command path, e.g. `db migrate`), which a small engine per shell uses
+to walk the words typed so far:
+
+- `is_cmd NODE WORD`: whether `WORD` is a subcommand of the group `NODE`
+- `default NODE`: the default subcommand of the group `NODE`, if any
+- `cmds NODE` / `opts NODE`: the subcommands / option names of `NODE`
+- `value NODE OPT`: `s <action>` (or `n <action>` for n-ary options) if `OPT`
+  takes a value, where action is `p` (path), `t` (text), `c<i>` (choices), or
+  `d` (dynamic, completed by running the program with `_STARTLE_COMPLETE` and
+  `COMP_LINE`, see `start()`)
+- `pos NODE N`: the action for the `N`th positional argument of `NODE`
+- `choices I`: the `I`th list of choices
+"""
+
+import os
+import re
+import shlex
+import sys
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from inspect import isclass
+from pathlib import PurePath
+from typing import TYPE_CHECKING, Any, Literal
+
+from ._typing import strip_optional
+from .error import UnsupportedShellError
+
+if TYPE_CHECKING:
+    from ._start import Funcs
+    from .arg import Arg
+    from .args import Args
+    from .cmds import Cmds
+
+Shell = Literal["bash", "zsh", "fish"]
+
+SHELLS: tuple[Shell, ...] = ("bash", "zsh", "fish")
+
+
+def _is_path(type_: Any) -> bool:
+    type_ = strip_optional(type_)
+    return isclass(type_) and issubclass(type_, PurePath)
+
+
+def value_completion(arg: "Arg") -> list[str] | str | None:
+    """
+    How to complete the value of an argument: a list of choices, `"path"` for
+    paths, `"dynamic"` if a completer is registered for its type, or None for
+    free text.
+    """
+    if arg.completer is not None:
+        return "dynamic"
+    if isinstance(arg.metavar, list):
+        return list(arg.metavar)
+    if _is_path(arg.type_):
+        return "path"
+    return None
+
+
+def _complete_path(prefix: str) -> list[str]:
+    head, tail = os.path.split(prefix)
+    try:
+        entries = list(os.scandir(os.path.expanduser(head) or "."))
+    except OSError:
+        return []
+    return sorted(
+        os.path.join(head, entry.name) + ("/" if entry.is_dir() else "")
+        for entry in entries
+        if entry.name.startswith(tail)
+        and (tail.startswith(".") or not entry.name.startswith("."))
+    )
+
+
+def complete_value(arg: "Arg", prefix: str) -> list[str]:
+    """
+    Complete the value of an argument, given the prefix typed so far.
+    """
+    completer = arg.completer
+    if completer is not None:
+        return [value for value in completer(prefix) if value.startswith(prefix)]
+    if isinstance(arg.metavar, list):
+        return [value for value in arg.metavar if value.startswith(prefix)]
+    if _is_path(arg.type_):
+        return _complete_path(prefix)
+    return []
+
+
+def complete_line(parser: "Args | Cmds", line: str) -> list[str]:
+    """
+    Complete the last word of a (partial) command line, including the name of
+    the program.
+    """
+    words, text = split_line(line)
+    return parser.complete(words[1:], text)
+
+
+def split_line(line: str) -> tuple[list[str], str]:
+    """
+    Split a (partial) command line into the complete words, and the word being
+    typed (possibly empty, or with an unterminated quote).
+    """
+    for closing in ["", '"', "'"]:
+        try:
+            words = shlex.split(line + closing)
+            break
+        except ValueError:
+            continue
+    else:
+        return [], ""
+    if not words or (line[-1:].isspace() and not closing):
+        return words, ""
+    return words[:-1], words[-1]
+
+
+def spec_hash(spec: dict[str, Any]) -> str:
+    """
+    A short, stable hash of a completion spec, to tell whether a generated
+    script is stale.
+    """
+    import hashlib
+    import json
+
+    data = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode()).hexdigest()[:16]
+
+
+@dataclass
+class _Tables:
+    """
+    The completion spec flattened into lookup tables, keyed by command path.
+    """
+
+    cmds: dict[str, list[str]] = field(default_factory=dict[str, list[str]])
+    defaults: dict[str, str] = field(default_factory=dict[str, str])
+    opts: dict[str, list[str]] = field(default_factory=dict[str, list[str]])
+    values: list[tuple[str, list[str], str]] = field(
+        default_factory=list[tuple[str, list[str], str]]
+    )  # (node, option names, value)
+    positionals: dict[str, list[str]] = field(default_factory=dict[str, list[str]])
+    rest: dict[str, str] = field(default_factory=dict[str, str])
+    choices: list[list[str]] = field(default_factory=list[list[str]])
+
+    def _action(self, complete: list[str] | str | None) -> str:
+        if complete is None:
+            return "t"
+        if complete == "path":
+            return "p"
+        if complete == "dynamic":
+            return "d"
+        assert isinstance(complete, list), "Programming error!"
+        if complete not in self.choices:
+            self.choices.append(complete)
+        return f"c{self.choices.index(complete)}"
+
+    def add(self, node: str, spec: dict[str, Any]) -> None:
+        if "commands" in spec:  # a command group
+            self.cmds[node] = list(spec["commands"])
+            self.opts[node] = ["--help"]
+            if spec["default"]:
+                self.defaults[node] = spec["default"]
+            for cmd, child in spec["commands"].items():
+                self.add(f"{node} {cmd}".lstrip(), child)
+            return
+
+        self.opts[node] = [name for opt in spec["options"] for name in opt["names"]]
+        for opt in spec["options"]:
+            if (value := opt["value"]) is not None:
+                kind = "n" if value["nary"] else "s"
+                action = self._action(value["complete"])
+                self.values.append((node, opt["names"], f"{kind} {action}"))
+        self.positionals[node] = [self._action(c) for c in spec["positionals"]]
+        self.rest[node] = self._action(spec["rest"])
+
+    def positional_arms(self) -> Iterable[tuple[str, int | None, str]]:
+        """
+        Yield (node, index, action) for positional arguments, with None as the
+        index for the rest of them, skipping the ones that are free text anyway.
+        """
+        for node, actions in self.positionals.items():
+            rest = self.rest[node]
+            for i, action in enumerate(actions):
+                if action != rest:
+                    yield node, i, action
+        for node, rest in self.rest.items():
+            if rest != "t":
+                yield node, None, rest
+
+
+def _func_name(prog: str) -> str:
+    return "_" + re.sub(r"\W", "_", prog)
+
+
+def _sh_words(words: Iterable[str]) -> str:
+    return " ".join(shlex.quote(word) for word in words)
+
+
+def _sh_case(
+    func: str, subject: str, arms: Iterable[tuple[list[str], str]], fallback: str
+) -> str:
+    lines = [f"{func}() {{", f'    case "{subject}" in']
+    for patterns, body in arms:
+        lines.append(f"        {'|'.join(patterns)}) {body} ;;")
+    lines += [f"        *) {fallback} ;;", "    esac", "}"]
+    return "\n".join(lines)
+
+
+def _sh_tables(t: _Tables, f: str) -> str:
+    """
+    Lookup functions in the syntax common to bash and zsh. They set the
+    variables `r` (a string) and `a` (an array) of the caller.
+    """
+    q = shlex.quote
+    is_cmd = [([q(f"{n}|{c}") for c in cmds], "return 0") for n, cmds in t.cmds.items()]
+    positionals = [
+        ([q(f"{n}|") + ("*" if i is None else str(i))], f"r={a}")
+        for n, i, a in t.positional_arms()
+    ]
+    return "\n\n".join([
+        _sh_case(f"{f}_is_cmd", "$1|$2", is_cmd, "return 1"),
+        _sh_case(
+            f"{f}_default",
+            "$1",
+            [([q(n)], f"r={q(d)}") for n, d in t.defaults.items()],
+            "r=",
+        ),
+        _sh_case(
+            f"{f}_cmds",
+            "$1",
+            [([q(n)], f"a=({_sh_words(c)})") for n, c in t.cmds.items()],
+            "a=()",
+        ),
+        _sh_case(
+            f"{f}_opts",
+            "$1",
+            [([q(n)], f"a=({_sh_words(o)})") for n, o in t.opts.items()],
+            "a=()",
+        ),
+        _sh_case(
+            f"{f}_value",
+            "$1|$2",
+            [([q(f"{n}|{o}") for o in opts], f"r={q(v)}") for n, opts, v in t.values],
+            "r=",
+        ),
+        _sh_case(f"{f}_pos", "$1|$2", positionals, "r=t"),
+        _sh_case(
+            f"{f}_choices",
+            "$1",
+            [([str(i)], f"a=({_sh_words(c)})") for i, c in enumerate(t.choices)],
+            "a=()",
+        ),
+    ])
+
+
+_SH_CANDIDATES = """\
+# Usage: {f}_candidates CUR WORDS...
+# Walks the WORDS before the current word CUR, and sets `a` to the candidates
+# for CUR, or `r` to `p` (or `d`) if CUR should be completed as a path (or by
+# the program itself).
+{f}_candidates() {{
+    local cur=$1 node= npos=0 pending= nary= dashdash= action= w
+    shift
+    for w in "$@"; do
+        if [[ -n $pending ]]; then
+            pending=
+            continue
+        fi
+        if [[ -z $dashdash ]] && {f}_is_cmd "$node" "${{w//_/-}}"; then
+            node=${{node:+$node }}${{w//_/-}}
+            npos=0
+            continue
+        fi
+        {f}_default "$node"
+        if [[ -n $r ]]; then
+            node=${{node:+$node }}$r
+        fi
+        if [[ -z $dashdash && $w == -?* ]]; then
+            nary=
+            if [[ $w == -- ]]; then
+                dashdash=1
+            elif [[ $w != *=* ]]; then
+                {f}_value "$node" "$w"
+                case $r in
+                    s\\ *) pending=${{r#s }} ;;
+                    n\\ *) nary=${{r#n }} ;;
+                esac
+            fi
+            continue
+        fi
+        if [[ -z $nary ]]; then
+            npos=$((npos + 1))
+        fi
+    done
+
+    r=
+    action=$pending
+    if [[ -z $action ]]; then
+        {f}_cmds "$node"
+        if [[ ${{#a[@]}} -gt 0 && $cur != -* ]]; then
+            return
+        fi
+        {f}_default "$node"
+        if [[ -n $r ]]; then
+            node=${{node:+$node }}$r
+            r=
+        fi
+        if [[ -z $dashdash && $cur == -* ]]; then
+            {f}_opts "$node"
+            return
+        fi
+        action=$nary
+        if [[ -z $action ]]; then
+            {f}_pos "$node" "$npos"
+            action=$r
+            r=
+        fi
+    fi
+    a=()
+    case $action in
+        p|d) r=$action ;;
+        c*) {f}_choices "${{action#c}}" ;;
+    esac
+}}"""
+
+_BASH = """\
+{tables}
+
+{candidates}
+
+{f}() {{
+    local cur=${{COMP_WORDS[COMP_CWORD]}} r w
+    local -a a
+    {f}_candidates "$cur" "${{COMP_WORDS[@]:1:COMP_CWORD-1}}"
+    COMPREPLY=()
+    if [[ $r == p ]]; then
+        compopt -o filenames 2>/dev/null
+        local IFS=$'\\n'
+        COMPREPLY=($(compgen -f -- "$cur"))
+    elif [[ $r == d ]]; then
+        local IFS=$'\\n'
+        COMPREPLY=($(_STARTLE_COMPLETE={prog} COMP_LINE=${{COMP_LINE:0:COMP_POINT}} \\
+            COMP_POINT=$COMP_POINT "${{COMP_WORDS[0]}}" 2>/dev/null))
+    else
+        for w in "${{a[@]}}"; do
+            if [[ $w == "$cur"* ]]; then
+                COMPREPLY+=("$w")
+            fi
+        done
+    fi
+}}
+
+complete -F {f} {prog}
+"""
+
+_ZSH = """\
+{tables}
+
+{candidates}
+
+{f}() {{
+    local cur=${{words[CURRENT]}} r
+    local -a a
+    {f}_candidates "$cur" "${{(@)words[2,CURRENT-1]}}"
+    if [[ $r == p ]]; then
+        _files
+    elif [[ $r == d ]]; then
+        compadd -- ${{(f)"$(_STARTLE_COMPLETE={prog} COMP_LINE=${{BUFFER[1,CURSOR]}} \\
+            COMP_POINT=$CURSOR ${{words[1]}} 2>/dev/null)"}}
+    else
+        compadd -- "${{a[@]}}"
+    fi
+}}
+
+if [[ $funcstack[1] == {f} ]]; then
+    {f} "$@"
+else
+    compdef {f} {prog}
+fi
+"""
+
+
+def _fish_quote(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _fish_pattern(value: str, wildcard: bool = False) -> str:
+    """
+    Quote a literal as a pattern for `case`, which treats `*` and `?` as
+    wildcards even when quoted. If `wildcard`, matches anything after it.
+    """
+    return _fish_quote(re.sub(r"([\\*?])", r"\\\1", value) + ("*" if wildcard else ""))
+
+
+def _fish_switch(
+    func: str, subject: str, arms: Iterable[tuple[list[str], str]], fallback: str
+) -> str:
+    lines = [f"function {func}", f'    switch "{subject}"']
+    for patterns, body in arms:
+        lines += [f"        case {' '.join(patterns)}", f"            {body}"]
+    lines += ["        case '*'", f"            {fallback}", "    end", "end"]
+    return "\n".join(lines)
+
+
+def _fish_echo(words: Iterable[str]) -> str:
+    return "printf '%s\\n' " + " ".join(_fish_quote(word) for word in words)
+
+
+def _fish_tables(t: _Tables, f: str) -> str:
+    """
+    Lookup functions in fish syntax. They print their results.
+    """
+    p = _fish_pattern
+    is_cmd = [([p(f"{n}|{c}") for c in cmds], "return 0") for n, cmds in t.cmds.items()]
+    positionals = [
+        ([p(f"{n}|", wildcard=True) if i is None else p(f"{n}|{i}")], f"echo {a}")
+        for n, i, a in t.positional_arms()
+    ]
+    return "\n\n".join([
+        _fish_switch(f"{f}_is_cmd", "$argv[1]|$argv[2]", is_cmd, "return 1"),
+        _fish_switch(
+            f"{f}_default",
+            "$argv[1]",
+            [([p(n)], f"echo {_fish_quote(d)}") for n, d in t.defaults.items()],
+            "return",
+        ),
+        _fish_switch(
+            f"{f}_cmds",
+            "$argv[1]",
+            [([p(n)], _fish_echo(c)) for n, c in t.cmds.items()],
+            "return",
+        ),
+        _fish_switch(
+            f"{f}_opts",
+            "$argv[1]",
+            [([p(n)], _fish_echo(o)) for n, o in t.opts.items()],
+            "return",
+        ),
+        _fish_switch(
+            f"{f}_value",
+            "$argv[1]|$argv[2]",
+            [
+                ([p(f"{n}|{o}") for o in opts], f"echo {_fish_quote(v)}")
+                for n, opts, v in t.values
+            ],
+            "return",
+        ),
+        _fish_switch(f"{f}_pos", "$argv[1]|$argv[2]", positionals, "echo t"),
+        _fish_switch(
+            f"{f}_choices",
+            "$argv[1]",
+            [([str(i)], _fish_echo(c)) for i, c in enumerate(t.choices)],
+            "return",
+        ),
+    ])
+
+
+_FISH = """\
+{tables}
+
+function {f}_join
+    string trim -- "$argv[1] $argv[2]"
+end
+
+function {f}
+    set -l words (commandline -opc)
+    set -e words[1]
+    set -l cur (commandline -ct)
+    set -l node ''
+    set -l npos 0
+    set -l pending ''
+    set -l nary ''
+    set -l dashdash ''
+    for w in $words
+        if test -n "$pending"
+            set pending ''
+            continue
+        end
+        set -l sub (string replace -a _ - -- $w)
+        if test -z "$dashdash"; and {f}_is_cmd "$node" "$sub"
+            set node ({f}_join "$node" "$sub")
+            set npos 0
+            continue
+        end
+        set -l default ({f}_default "$node")
+        if test -n "$default"
+            set node ({f}_join "$node" "$default")
+        end
+        if test -z "$dashdash"; and string match -q -- '-?*' $w
+            set nary ''
+            if test "$w" = --
+                set dashdash 1
+            else if not string match -q -- '*=*' $w
+                set -l value ({f}_value "$node" "$w")
+                switch (string sub -l 1 -- "$value")
+                    case s
+                        set pending (string sub -s 3 -- "$value")
+                    case n
+                        set nary (string sub -s 3 -- "$value")
+                end
+            end
+            continue
+        end
+        if test -z "$nary"
+            set npos (math $npos + 1)
+        end
+    end
+
+    set -l action $pending
+    if test -z "$action"
+        set -l cmds ({f}_cmds "$node")
+        if set -q cmds[1]; and not string match -q -- '-*' "$cur"
+            printf '%s\\n' $cmds
+            return
+        end
+        set -l default ({f}_default "$node")
+        if test -n "$default"
+            set node ({f}_join "$node" "$default")
+        end
+        if test -z "$dashdash"; and string match -q -- '-*' "$cur"
+            {f}_opts "$node"
+            return
+        end
+        set action $nary
+        if test -z "$action"
+            set action ({f}_pos "$node" $npos)
+        end
+    end
+    if test "$action" = p
+        __fish_complete_path "$cur"
+    else if test "$action" = d
+        set -l line (commandline -cp)
+        env _STARTLE_COMPLETE={prog} COMP_LINE="$line" \\
+            COMP_POINT=(string length -- "$line") (commandline -opc)[1] 2>/dev/null
+    else if string match -q -- 'c*' "$action"
+        {f}_choices (string sub -s 2 -- "$action")
+    end
+end
+
+complete -c {prog} -e
+complete -c {prog} -f -a '({f})'
+"""
+
+
+def script_from_spec(spec: dict[str, Any], shell: Shell, prog: str) -> str:
+    """
+    Generate a completion script for `prog` from its completion spec.
+
+    The first line of the script records the hash of the spec (see `spec_hash()`).
+    """
+    prog = os.path.basename(prog)
+    f = _func_name(prog)
+    tables = _Tables()
+    tables.add("", spec)
+
+    header = (
+        f"# {shell} completion for {prog}, generated by startle.\n"
+        f"# startle-spec-hash: {spec_hash(spec)}\n"
+        f"# Regenerate with `{prog} --startle-completion {shell}`, when stale.\n\n"
+    )
+    if shell == "fish":
+        body = _FISH.format(tables=_fish_tables(tables, f), f=f, prog=_fish_quote(prog))
+    else:
+        template = _BASH if shell == "bash" else _ZSH
+        if shell == "zsh":
+            header = f"#compdef {prog}\n" + header
+        body = template.format(
+            tables=_sh_tables(tables, f),
+            candidates=_SH_CANDIDATES.format(f=f),
+            f=f,
+            prog=shlex.quote(prog),
+        )
+    return header + body
+
+
+def completion_script(
+    obj: "Callable[..., Any] | Funcs",
+    shell: str,
+    *,
+    name: str | None = None,
+    default: str | None = None,
+    recurse: bool = False,
+    naming: Literal["flat", "nested"] = "flat",
+) -> str:
+    """
+    Generate a static completion script for the CLI of a function, or a container
+    of functions `obj` (as in `start()`). The script does not need to run Python
+    to complete: it covers options (long and short names), subcommands, choices
+    (e.g. of `Literal` or `Enum` types) and paths (for `Path` types).
+
+    The script records a hash of the parsers it was generated from, which is
+    also the output of `--startle-completion hash`, to tell when it is stale.
+
+    Args:
+        obj: The function or functions to complete the arguments for.
+            See `start()`.
+        shell: One of `bash`, `zsh` and `fish`.
+        name: The name of the program, i.e. the command to complete. If None,
+            uses the name of the script.
+        default: The default subcommand. See `start()`.
+        recurse: (experimental) Whether to recursively parse objects using their
+            initializers. See `start()`.
+        naming: How to name nested arguments when `recurse` is True. See `start()`.
+    Returns:
+        The completion script.
+    """
+    from ._start import make_parser
+
+    if shell not in SHELLS:
+        raise UnsupportedShellError(shell, SHELLS)
+    parser = make_parser(obj, name, default, recurse, naming)
+    prog = name if name is not None else sys.argv[0]
+    return script_from_spec(parser.completion_spec(), shell, prog)
@@ -0,0 +1,208 @@
+"""
+Sources of option values other than the command line: config files (TOML or
+JSON), given with `start(func, config="app.toml")` or the reserved
+`--startle-config PATH` option, and environment variables, given a prefix with
+`start(func, env_prefix="APP_")`.
+
+A document maps option names to values, with tables (objects) for the arguments
+of recursively parsed classes, e.g. `[model.optimizer]` with `lr = 0.1` for
+`--lr` (or `--model.optimizer.lr` with nested naming). For a list or dict of
+commands, a table named after the command (e.g. `[db.migrate]`) holds values
+that apply to that command only, over the top-level ones. Keys that match no
+argument are ignored, so that one file can serve several commands.
+
+An environment variable is named after the prefix and the option, in upper case
+with underscores, e.g. `APP_MODEL_OPTIMIZER_LR` (or `APP_LR` with flat naming).
+The values of n-ary options are split by a delimiter (`,` by default). The names
+are indexed once per parser, so that finding them takes a single pass over the
+environment.
+
+Values are converted as if given on the command line. The precedence is, from
+lowest to highest: defaults, config files (later files over earlier ones),
+environment variables, and the command line.
+
+Parsed documents are cached, both in the process and on disk (see `_cache.py`),
+keyed by the path of the file along with its modification time and size.
+"""
+
+import json
+import os
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
+
+from .error import ConfigFileError
+
+if TYPE_CHECKING:
+    from .arg import Arg
+    from .args import Args
+
+_docs: dict[tuple[str, int, int], dict[str, Any]] = {}
+# parsed documents of this process, by (path, mtime, size)
+
+
+def load(path: str | Path) -> dict[str, Any]:
+    """
+    Load a TOML or JSON config file (by its suffix), from the cache if the file
+    has not changed since.
+    """
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        raise ConfigFileError(path, e.strerror or type(e).__name__) from None
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if (doc := _docs.get(key)) is not None:
+        return doc
+
+    from . import _cache
+
+    cache_key = _cache.cache_key(*key)
+    if (data := _cache.read("config", cache_key)) is not None:
+        doc = cast(dict[str, Any], json.loads(data))
+    else:
+        doc = _parse(path)
+        _cache.write("config", cache_key, json.dumps(doc, default=str).encode())
+    _docs[key] = doc
+    return doc
+
+
+def _parse(path: str) -> dict[str, Any]:
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix not in (".toml", ".json"):
+        raise ConfigFileError(path, "expected a `.toml` or `.json` file")
+    try:
+        if suffix == ".json":
+            with open(path, "rb") as f:
+                doc = json.load(f)
+            if not isinstance(doc, dict):
+                raise ConfigFileError(path, "expected a JSON object")
+            return cast(dict[str, Any], doc)
+        with open(path, "rb") as f:
+            return _toml(path).load(f)
+    except OSError as e:
+        raise ConfigFileError(path, e.strerror or type(e).__name__) from None
+    except ValueError as e:  # including TOML and JSON decode errors
+        raise ConfigFileError(path, str(e)) from None
+
+
+def _toml(path: str) -> Any:
+    """
+    Get the TOML parser: `tomllib` (Python 3.11+), or else `tomli`.
+    """
+    try:
+        import tomllib  # type: ignore
+
+        return tomllib  # type: ignore
+    except ImportError:
+        pass
+    try:
+        import tomli  # type: ignore
+
+        return tomli  # type: ignore
+    except ImportError:
+        raise ConfigFileError(
+            path, "reading TOML requires Python 3.11+ or the `tomli` package"
+        ) from None
+
+
+def environ(args: "Args", prefix: str, delimiter: str = ",") -> dict[str, Any]:
+    """
+    Get the values of the arguments of a parser from the environment variables
+    named after them (see `Args._env_index()`), by their long names.
+
+    Args:
+        args: The parser.
+        prefix: The prefix of the names of the variables (e.g. `APP_`).
+        delimiter: The delimiter of the elements of n-ary values. If empty,
+            the value is a single element.
+    """
+    index: dict[str, Arg] = args._env_index(prefix)  # type: ignore
+    values: dict[str, Any] = {}
+    for name, value in os.environ.items():
+        if (arg := index.get(name)) is not None:
+            if arg.is_nary and delimiter:
+                values[arg.name.long] = value.split(delimiter) if value else []
+            else:
+                values[arg.name.long] = value
+    return values
+
+
+def flatten(doc: Mapping[str, Any], prefix: str = "") -> dict[str, Any]:
+    """
+    Flatten the tables of a document into dotted keys (e.g. `model.lr`), with
+    dashes in place of underscores, as in option names.
+    """
+    flat: dict[str, Any] = {}
+    for key, value in doc.items():
+        name = prefix + key.replace("_", "-")
+        if isinstance(value, dict):
+            flat.update(flatten(cast(dict[str, Any], value), name + "."))
+        else:
+            flat[name] = value
+    return flat
+
+
+@dataclass
+class Sources:
+    """
+    The sources of option values other than the command line.
+
+    Attributes:
+        config: The config files, in increasing order of precedence.
+        env_prefix: The prefix of the environment variables to read values
+            from, if any.
+        delimiter: The delimiter of the elements of n-ary values in
+            environment variables.
+    """
+
+    config: list[str | Path] = field(default_factory=list[str | Path])
+    env_prefix: str | None = None
+    delimiter: str = ","
+
+    @classmethod
+    def from_options(
+        cls,
+        config: "str | Path | Sequence[str | Path] | None",
+        path: str | None,
+        env_prefix: str | None = None,
+        delimiter: str = ",",
+    ) -> "Sources | None":
+        """
+        Make the sources from the options of `start()`, and the value of the
+        reserved `--startle-config` option (which comes after the other config
+        files, hence takes precedence over them). None if there are none.
+        """
+        files: list[str | Path] = []
+        if isinstance(config, str | Path):
+            files.append(config)
+        elif config is not None:
+            files.extend(config)
+        if path is not None:
+            files.append(path)
+        if not files and env_prefix is None:
+            return None
+        return cls(files, env_prefix, delimiter)
+
+    def layers(self, args: "Args", command: Sequence[str] = ()) -> list[dict[str, Any]]:
+        """
+        Get the values of the sources for a command, as mappings from (dotted)
+        option names to values, in increasing order of precedence.
+
+        Args:
+            args: The parser of the command.
+            command: The path of the command (e.g. `["db", "migrate"]`), if one
+                of a list or dict of commands.
+        """
+        layers: list[dict[str, Any]] = []
+        prefix = "".join(f"{part}." for part in command)
+        for file in self.config:
+            flat = flatten(load(file))
+            if prefix:
+                n = len(prefix)
+                flat |= {k[n:]: v for k, v in flat.items() if k.startswith(prefix)}
+            layers.append(flat)
+        if self.env_prefix is not None:
+            layers.append(environ(args, self.env_prefix, self.delimiter))
+        return layers
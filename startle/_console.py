@@ -1,26 +1,31 @@
-from typing import Literal, NoReturn, overload
+from typing import TYPE_CHECKING, Literal, NoReturn, overload
 
-from rich.console import Console
-from rich.style import StyleType
-from rich.text import Text
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.style import StyleType
+    from rich.text import Text
 
-_console: Console | None = None
+_console: "Console | None" = None
 
 
-def console() -> Console:
+def console() -> "Console":
     """
     Get the lazily initialized console instance.
     """
+    from rich.console import Console
+
     global _console
     if _console is None:
         _console = Console(markup=False)
     return _console
 
 
-def _print(*parts: str | Text | tuple[str, StyleType]) -> None:
+def _print(*parts: "str | Text | tuple[str, StyleType]") -> None:
     """
     Print the given parts to the console.
     """
+    from rich.text import Text
+
     console().print(Text.assemble(*parts))
 
 
@@ -40,6 +45,8 @@ def error(msg: str, *, exit: bool = True, endl: bool = True) -> None:
         exit: Whether to exit the program after printing the error.
         endl: Whether to print a newline at the end of the message.
     """
+    from rich.text import Text
+
     console().print(
         Text.assemble(
             ("Error:", "bold red"),
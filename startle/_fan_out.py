@@ -0,0 +1,369 @@
+"""
+Fan-out of a command over the elements of one of its n-ary arguments (e.g.
+`files: list[Path]`), requested with `start(func, fan_out="files", workers=N)`
+or the reserved `--startle-jobs N` (or `--startle-concurrency N`).
+
+The command is called once per chunk of elements, with the argument set to the
+chunk (in the container type of the argument) and the other arguments fixed.
+Results are collected in the order of the input (or of completion), and the
+first failure is raised along with its elements. When streaming, results are
+yielded as they are collected, rather than returned all at once.
+
+- Sync commands run in a pool of processes. The fixed arguments are sent to each
+  worker once, when it starts, so that each task only carries its chunk, and a
+  bounded number of chunks is kept in flight.
+- Async commands run on a single event loop, with at most `workers` calls (each
+  with an optional timeout) in flight at a time.
+"""
+
+import os
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Iterator, Sequence
+from dataclasses import dataclass
+from functools import partial
+from inspect import iscoroutinefunction
+from typing import TYPE_CHECKING, Any, cast
+
+from .error import (
+    FanOutError,
+    FanOutOptionError,
+    FanOutParamError,
+    ValueParsingError,
+)
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from ._start import Runner
+    from .arg import Arg
+    from .args import Args
+
+
+@dataclass
+class Fixed:
+    """
+    A command with all of its arguments but the fanned out one fixed.
+    """
+
+    func: Callable[..., Any]
+    f_args: list[Any]
+    f_kwargs: dict[str, Any]
+    where: int | str  # index into `f_args`, or key of `f_kwargs`
+
+    def arguments(self, chunk: Any) -> tuple[list[Any], dict[str, Any]]:
+        f_args, f_kwargs = self.f_args, self.f_kwargs
+        if isinstance(self.where, int):
+            f_args = [*f_args]
+            f_args[self.where] = chunk
+        else:
+            f_kwargs = {**f_kwargs, self.where: chunk}
+        return f_args, f_kwargs
+
+    def __call__(self, chunk: Any, runner: "Runner | None" = None) -> Any:
+        from ._start import call_func
+
+        return call_func(self.func, *self.arguments(chunk), runner)
+
+
+_worker: Fixed | None = None  # the command of a worker process
+
+
+def _init_worker(fixed: Fixed) -> None:
+    global _worker
+    _worker = fixed
+
+
+def _call_in_worker(chunk: Any) -> Any:
+    assert _worker is not None, "Programming error!"
+    return _worker(chunk)
+
+
+@dataclass
+class FanOut:
+    """
+    A requested fan-out of the command.
+
+    Attributes:
+        param: The name of the argument to fan out over. If None, the only
+            n-ary positional argument of the command.
+        workers: The number of worker processes for sync commands (if 1, the
+            chunks run one after the other in the current process), or of
+            concurrent calls for async commands.
+        chunk_size: The number of elements per call of the command.
+        timeout: Seconds each call of an async command may take.
+        ordered: Whether to collect the results in the order of the input,
+            rather than in the order of completion.
+        option: The reserved option that requested the fan-out (e.g. `jobs`),
+            if any, to report the lack of an argument to fan out over with.
+    """
+
+    param: str | None
+    workers: int
+    chunk_size: int = 1
+    timeout: float | None = None
+    ordered: bool = True
+    option: str | None = None
+
+    @classmethod
+    def from_options(
+        cls,
+        param: str | None,
+        workers: int | None,
+        chunk_size: int,
+        jobs: str | None,
+        timeout: float | None = None,
+        ordered: bool = True,
+        option: str = "jobs",
+    ) -> "FanOut":
+        """
+        Make a fan-out from the options of `start()`, and the value of the
+        reserved `--startle-jobs` (or `--startle-concurrency`, as told by
+        `option`) option, which takes precedence over `workers`.
+        """
+        if jobs is not None:
+            try:
+                workers = int(jobs)
+            except ValueError:
+                raise ValueParsingError(jobs, "integer") from None
+        if workers is None:
+            workers = os.cpu_count() or 1
+        return cls(
+            param,
+            max(workers, 1),
+            max(chunk_size, 1),
+            timeout,
+            ordered,
+            option if param is None and jobs is not None else None,
+        )
+
+    def bind(
+        self,
+        func: Callable[..., Any],
+        args: "Args",
+        f_args: list[Any],
+        f_kwargs: dict[str, Any],
+        runner: "Runner | None" = None,
+        lazy: bool = False,
+    ) -> Callable[[], Any]:
+        """
+        Prepare the fan-out of a command, given its parser and the parsed
+        arguments.
+
+        Args:
+            lazy: Whether to yield the results of the chunks as they are
+                collected (e.g. for streaming), instead of returning them all.
+        Returns:
+            The function that runs the fan-out, and returns the results of the
+            chunks in order, as a list (or if `lazy`, an iterator, which is
+            an async iterator for async commands).
+        """
+        try:
+            fixed, value = fix_arguments(func, args, f_args, f_kwargs, self.param)
+        except FanOutParamError:
+            if self.option is None:
+                raise
+            obj_name = getattr(func, "__name__", repr(func))
+            raise FanOutOptionError(self.option, obj_name) from None
+        chunks = _chunks(value, self.chunk_size)
+        if iscoroutinefunction(func):
+            results = partial(_run_loop, self, fixed, chunks)
+            return results if lazy else partial(_collect_async, results, runner)
+        if self.workers == 1:
+            results = partial(_run_serial, fixed, chunks, runner)
+        else:
+            results = partial(_run_pool, fixed, chunks, self.workers, self.ordered)
+        return results if lazy else partial(_collect, results)
+
+
+def fix_arguments(
+    func: Callable[..., Any],
+    args: "Args",
+    f_args: list[Any],
+    f_kwargs: dict[str, Any],
+    param: str | None,
+    action: str = "fan out over",
+) -> tuple[Fixed, Any]:
+    """
+    Fix all the parsed arguments of a command, but an n-ary one.
+
+    Args:
+        func: The command.
+        args: The parser of the command.
+        f_args: The positional arguments of the call, from `args`.
+        f_kwargs: The keyword arguments of the call, from `args`.
+        param: The name of the n-ary argument. If None, the only n-ary
+            positional argument of the command (or, if none, its only n-ary
+            argument).
+        action: What the argument is for, for error messages.
+    Returns:
+        The command with the other arguments fixed, and the (parsed) value of
+        the n-ary argument.
+    """
+    arg = _find(args, param, func, action)
+    positional: list[Arg] = args._positional_args  # type: ignore
+    for i, other in enumerate(positional):
+        if other is arg:
+            return Fixed(func, f_args, f_kwargs, i), f_args[i]
+    where = arg.name.long_or_short.replace("-", "_")
+    return Fixed(func, f_args, f_kwargs, where), f_kwargs[where]
+
+
+def _find(
+    args: "Args", param: str | None, func: Callable[..., Any], action: str
+) -> "Arg":
+    obj_name = getattr(func, "__name__", repr(func))
+    if param is None:
+        nary = [arg for arg in args._positional_args if arg.is_nary]  # type: ignore
+        if not nary:
+            nary = [arg for arg in args._args if arg.is_nary and not arg.args]  # type: ignore
+        if len(nary) != 1:
+            raise FanOutParamError(None, obj_name, action)
+        return nary[0]
+    name = param.replace("_", "-")
+    for arg in args._args:  # type: ignore
+        if arg.name.long == name and arg.args is None:
+            if not arg.is_nary:
+                break
+            return arg
+    raise FanOutParamError(param, obj_name, action)
+
+
+def _chunks(value: Any, size: int) -> list[Any]:
+    """
+    Split the value of an n-ary argument into chunks of its container type.
+    """
+    items = list(value)
+    container = cast(Callable[[list[Any]], Any], type(value))
+    return [container(items[i : i + size]) for i in range(0, len(items), size)]
+
+
+def _result(chunk: Any, get: Callable[[], Any]) -> Any:
+    try:
+        return get()
+    except Exception as e:
+        raise FanOutError(list(chunk), e) from e
+
+
+def _collect(results: Callable[[], Iterator[Any]]) -> list[Any]:
+    return list(results())
+
+
+def _run_serial(
+    fixed: Fixed, chunks: list[Any], runner: "Runner | None"
+) -> Iterator[Any]:
+    for chunk in chunks:
+        yield _result(chunk, partial(fixed, chunk, runner))
+
+
+def _run_pool(
+    fixed: Fixed, chunks: Sequence[Any], workers: int, ordered: bool = True
+) -> Iterator[Any]:
+    """
+    Run the chunks in a pool of `workers` processes, keeping a few chunks per
+    worker in flight, and yield the results in order (or as they complete).
+    If the consumer stops early, the chunks not yet started are cancelled.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    window = 4 * workers
+    pending: deque[tuple[Any, Future[Any]]] = deque()
+
+    def completed() -> Iterator[Any]:
+        if ordered:
+            while pending and (len(pending) >= window or pending[0][1].done()):
+                chunk, future = pending.popleft()
+                yield _result(chunk, future.result)
+            return
+        if len(pending) >= window:
+            wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+        for item in [item for item in pending if item[1].done()]:
+            pending.remove(item)
+            yield _result(item[0], item[1].result)
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks)) or 1,
+        initializer=_init_worker,
+        initargs=(fixed,),
+    ) as pool:
+        try:
+            for chunk in chunks:
+                pending.append((chunk, pool.submit(_call_in_worker, chunk)))
+                yield from completed()
+            while pending:
+                if not ordered:
+                    wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+                    yield from completed()
+                    continue
+                chunk, future = pending.popleft()
+                yield _result(chunk, future.result)
+        except BaseException:  # including GeneratorExit, when closed early
+            for _, future in pending:
+                future.cancel()
+            raise
+
+
+async def _run_loop(
+    fan: FanOut, fixed: Fixed, chunks: Sequence[Any]
+) -> AsyncIterator[Any]:
+    """
+    Run the calls of an async command on the current event loop, with at most
+    `fan.workers` of them in flight at a time, and yield the results in order
+    (or as they complete).
+    """
+    import asyncio
+
+    done: asyncio.Queue[tuple[int, Any]] = asyncio.Queue()
+    todo = iter(enumerate(chunks))
+
+    async def worker() -> None:
+        try:
+            for i, chunk in todo:  # shared by the workers, hence each runs once
+                f_args, f_kwargs = fixed.arguments(chunk)
+                try:
+                    coro = fixed.func(*f_args, **f_kwargs)
+                    value = await asyncio.wait_for(coro, fan.timeout)
+                except Exception as e:
+                    raise FanOutError(list(chunk), e) from e
+                done.put_nowait((i, value))
+        except BaseException as e:
+            done.put_nowait((-1, e))
+            raise
+
+    workers = [
+        asyncio.ensure_future(worker()) for _ in range(min(fan.workers, len(chunks)))
+    ]
+    held: dict[int, Any] = {}  # results that completed ahead of their turn
+    turn = 0
+    try:
+        for _ in range(len(chunks)):
+            i, value = await done.get()
+            if i < 0:
+                raise value
+            if not fan.ordered:
+                yield value
+                continue
+            held[i] = value
+            while turn in held:
+                yield held.pop(turn)
+                turn += 1
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+def _collect_async(
+    results: Callable[[], AsyncIterator[Any]], runner: "Runner | None"
+) -> list[Any]:
+    """
+    Collect the results of an async fan-out with `runner` (or `asyncio.run`).
+    """
+
+    async def collect() -> list[Any]:
+        return [value async for value in results()]
+
+    if runner is None:
+        import asyncio
+
+        runner = asyncio.run
+    return runner(collect())
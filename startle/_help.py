@@ -1,194 +1,24 @@
 """
-Utilities for prettifying and formatting of help messages.
+Output of help messages through `rich`. The styled text itself is built by the
+same code as for the plain renderer (see `_ansi.py`), and only converted here.
 """
 
-from enum import Enum
-from typing import Any, Literal
-
-from rich.cells import cell_len
 from rich.text import Text
 
-from .arg import Arg, Name
-
+from ._ansi import Styled
 
-class Sty:
-    name = "bold"
-    pos_name = "bold"
-    opt = "green"
-    var = "blue"
-    literal_var = ""
-    title = "bold underline dim"
 
-
-def name_usage(name: Name, kind: Literal["listing", "usage line"]) -> Text:
+def text(styled: Styled) -> Text:
     """
-    Format the name of an argument for either detailed options table (kind: listing)
-    or the brief usage line (kind: usage line).
+    Convert styled text into `rich` text, with a span per styled segment.
     """
-
-    def fmt(name: str, short: bool) -> Text:
-        if name.startswith("<") and name.endswith(">"):
-            # very special case for var kwargs.
-            # TODO: maybe this should be done elsewhere / differently?
-            name_ = name.strip("<>")
-            return Text.assemble(
-                ("--", f"{Sty.name} {Sty.opt} not dim"),
-                ("<", "cyan not dim"),
-                (name_, f"{Sty.name} cyan not dim"),
-                (">", "cyan not dim"),
-            )
-        return Text(
-            f"-{name}" if short else f"--{name}",
-            style=f"{Sty.name} {Sty.opt} not dim",
-        )
-
-    if kind == "listing":
-        name_list: list[Text] = []
-        if name.short:
-            name_list.append(fmt(name.short, True))
-        if name.long:
-            name_list.append(fmt(name.long, False))
-        return Text("|", style=f"{Sty.opt} dim").join(name_list)
-    else:
-        if name.long:
-            return fmt(name.long, False)
-        else:
-            return fmt(name.short, True)
-
-
-def _meta(metavar: list[str] | str) -> Text:
-    return (
-        Text(metavar)
-        if isinstance(metavar, str)
-        else Text("|", style="dim").join([
-            Text(m, style=f"{Sty.literal_var} not dim") for m in metavar
-        ])
+    return Text.assemble(
+        *((chunk, style) if style else chunk for chunk, style in styled.segments)
     )
 
 
-def _repeated(text: Text) -> Text:
-    repeat = Text("[") + text.copy() + " ...]"
-    repeat.stylize("dim")
-    return Text.assemble(text, " ", repeat)
-
-
-def _pos_usage(arg: Arg) -> Text:
-    text = Text.assemble("<", (f"{arg.name}:", Sty.pos_name), _meta(arg.metavar), ">")
-    text.stylize(Sty.var)
-    if arg.is_nary:
-        text = _repeated(text)
-    return text
-
-
-def _opt_usage(arg: Arg, kind: Literal["listing", "usage line"]) -> Text:
-    if isinstance(arg.metavar, list):
-        option = _meta(arg.metavar)
-        option.stylize(Sty.var)
-    else:
-        option = Text(f"<{arg.metavar}>", style=Sty.var)
-    if arg.is_nary:
-        option = _repeated(option)
-    return Text.assemble(name_usage(arg.name, kind), " ", option)
-
-
-def usage(arg: Arg, kind: Literal["listing", "usage line"] = "listing") -> Text:
+def lines(styled: list[Styled]) -> Text:
     """
-    Format an argument (possibly with its metavar) for either detailed options
-    table (kind: listing) or the brief usage line (kind: usage line).
+    Convert lines of styled text into a single `rich` text.
     """
-    if arg.is_positional and not arg.is_named:
-        text = _pos_usage(arg)
-    elif arg.is_flag:
-        if kind == "listing":
-            text = Text.assemble(name_usage(arg.name, kind), " ")
-        else:
-            text = name_usage(arg.name, kind)
-    else:
-        text = _opt_usage(arg, kind)
-
-    if not arg.required and kind == "usage line":
-        text = Text.assemble("[", text, "]")
-    return text
-
-
-def default_value(val: Any) -> Text:
-    if isinstance(val, str) and isinstance(val, Enum):
-        return Text(val.value, style=Sty.opt)
-    if isinstance(val, Enum):
-        return Text(val.name.lower().replace("_", "-"), style=Sty.opt)
-    if isinstance(val, str) and val == "":
-        return Text('""', style=f"{Sty.opt} dim")
-    return Text(str(val), style=Sty.opt)
-
-
-def help(arg: Arg) -> Text:
-    from .args import Missing
-
-    helptext = Text(arg.help, style="italic")
-    delim = " " if helptext else ""
-    if str(arg.name) == "":
-        helptext = Text.assemble(
-            helptext, delim, ("(unknown positional arguments)", "cyan")
-        )
-    elif arg.name.long == "<key>":
-        helptext = Text.assemble(helptext, delim, ("(unknown options)", "cyan"))
-    elif arg.is_flag:
-        helptext = Text.assemble(helptext, delim, ("(flag)", Sty.opt))
-    elif arg.required:
-        helptext = Text.assemble(helptext, delim, ("(required)", "yellow"))
-    elif arg.default is Missing:
-        helptext = Text.assemble(helptext, delim, ("(optional)", Sty.opt))
-    else:
-        if arg.default_factory is not None:
-            # is it harmful to just call the factory here?
-            def_val = default_value(arg.default_factory())
-        else:
-            def_val = default_value(arg.default)
-        helptext = Text.assemble(
-            helptext,
-            delim,
-            ("(default: ", Sty.opt),
-            def_val,
-            (")", Sty.opt),
-        )
-    return helptext
-
-
-def var_args_usage_line(arg: Arg) -> Text:
-    return Text.assemble("[", _pos_usage(arg), "]")
-
-
-def var_kwargs_usage_line(arg: Arg) -> Text:
-    return Text.assemble("[", _repeated(_opt_usage(arg, "usage line")), "]")
-
-
-def wrap_usage(name: str, components: list[Text], width: int) -> Text:
-    """
-    Custom word-wrapping for usage lines that avoids splitting individual components
-    (e.g. we want "--foo bar" or "[--foo bar]" stay together).
-    Continuation lines are indented to align after the program name.
-
-    This was needed because (afaik) there is no way to declare non-breaking spaces in rich,
-    and even in that case I would prefer to use actual space char.
-    """
-
-    indent = len(name) + 1
-    lines: list[Text] = []
-    current = Text(f"{name} ")
-    current_len = indent
-
-    for comp in components:
-        comp_len = cell_len(comp.plain)
-        if current_len > indent and current_len + comp_len + 1 > width:
-            lines.append(current)
-            current = Text(" " * indent) + comp
-            current_len = indent + comp_len
-        else:
-            if current_len > indent:
-                current.append(" ")
-                current_len += 1
-            current = Text.assemble(current, comp)
-            current_len += comp_len
-
-    lines.append(current)
-    return Text("\n").join(lines)
+    return Text("\n").join(text(line) for line in styled)
@@ -4,8 +4,8 @@ from dataclasses import is_dataclass
 from typing import Any, Literal, cast, get_type_hints
 
 from .._docstr import get_param_help, parse_docstring
+from .._registry import Registry, current
 from .._typing import is_typeddict, shorten, strip_optional
-from .._value_parser import is_parsable
 from ..arg import Arg, Name
 from ..args import Args
 from ..error import (
@@ -23,12 +23,12 @@ from .tree import TreeNode, gather_subtree, leaves
 
 def _check_help_collisions(params: Sequence[Param]) -> None:
     """
-    Check for parameters named "help".
+    Check for parameters named "help", or "help_choices" (for `--help-choices`).
     Raises HelpCollisionError if a collision is detected.
     """
     for param in params:
-        if param.name == "help":
-            raise HelpCollisionError(param.owning_obj_name)
+        if param.name in ("help", "help_choices"):
+            raise HelpCollisionError(param.owning_obj_name, param.name)
 
 
 def _check_parsable(params: Sequence[Param]) -> None:
@@ -37,7 +37,7 @@ def _check_parsable(params: Sequence[Param]) -> None:
     Raises UnsupportedTypeError if an unparsable type is detected.
     """
     for param in params:
-        if not is_parsable(param.normalized_hint):
+        if not current().is_parsable(param.normalized_hint):
             raise UnsupportedTypeError(
                 param.name,
                 shorten(param.hint),
@@ -174,7 +174,7 @@ def _make_args_from_params_recursive(
         is_nested_child = naming == "nested" and kw_only
 
         if not node.children:
-            assert is_parsable(node.data.normalized_hint)
+            assert current().is_parsable(node.data.normalized_hint)
             param = node.data
 
             # Variadic params are not allowed in child Args
@@ -254,6 +254,8 @@ def make_args_from_func(
     program_name: str = "",
     recurse: bool = False,
     naming: Literal["nested", "flat"] = "flat",
+    *,
+    registry: Registry | None = None,
 ) -> Args:
     """
     Create an Args object from a function signature.
@@ -263,7 +265,12 @@ def make_args_from_func(
         program_name: The name of the program, for help string.
         recurse: Whether to recurse into nested Args.
         naming: The naming strategy for nested Args.
+        registry: The registry of parsers and metavars to build with.
+            If None, uses the one bound to the context (or the global one).
     """
+    if registry is not None:
+        with registry.bind():
+            return make_args_from_func(func, program_name, recurse, naming)
 
     sig = inspect.signature(func)
     parameters = sig.parameters.items()
@@ -339,6 +346,7 @@ def make_args_from_class(
     brief: str = "",
     recurse: bool = False,
     naming: Literal["nested", "flat"] = "flat",
+    registry: Registry | None = None,
 ) -> Args:
     """
     Create an Args object from a class's `__init__` signature and docstring.
@@ -349,7 +357,18 @@ def make_args_from_class(
         brief: A brief description of the class, for help string.
         recurse: Whether to recurse into nested Args.
         naming: The naming strategy for nested Args.
+        registry: The registry of parsers and metavars to build with.
+            If None, uses the one bound to the context (or the global one).
     """
+    if registry is not None:
+        with registry.bind():
+            return make_args_from_class(
+                cls,
+                program_name=program_name,
+                brief=brief,
+                recurse=recurse,
+                naming=naming,
+            )
     if not inspect.isclass(cls):
         raise NotAClassError(cls)
 
@@ -50,7 +50,7 @@ def is_variadic(kind: ParameterKind | None) -> bool:
     return kind in [Parameter.VAR_POSITIONAL, Parameter.VAR_KEYWORD]
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class Param:
     """
     Represents a parameter with its metadata, either from a function signature or a TypedDict definition.
@@ -7,8 +7,8 @@ from dataclasses import dataclass, is_dataclass
 from typing import Generic, TypeVar, cast, get_type_hints
 
 from .._docstr import ParamHelp, parse_docstring
+from .._registry import current
 from .._typing import is_typeddict, shorten, strip_optional
-from .._value_parser import is_parsable
 from ..error import RecursiveTypeError
 from .classes import get_default_factories, get_initializer_parameters
 from .param import Param
@@ -16,7 +16,7 @@ from .param import Param
 T = TypeVar("T")
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class TreeNode(Generic[T]):
     data: T
     children: list["TreeNode[T]"]
@@ -28,7 +28,7 @@ def gather_children(param: Param) -> list[Param]:
     Collect immediate children of a parameter (non-recursively).
     """
 
-    if is_parsable(param.normalized_hint):
+    if current().is_parsable(param.normalized_hint):
         # If parsable, we consider this a leaf node.
         return []
 
@@ -90,7 +90,7 @@ def gather_subtree(
 
     root = TreeNode[Param](data=param, children=[])
 
-    if is_parsable(param.normalized_hint):
+    if current().is_parsable(param.normalized_hint):
         return root
 
     # About to recurse — check for cycle and extend the ancestor chain.
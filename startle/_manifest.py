@@ -0,0 +1,246 @@
+"""
+Export of parsers into a versioned, JSON-serializable manifest, and construction
+of parsers back from it without introspecting the original functions.
+
+Types, enums and default factories are referred to as `module:qualname`, and are
+imported when a manifest is loaded. Literal choices are stored by value.
+"""
+
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import PurePath
+from typing import TYPE_CHECKING, Any, Literal, cast, get_args, get_origin
+
+from ._typing import make_optional, strip_optional
+from .arg import Arg, Name
+from .error import ManifestError
+
+if TYPE_CHECKING:
+    from .args import Args
+    from .cmds import Cmds
+
+VERSION = 1
+
+
+@dataclass
+class _Factory:
+    value: Any = field(default_factory=object)
+
+
+_DATACLASS_FACTORY: Any = _Factory.__init__.__defaults__[0]  # type: ignore
+# default of dataclass fields with a default factory, as seen in `__init__` (a
+# private sentinel of `dataclasses`, hence taken from the signature of one)
+
+_CONTAINERS: dict[str, type] = {
+    "list": list,
+    "tuple": tuple,
+    "set": set,
+    "frozenset": frozenset,
+}
+
+
+def ref(obj: Any) -> str:
+    """
+    Refer to a class (or function) as `module:qualname`.
+    """
+    return f"{obj.__module__}:{obj.__qualname__}"
+
+
+def resolve(reference: str) -> Any:
+    """
+    Import the object referred to as `module:qualname`.
+    """
+    from importlib import import_module
+
+    module, _, qualname = reference.partition(":")
+    try:
+        obj: Any = import_module(module)
+        for part in qualname.split("."):
+            obj = getattr(obj, part)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise ManifestError(f"Cannot resolve `{reference}`!") from e
+    return obj
+
+
+def encode_type(type_: Any) -> Any:
+    if strip_optional(type_) is not type_:
+        return {"optional": encode_type(strip_optional(type_))}
+    if get_origin(type_) is Literal:
+        return {"literal": list(get_args(type_))}
+    return ref(type_)
+
+
+def decode_type(data: Any) -> Any:
+    if isinstance(data, str):
+        return resolve(data)
+    if "optional" in data:
+        return make_optional(decode_type(data["optional"]))
+    return Literal[tuple(data["literal"])]  # type: ignore
+
+
+def encode_value(value: Any) -> Any:
+    """
+    Encode a default value, tagging the values that JSON cannot represent.
+    Raises ManifestError for values that cannot be restored from a manifest.
+    """
+    from .args import Missing
+
+    if value is Missing:
+        return {"missing": True}
+    if value is _DATACLASS_FACTORY:
+        return {"dataclass_factory": True}
+    if isinstance(value, Enum):
+        return {"enum": ref(type(value)), "name": value.name}
+    if value is None or isinstance(value, bool | int | float | str):
+        return value
+    if isinstance(value, PurePath):
+        return {"path": str(value)}
+    if isinstance(value, list):
+        return [encode_value(v) for v in value]  # type: ignore
+    if isinstance(value, tuple):
+        return {"tuple": [encode_value(v) for v in value]}  # type: ignore
+    if isinstance(value, set | frozenset):
+        items = sorted((encode_value(v) for v in value), key=repr)  # type: ignore
+        return {type(value).__name__: items}  # type: ignore
+    raise ManifestError(f"Cannot export the default value `{value!r}`!")
+
+
+def decode_value(data: Any) -> Any:
+    from pathlib import Path
+
+    from .args import Missing
+
+    if isinstance(data, list):
+        return [decode_value(v) for v in cast(list[Any], data)]
+    if not isinstance(data, dict):
+        return data
+    data = cast(dict[str, Any], data)
+    if "missing" in data:
+        return Missing
+    if "dataclass_factory" in data:
+        return _DATACLASS_FACTORY
+    if "enum" in data:
+        return resolve(data["enum"])[data["name"]]
+    if "path" in data:
+        return Path(data["path"])
+    for name, container in _CONTAINERS.items():
+        if name in data:
+            return container(decode_value(v) for v in data[name])
+    raise ManifestError(f"Cannot restore the default value `{data}`!")
+
+
+def encode_arg(arg: Arg) -> dict[str, Any]:
+    """
+    Encode an argument, without its child Args (if any).
+    """
+    factory = arg.default_factory
+    try:
+        default = encode_value(arg.default)
+    except ManifestError as e:
+        raise ManifestError(
+            f"Cannot export the default value `{arg.default!r}` of `{arg.name}`!"
+        ) from e
+    return {
+        "name": {"short": arg.name.short, "long": arg.name.long},
+        "kind": (
+            "both"
+            if arg.is_positional and arg.is_named
+            else "positional"
+            if arg.is_positional
+            else "named"
+        ),
+        "type": encode_type(arg.type_),
+        "container": arg.container_type.__name__ if arg.container_type else None,
+        "nary": arg.is_nary,
+        "metavar": arg.metavar if isinstance(arg.metavar, str) else None,
+        "choices": arg.metavar if isinstance(arg.metavar, list) else None,
+        "help": arg.help,
+        "required": arg.required,
+        "default": default,
+        "default_factory": ref(factory) if factory is not None else None,
+    }
+
+
+def decode_arg(data: dict[str, Any]) -> Arg:
+    factory = None
+    if data["default_factory"]:
+        try:
+            factory = resolve(data["default_factory"])
+        except ManifestError:
+            pass  # only used in help, e.g. lambdas cannot be restored
+    return Arg(
+        name=Name(**data["name"]),
+        type_=decode_type(data["type"]),
+        container_type=_CONTAINERS[data["container"]] if data["container"] else None,
+        is_positional=data["kind"] in ("positional", "both"),
+        is_named=data["kind"] in ("named", "both"),
+        is_nary=data["nary"],
+        help=data["help"],
+        metavar=data["choices"] if data["choices"] is not None else data["metavar"],
+        default=decode_value(data["default"]),
+        default_factory=factory,
+        required=data["required"],
+    )
+
+
+def decode_args(data: dict[str, Any]) -> "Args":
+    from .args import Args
+
+    args = Args(brief=data["brief"], program_name=data["program_name"])
+    for item in data["args"]:
+        arg = decode_arg(item)
+        if item.get("args") is not None:
+            arg.args = decode_args(item["args"])
+            arg.args._parent = args  # type: ignore
+        args.add(arg)
+    if data["var_args"] is not None:
+        args.enable_unknown_args(decode_arg(data["var_args"]))
+    if data["var_kwargs"] is not None:
+        args.enable_unknown_opts(decode_arg(data["var_kwargs"]))
+    return args
+
+
+def decode_cmds(data: dict[str, Any]) -> "Cmds":
+    from .cmds import Cmds
+
+    return Cmds(
+        cmd_parsers={cmd: decode(sub) for cmd, sub in data["commands"].items()},
+        brief=data["brief"],
+        program_name=data["program_name"],
+        default=data["default"],
+    )
+
+
+def decode(data: dict[str, Any]) -> "Args | Cmds":
+    if data.get("kind") == "args":
+        return decode_args(data)
+    if data.get("kind") == "cmds":
+        return decode_cmds(data)
+    raise ManifestError(f"Unknown manifest kind `{data.get('kind')}`!")
+
+
+def load_manifest(manifest: "str | dict[str, Any]") -> "Args | Cmds":
+    """
+    Construct a parser from a manifest, as produced by `Args.to_manifest()` or
+    `Cmds.to_manifest()`, without introspecting the original function(s).
+
+    Args:
+        manifest: The manifest, or its JSON encoding.
+    Returns:
+        The `Args` or `Cmds` parser described by the manifest.
+    """
+    if isinstance(manifest, str):
+        import json
+
+        manifest = json.loads(manifest)
+    if not isinstance(manifest, dict):
+        raise ManifestError("A manifest must be a JSON object!")
+    version = manifest.get("version")
+    if version != VERSION:
+        raise ManifestError(
+            f"Unsupported manifest version `{version}`! Expected `{VERSION}`."
+        )
+    try:
+        return decode(manifest)
+    except (KeyError, TypeError) as e:
+        raise ManifestError(f"Malformed manifest: {e!r}") from e
@@ -0,0 +1,254 @@
+"""
+On-disk memoization of the results of pure commands, requested with
+`start(func, cache=True)` (or a `startle.Cache`), and controlled at run time with
+the reserved `--startle-cache on|off|refresh` option.
+
+A result is keyed by a stable hash of:
+
+- the command: its module, qualified name, and the contents of its source file
+  (so that editing the module invalidates its results),
+- its parsed arguments, in a canonical form (e.g. sets sorted, dataclasses by
+  their fields), along with the modification times and sizes of the existing
+  files of `Path` arguments,
+- and the fan-out of the command, if any.
+
+Results are pickled into the `results` namespace of the on-disk cache (see
+`_cache.py`), which evicts the least recently used ones beyond a total size.
+Iterators (e.g. of generator functions) are passed through as they are, with
+their items pickled one by one into a pending entry, which is only committed
+once they are exhausted. So streaming them keeps memory constant, and stopping
+early (e.g. `| head`) stops the command without caching a partial result.
+Cached items are read back one by one too. Results with arguments of types
+without a stable form, unpicklable results, and async iterators are not cached.
+"""
+
+import os
+import pickle
+from collections.abc import AsyncIterator, Callable, Collection, Iterator
+from dataclasses import dataclass, fields, is_dataclass, replace
+from enum import Enum
+from functools import partial
+from pathlib import Path, PurePath
+from typing import TYPE_CHECKING, Any, BinaryIO, Literal
+
+from . import _cache
+from .error import UnsupportedCacheModeError
+
+if TYPE_CHECKING:
+    from ._fan_out import FanOut
+
+Mode = Literal["on", "off", "refresh"]
+
+MODES: tuple[Mode, ...] = ("on", "off", "refresh")
+
+NAMESPACE = "results"
+
+
+class _Unstable(Exception):
+    """
+    Raised for values without a stable canonical form.
+    """
+
+
+@dataclass(frozen=True)
+class Cache:
+    """
+    On-disk memoization of the results of commands, by their arguments (see
+    `start()`). Only for pure commands, i.e. whose results only depend on their
+    arguments (and on the files given by `Path` arguments).
+
+    Attributes:
+        commands: The commands to cache, by their paths (e.g. `{"report",
+            "db stats"}`), if there are several. If None, all of them.
+        max_bytes: The total size of the cached results, beyond which the least
+            recently used ones are evicted.
+        stat_paths: Whether results also depend on the modification times and
+            sizes of the files given by `Path` arguments.
+        refresh: Whether to compute results anew (and cache them) even if they
+            are cached.
+    """
+
+    commands: Collection[str] | None = None
+    max_bytes: int = 256 * 2**20
+    stat_paths: bool = True
+    refresh: bool = False
+
+    @classmethod
+    def from_options(cls, cache: "bool | Cache", mode: str | None) -> "Cache | None":
+        """
+        Make the cache from the `cache` option of `start()`, and the value of the
+        reserved `--startle-cache` option, which takes precedence. None if the
+        results are not to be cached.
+        """
+        if mode is not None and mode not in MODES:
+            raise UnsupportedCacheModeError(mode, MODES)
+        if mode == "off" or (mode is None and cache is False):
+            return None
+        memo = cache if isinstance(cache, Cache) else cls()
+        return replace(memo, refresh=True) if mode == "refresh" else memo
+
+    def bind(
+        self,
+        command: str,
+        func: Callable[..., Any],
+        f_args: list[Any],
+        f_kwargs: dict[str, Any],
+        call: Callable[[], Any],
+        fan: "FanOut | None" = None,
+    ) -> Callable[[], Any]:
+        """
+        Wrap the call of a command (given its path, and parsed arguments) so
+        that its result is returned from the cache if there, else cached.
+        """
+        if command and self.commands is not None and command not in self.commands:
+            return call
+        try:
+            key = _cache.cache_key(
+                _fingerprint(func),
+                self._canonical(f_args),
+                self._canonical(f_kwargs),
+                (fan.param, fan.chunk_size, fan.ordered) if fan else None,
+            )
+        except _Unstable:
+            return call
+        return partial(self._run, key, call)
+
+    def _run(self, key: str, call: Callable[[], Any]) -> Any:
+        if not self.refresh and (cached := _load(key)) is not _MISS:
+            return cached
+
+        value = call()
+        if isinstance(value, AsyncIterator):
+            return value  # type: ignore
+        if isinstance(value, Iterator):
+            return self._tee(key, value)  # type: ignore
+        try:
+            data = _dumps(False) + _dumps(value)
+        except Exception:  # unpicklable
+            pass
+        else:
+            _cache.write(
+                NAMESPACE, key, data, max_entries=None, max_bytes=self.max_bytes
+            )
+        return value
+
+    def _tee(self, key: str, items: Iterator[Any]) -> Iterator[Any]:
+        """
+        Pass the items through, caching them once exhausted.
+        """
+        entry = _cache.Pending(
+            NAMESPACE, key, max_entries=None, max_bytes=self.max_bytes
+        )
+        entry.write(_dumps(True))
+        try:
+            for item in items:
+                try:
+                    entry.write(_dumps(item))
+                except Exception:  # unpicklable
+                    entry.abandon()
+                yield item
+        except BaseException:  # including GeneratorExit, when closed early
+            entry.abandon()
+            if (close := getattr(items, "close", None)) is not None:
+                close()
+            raise
+        entry.commit()
+
+    def _canonical(self, value: Any) -> Any:
+        """
+        Get a canonical form of a value of an argument, with a stable `repr`.
+        """
+        if value is None or isinstance(value, bool | int | float | str | bytes):
+            return value
+        name = f"{type(value).__module__}.{type(value).__qualname__}"
+        if isinstance(value, PurePath):
+            if self.stat_paths and isinstance(value, Path):
+                try:
+                    stat = os.stat(value)
+                except OSError:
+                    return (name, str(value))
+                return (name, str(value), stat.st_mtime_ns, stat.st_size)
+            return (name, str(value))
+        if isinstance(value, Enum):
+            return (name, value.name)
+        if is_dataclass(value) and not isinstance(value, type):
+            return (
+                name,
+                tuple(
+                    (f.name, self._canonical(getattr(value, f.name)))
+                    for f in fields(value)
+                ),
+            )
+        if isinstance(value, list | tuple):
+            return (name, tuple(self._canonical(v) for v in value))  # type: ignore
+        if isinstance(value, set | frozenset):
+            items = [self._canonical(v) for v in value]  # type: ignore
+            return (name, tuple(sorted(items, key=repr)))
+        if isinstance(value, dict):
+            pairs = [
+                (self._canonical(k), self._canonical(v))
+                for k, v in value.items()  # type: ignore
+            ]
+            return (name, tuple(sorted(pairs, key=repr)))
+        if type(value).__repr__ is not object.__repr__:
+            text = repr(value)  # e.g. of datetimes, or user types
+            if " at 0x" not in text:  # not stable across runs
+                return (name, text)
+        raise _Unstable(name)
+
+
+_MISS = object()
+
+
+def _dumps(value: Any) -> bytes:
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _load(key: str) -> Any:
+    """
+    Load a cached result: a pickled flag of whether it is an iterator, followed
+    by the pickled result, or by the pickled items. `_MISS` if not cached.
+    """
+    if (file := _cache.open_entry(NAMESPACE, key, touch=True)) is None:
+        return _MISS
+    try:
+        is_iterator = pickle.load(file)
+        if is_iterator is True:
+            return _load_items(file)
+        if is_iterator is False:
+            with file:
+                return pickle.load(file)
+    except Exception:  # e.g. a class of the result has changed
+        pass
+    file.close()
+    return _MISS
+
+
+def _load_items(file: BinaryIO) -> Iterator[Any]:
+    with file:
+        while True:
+            try:
+                item = pickle.load(file)
+            except EOFError:
+                return
+            yield item
+
+
+def _fingerprint(func: Callable[..., Any]) -> tuple[str, str, str]:
+    """
+    Identify a command, along with the contents of its source file.
+    """
+    import hashlib
+    import inspect
+
+    module = getattr(func, "__module__", "") or ""
+    name = getattr(func, "__qualname__", repr(func))
+    try:
+        with open(inspect.getsourcefile(func) or "", "rb") as f:
+            source = f.read()
+    except (OSError, TypeError):
+        code = getattr(func, "__code__", None)
+        if code is None:
+            raise _Unstable(name) from None
+        source = code.co_code
+    return module, name, hashlib.sha256(source).hexdigest()
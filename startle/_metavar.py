@@ -1,4 +1,5 @@
 import sys
+from collections.abc import Mapping
 from enum import Enum
 from inspect import isclass
 from pathlib import Path
@@ -16,7 +17,9 @@ METAVARS: dict[Any, str | list[str]] = {
 }
 
 
-def get_metavar(type_: Any) -> str | list[str]:
+def get_metavar(
+    type_: Any, metavars: Mapping[Any, str | list[str]] = METAVARS
+) -> str | list[str]:
     """
     Get the metavar for a type hint.
     If the result is a list, we assume it is a list of possible choices,
@@ -39,4 +42,4 @@ def get_metavar(type_: Any) -> str | list[str]:
     if isclass(type_) and issubclass(type_, Enum):
         return [member.name.lower().replace("_", "-") for member in type_]
 
-    return METAVARS.get(type_, "val")
+    return metavars.get(type_, "val")
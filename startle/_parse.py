@@ -1,9 +1,7 @@
 from typing import Literal, TypeVar
 
-from rich.console import Console
-from rich.text import Text
-
 from ._inspect.make_args import make_args_from_class
+from ._registry import Registry
 from .error import ParserOptionError, ParserValueError
 
 T = TypeVar("T")
@@ -18,6 +16,7 @@ def parse(
     catch: bool = True,
     recurse: bool = False,
     naming: Literal["flat", "nested"] = "flat",
+    registry: Registry | None = None,
 ) -> T:
     """
     Given a class `cls`, parse arguments from the command-line according to the
@@ -40,9 +39,24 @@ def parse(
             while "nested" means arguments are named using dot notation to indicate
             their nesting (e.g. `--foo.bar.baz`).
             Ignored if `recurse` is False.
+        registry: The registry of parsers and metavars to use (see
+            `startle.Registry`). If None, uses the one bound to the context, or
+            the global one.
     Returns:
         An instance of the class `cls`.
     """
+    if registry is not None:
+        with registry.bind():
+            return parse(
+                cls,
+                name=name,
+                args=args,
+                brief=brief,
+                catch=catch,
+                recurse=recurse,
+                naming=naming,
+            )
+
     # first, make Args object from the class
     args_ = make_args_from_class(
         cls, brief=brief, program_name=name or "", recurse=recurse, naming=naming
@@ -59,6 +73,9 @@ def parse(
         return cls(*f_args, **f_kwargs)
     except (ParserOptionError, ParserValueError) as e:
         if catch:
+            from rich.console import Console
+            from rich.text import Text
+
             console = Console(markup=False)
             console.print(
                 Text.assemble(
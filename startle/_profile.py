@@ -0,0 +1,139 @@
+"""
+Profiling of the invoked command, requested with the reserved
+`--startle-profile cpu|mem|wall` option (and `--startle-profile-out PATH`).
+
+- `cpu` runs the command under `cProfile`, and writes the stats in `pstats`
+  format (or as text, sorted by cumulative time, if the path ends with `.txt`).
+- `mem` runs the command under `tracemalloc`, and writes the peak of traced
+  memory and the top allocation sites as text.
+- `wall` samples the stack of the command at a fixed interval (so time spent
+  waiting, e.g. on I/O, counts too), and writes the samples as folded stacks
+  (`outer;inner;leaf count` per line), as consumed by flame graph tools.
+
+Only the command itself is profiled, not the parsing of its arguments. Async
+commands are profiled along with the event loop that runs them.
+"""
+
+import os
+import sys
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Literal, TypeVar
+
+from .error import UnsupportedProfileModeError
+
+T = TypeVar("T")
+
+Mode = Literal["cpu", "mem", "wall"]
+
+MODES: tuple[Mode, ...] = ("cpu", "mem", "wall")
+
+DEFAULT_OUT: dict[Mode, str] = {
+    "cpu": "startle.prof",
+    "mem": "startle-mem.txt",
+    "wall": "startle-wall.txt",
+}
+
+TOP = 25  # number of allocation sites (or functions) in text reports
+INTERVAL = 0.001  # seconds between stack samples
+
+
+@dataclass
+class Profile:
+    """
+    A requested profile of the command.
+    """
+
+    mode: Mode
+    path: str
+
+    @classmethod
+    def from_reserved(cls, mode: str, path: str | None) -> "Profile":
+        if mode not in MODES:
+            raise UnsupportedProfileModeError(mode, MODES)
+        return cls(mode, path or DEFAULT_OUT[mode])
+
+    def run(self, call: Callable[[], T]) -> T:
+        """
+        Run `call` under the profiler, and write the report (even if it fails).
+        """
+        profiler = {"cpu": _cpu, "mem": _mem, "wall": _wall}[self.mode]
+        try:
+            return profiler(call, self.path)
+        finally:
+            print(f"Profile ({self.mode}) written to {self.path}", file=sys.stderr)
+
+
+def _cpu(call: Callable[[], T], path: str) -> T:
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(call)
+    finally:
+        if path.endswith(".txt"):
+            import pstats
+
+            with open(path, "w") as f:
+                stats = pstats.Stats(profiler, stream=f)
+                stats.sort_stats("cumulative").print_stats(TOP)
+        else:
+            profiler.dump_stats(path)
+
+
+def _mem(call: Callable[[], T], path: str) -> T:
+    import tracemalloc
+
+    tracemalloc.start(10)
+    try:
+        return call()
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        with open(path, "w") as f:
+            f.write(f"Peak traced memory: {peak / 1024:.1f} KiB\n")
+            f.write(f"Traced memory at exit: {current / 1024:.1f} KiB\n")
+            f.write(f"\nTop {TOP} allocation sites (still allocated at exit):\n")
+            for stat in snapshot.statistics("lineno")[:TOP]:
+                f.write(f"  {stat}\n")
+
+
+def _wall(call: Callable[[], T], path: str) -> T:
+    import threading
+
+    counts: Counter[str] = Counter()
+    done = threading.Event()
+    thread_id = threading.get_ident()
+
+    def sample() -> None:
+        while not done.wait(INTERVAL):
+            frame = sys._current_frames().get(thread_id)  # type: ignore
+            if done.is_set():  # i.e. sampled after the command returned
+                break
+            stack: list[str] = []
+            while frame is not None:
+                code = frame.f_code
+                if code.co_filename != __file__:
+                    name = os.path.basename(code.co_filename)
+                    stack.append(f"{code.co_name} ({name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                counts[";".join(reversed(stack))] += 1
+
+    sampler = threading.Thread(target=sample, name="startle-profile", daemon=True)
+    sampler.start()
+    try:
+        return call()
+    finally:
+        done.set()
+        sampler.join()
+        with open(path, "w") as f:
+            for stack, count in counts.most_common():
+                f.write(f"{stack} {count}\n")
@@ -0,0 +1,158 @@
+"""
+Construction of class instances from a stream of records (e.g. the rows of a CSV
+file, or the objects of a JSON-lines file), with the same conversion of values
+as `parse()`, via `parse_records()`.
+
+The parser of the class is built once, and compiled into a plan of a key, a
+converter and a default per field, so that each record only costs a lookup and
+a conversion per field. Records are consumed lazily, so that memory stays
+constant however many there are.
+"""
+
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any, TypeVar, cast
+
+from ._inspect.make_args import make_args_from_class
+from ._registry import Registry
+from ._value_parser import as_str
+from .arg import Arg
+from .args import Args, Missing
+from .error import (
+    MissingRequiredOptionError,
+    ParserOptionError,
+    ParserValueError,
+    RecordsError,
+)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, slots=True)
+class _Field:
+    """
+    The plan of a field: where its value comes from, and how it is converted.
+    """
+
+    key: str  # in the records, i.e. the name of the field
+    convert: Callable[[Any], Any]
+    required: bool
+    default: Any
+    positional: bool  # positional-only, hence passed by position
+
+
+def _converter(arg: Arg, delimiter: str) -> Callable[[Any], Any]:
+    """
+    Make the converter of the values of a field, from those of its argument.
+    """
+    to_value, type_ = arg.convert, arg.type_
+
+    def scalar(value: Any) -> Any:
+        if type(value) is type_ and type_ is not bool:
+            return value  # already typed, e.g. a number in JSON
+        return to_value(as_str(value))
+
+    if not arg.is_nary:
+        return scalar
+    container = cast(Callable[[Iterable[Any]], Any], arg.container_type)
+
+    def nary(value: Any) -> Any:
+        if isinstance(value, str):
+            value = (value.split(delimiter) if delimiter else [value]) if value else []
+        return container(map(scalar, cast(Iterable[Any], value)))
+
+    return nary
+
+
+def _compile(args: Args, delimiter: str) -> list[_Field]:
+    """
+    Compile the parser of a class into the plans of its fields.
+    """
+    return [
+        _Field(
+            key=arg.name.long_or_short.replace("-", "_"),
+            convert=_converter(arg, delimiter),
+            required=arg.required,
+            default=arg.default,
+            positional=arg.is_positional and not arg.is_named,
+        )
+        for arg in cast(list[Arg], args._args)  # type: ignore
+    ]
+
+
+def parse_records(
+    cls: type[T],
+    records: Iterable[Mapping[str, Any]],
+    *,
+    delimiter: str = ",",
+    max_errors: int | None = 100,
+    registry: Registry | None = None,
+) -> Iterator[T]:
+    """
+    Given a class `cls`, convert each of a stream of records into an instance of
+    it, as `parse()` would from the command line.
+
+    Args:
+        cls: The class to construct instances of (e.g. a dataclass, or a
+            TypedDict).
+        records: The records, as mappings from the names of the fields of `cls`
+            to their values (e.g. from `csv.DictReader`, or `json.loads` of each
+            line of a JSON-lines file). Values are either strings, converted as
+            if given on the command line, or already of the type of the field.
+            Keys that are not fields are ignored, and missing keys (or `None`
+            values) take the defaults of the fields.
+        delimiter: The delimiter of the elements of n-ary fields (e.g.
+            `tags: list[str]`), when given as a single string (an empty one
+            being no elements). If empty, such a string is a single element.
+        max_errors: The number of failing records after which to stop. If None,
+            all records are converted.
+        registry: The registry of parsers to use (see `startle.Registry`). If
+            None, uses the one bound to the context, or the global one.
+    Returns:
+        An iterator over the instances of `cls`, one per valid record, in order.
+        The records that fail to convert (or to construct, e.g. rejected by
+        `__post_init__`) are skipped, and reported at the end
+        (or once there are `max_errors` of them) with a `RecordsError`, along
+        with their numbers (1-based).
+    """
+    args = make_args_from_class(cls, registry=registry)
+    return _construct(cls, _compile(args, delimiter), records, max_errors)
+
+
+def _construct(
+    cls: Callable[..., T],
+    fields: Sequence[_Field],
+    records: Iterable[Mapping[str, Any]],
+    max_errors: int | None,
+) -> Iterator[T]:
+    errors: list[tuple[int, Exception]] = []
+    for n, record in enumerate(records, start=1):
+        f_args: list[Any] = []
+        f_kwargs: dict[str, Any] = {}
+        try:
+            for field in fields:
+                value = record.get(field.key)
+                if value is not None:
+                    value = field.convert(value)
+                elif field.required:
+                    raise MissingRequiredOptionError(field.key)
+                elif (value := field.default) is Missing:
+                    continue
+                if field.positional:
+                    f_args.append(value)
+                else:
+                    f_kwargs[field.key] = value
+        except (ParserOptionError, ParserValueError) as e:
+            errors.append((n, e))
+        else:
+            try:
+                obj = cls(*f_args, **f_kwargs)
+            except Exception as e:  # e.g. validation in `__post_init__`
+                errors.append((n, e))
+            else:
+                yield obj
+                continue
+        if max_errors is not None and len(errors) >= max_errors:
+            break
+    if errors:
+        raise RecordsError(getattr(cls, "__name__", repr(cls)), errors)
@@ -1,17 +1,18 @@
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
 from typing import Any
 
-from ._typing import normalize
-
 
 def register(
     type_: Any,
     parser: Callable[[str], Any] | None = None,
     metavar: str | list[str] | None = None,
+    completer: Callable[[str], Iterable[str]] | None = None,
 ) -> None:
     """
-    Register a custom parser and metavar for a type.
-    `parser` can be omitted to specify a custom metavar for an already parsable type.
+    Register a custom parser, metavar and completer for a type, in the global
+    registry (see `startle.Registry` for scoped ones).
+    `parser` can be omitted to specify a custom metavar (or completer) for an
+    already parsable type.
 
     Args:
         type_: The type or annotation to register the parser and metavar for.
@@ -20,15 +21,12 @@ def register(
             If None, default metavar "val" is used.
             If list, the metavar is treated as a literal list of possible choices,
             such as ["true", "false"] yielding "true|false" for a boolean type.
+        completer: A function that takes the prefix of a value being typed and
+            returns possible values, for shell completion of values that cannot
+            be listed statically (e.g. names fetched from a service).
     """
     # TODO: should overwrite be disallowed?
 
-    from ._metavar import METAVARS
-    from ._value_parser import PARSERS
-
-    type_ = normalize(type_)
+    from ._registry import DEFAULT
 
-    if parser:
-        PARSERS[type_] = parser
-    if metavar:
-        METAVARS[type_] = metavar
+    DEFAULT.register(type_, parser, metavar, completer)
@@ -0,0 +1,138 @@
+"""
+Registries of parsers, metavars and completers for types.
+
+The global registry (which `startle.register()` adds to) is the default. A
+`Registry` can be passed to `start()`, `parse()` or `make_args_from_*()`, or
+bound to the current context with `Registry.bind()`, to use other parsers for
+the same types without affecting the rest of the process (e.g. other libraries,
+threads or tasks).
+
+When bound, a registry is snapshotted into immutable mappings, from which
+parsers are built: each `Arg` keeps its converter and the snapshot it was
+built with, so that lookups neither lock nor change after the spec is built.
+"""
+
+from collections.abc import Callable, Generator, Iterable, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import MappingProxyType
+from typing import Any, TypeAlias, cast
+
+from ._metavar import METAVARS, get_metavar
+from ._typing import normalize, strip_optional
+from ._value_parser import PARSERS, get_parser
+
+Completer: TypeAlias = Callable[[str], Iterable[str]]
+# given the prefix typed so far, returns the possible values
+
+COMPLETERS: dict[Any, Completer] = {}
+
+
+class Registry:
+    """
+    Parsers, metavars and completers for types, falling back to those of a
+    `base` registry (by default, the global registry) for the other types.
+
+    Args:
+        base: The registry to fall back to. If None, the global registry.
+    """
+
+    __slots__ = ("_base", "completers", "metavars", "parsers")
+
+    def __init__(self, base: "Registry | None" = None) -> None:
+        self.parsers: Mapping[Any, Callable[[str], Any]] = {}
+        self.metavars: Mapping[Any, str | list[str]] = {}
+        self.completers: Mapping[Any, Completer] = {}
+        self._base: Registry | None = base or DEFAULT
+
+    def register(
+        self,
+        type_: Any,
+        parser: Callable[[str], Any] | None = None,
+        metavar: str | list[str] | None = None,
+        completer: Completer | None = None,
+    ) -> None:
+        """
+        Register a custom parser, metavar and completer for a type, in this
+        registry only. See `startle.register()`.
+        """
+        if isinstance(self.parsers, MappingProxyType):
+            raise TypeError("Cannot register into a snapshot of a registry!")
+        type_ = normalize(type_)
+        if parser:
+            cast(dict[Any, Any], self.parsers)[type_] = parser
+        if metavar:
+            cast(dict[Any, Any], self.metavars)[type_] = metavar
+        if completer:
+            cast(dict[Any, Any], self.completers)[type_] = completer
+
+    def snapshot(self) -> "Registry":
+        """
+        Flatten the registry and its bases into an immutable copy.
+        """
+        chain: list[Registry] = []
+        registry: Registry | None = self
+        while registry is not None:
+            chain.insert(0, registry)
+            registry = registry._base
+        return Registry._of(
+            MappingProxyType({k: v for r in chain for k, v in r.parsers.items()}),
+            MappingProxyType({k: v for r in chain for k, v in r.metavars.items()}),
+            MappingProxyType({k: v for r in chain for k, v in r.completers.items()}),
+        )
+
+    @classmethod
+    def _of(
+        cls,
+        parsers: Mapping[Any, Callable[[str], Any]],
+        metavars: Mapping[Any, str | list[str]],
+        completers: Mapping[Any, Completer],
+    ) -> "Registry":
+        """
+        A registry on the given mappings, without a base.
+        """
+        registry = cls.__new__(cls)
+        registry.parsers, registry.metavars = parsers, metavars
+        registry.completers, registry._base = completers, None
+        return registry
+
+    @contextmanager
+    def bind(self) -> Generator["Registry"]:
+        """
+        Use (a snapshot of) this registry to build parsers in the current
+        context, e.g. the current thread or asyncio task, until exit.
+
+        Yields:
+            The snapshot in use.
+        """
+        snapshot = self.snapshot()
+        token = _CURRENT.set(snapshot)
+        try:
+            yield snapshot
+        finally:
+            _CURRENT.reset(token)
+
+    def parser_for(self, type_: Any) -> Callable[[str], Any] | None:
+        return get_parser(type_, self.parsers)
+
+    def is_parsable(self, type_: Any) -> bool:
+        return self.parser_for(type_) is not None
+
+    def metavar_for(self, type_: Any) -> str | list[str]:
+        return get_metavar(type_, self.metavars)
+
+    def completer_for(self, type_: Any) -> Completer | None:
+        return self.completers.get(strip_optional(type_))
+
+
+DEFAULT = Registry._of(PARSERS, METAVARS, COMPLETERS)  # type: ignore
+# the global registry, on the module-level dicts (e.g. `PARSERS`)
+
+_CURRENT: ContextVar[Registry | None] = ContextVar("startle_registry", default=None)
+
+
+def current() -> Registry:
+    """
+    The registry bound to the current context, or the global registry.
+    """
+    return _CURRENT.get() or DEFAULT
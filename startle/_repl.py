@@ -0,0 +1,103 @@
+"""
+Interactive mode: run many commands in a row, reusing the same parsers.
+"""
+
+import os
+import shlex
+import sys
+import traceback
+from collections.abc import Callable
+from typing import Any
+
+from ._console import error
+
+
+def _enable_completion(complete: Callable[[list[str], str], list[str]]) -> None:
+    """
+    Enable tab completion on the prompt via `readline`, if available.
+    """
+    try:
+        import readline
+    except ImportError:  # pragma: not covered
+        return
+
+    matches: list[str] = []
+
+    def completer(text: str, state: int) -> str | None:
+        if state == 0:
+            line = readline.get_line_buffer()[: readline.get_begidx()]
+            try:
+                words = shlex.split(line)
+            except ValueError:
+                words = []
+            matches[:] = complete(words, text)
+        return matches[state] if state < len(matches) else None
+
+    readline.set_completer(completer)
+    readline.set_completer_delims(" \t\n")
+    if "libedit" in (readline.__doc__ or ""):  # pragma: not covered
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+
+
+def repl(
+    run: Callable[..., Any],
+    complete: Callable[[list[str], str], list[str]],
+    *,
+    name: str | None = None,
+    runner: Callable[..., Any] | None = None,
+) -> None:
+    """
+    Read commands from a prompt and run them until end of input (Ctrl-D).
+
+    Each line is split into arguments with `shlex`, and run with
+    `run(args, runner=...)`. Async commands all run on the same event loop,
+    unless a `runner` is given.
+    Errors are reported, and the next command is read.
+
+    Args:
+        run: Function to parse the arguments with and invoke the command.
+        complete: Function to suggest completions (see `Args.complete()`).
+        name: The name of the program, to show in the prompt.
+        runner: The function to run async commands with. If None, uses a single
+            event loop for all of them.
+    """
+    import asyncio
+
+    prompt = f"{name or os.path.basename(sys.argv[0])}> "
+    _enable_completion(complete)
+    loop = asyncio.new_event_loop()
+    runner = runner or loop.run_until_complete
+
+    try:
+        while True:
+            try:
+                line = input(prompt)
+            except EOFError:
+                print()
+                return
+            except KeyboardInterrupt:
+                print()
+                continue
+
+            try:
+                args = shlex.split(line)
+            except ValueError as e:
+                error(str(e), exit=False, endl=False)
+                continue
+            if not args:
+                continue
+
+            try:
+                result = run(args, runner=runner)
+                if result is not None:
+                    print(result)
+            except SystemExit:
+                pass  # errors (and help) are already printed
+            except KeyboardInterrupt:
+                print()
+            except Exception:
+                traceback.print_exc()
+    finally:
+        loop.close()
@@ -0,0 +1,81 @@
+"""
+Reserved `--startle-*` options, which are handled by `start()` itself rather
+than being passed to the parser of the function(s).
+"""
+
+from .error import MissingOptionValueError, ValueParsingError
+
+RESERVED_PREFIX = "--startle-"
+
+RESERVED: dict[str, str] = {
+    "batch": "Run a command per line of the given file (or `-` for stdin).",
+    "executor": "How to run the commands of batch mode: in a pool of `thread`s "
+    "(the default), a pool of `process`es, or on a single `async` event loop.",
+    "jobs": "Number of commands to run concurrently in batch mode, or else of "
+    "processes to fan the command out to (over its n-ary positional argument).",
+    "concurrency": "Number of concurrent calls to fan an async command out to "
+    "(over its n-ary positional argument).",
+    "completion": "Print a completion script for `bash`, `zsh` or `fish` "
+    "(or `hash` for the hash of the parsers, to tell when a script is stale).",
+    "manifest": "Write the JSON manifest of the parsers to the given file "
+    "(or `-` for stdout).",
+    "shard": "Run on the `i`th of `N` parts of the n-ary positional argument, "
+    "given as `i/N` (contiguous parts) or `i/N:hash` (by hash of the elements).",
+    "config": "Read values of options from the given TOML or JSON file, "
+    "which options given on the command line take precedence over.",
+    "stream": "Write the results of the command to stdout as they are produced, "
+    "as `lines`, `jsonl` (JSON lines) or `bytes`.",
+    "cache": "Whether to cache the results of the command: `on`, `off`, or "
+    "`refresh` to compute them anew.",
+    "profile": "Profile the command with `cpu` (cProfile), `mem` (tracemalloc) "
+    "or `wall` (stack sampling).",
+    "profile-out": "Where to write the profile of `--startle-profile`.",
+}
+
+
+def pop_reserved(args: list[str]) -> tuple[dict[str, str], list[str]]:
+    """
+    Separate reserved options (e.g. `--startle-batch jobs.txt`, or with
+    `=` syntax) from the rest of the arguments. Arguments after `--` are never
+    treated as reserved options.
+
+    Returns:
+        A mapping from reserved option names (without the prefix) to their
+        values, and the remaining arguments.
+    """
+    if not any(arg.startswith(RESERVED_PREFIX) for arg in args):
+        return {}, args
+
+    reserved: dict[str, str] = {}
+    remaining: list[str] = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--":
+            remaining += args[i:]
+            break
+        key, eq, value = arg[len(RESERVED_PREFIX) :].partition("=")
+        if arg.startswith(RESERVED_PREFIX) and key in RESERVED:
+            if not eq:
+                if i + 1 >= len(args):
+                    raise MissingOptionValueError(arg[2:])
+                value = args[i + 1]
+                i += 1
+            reserved[key] = value
+        else:
+            remaining.append(arg)
+        i += 1
+    return reserved, remaining
+
+
+def positive_int(value: str) -> int:
+    """
+    Parse the value of a reserved option that counts something (e.g. jobs).
+    """
+    try:
+        count = int(value)
+    except ValueError:
+        count = 0
+    if count < 1:
+        raise ValueParsingError(value, "positive integer")
+    return count
@@ -0,0 +1,208 @@
+"""
+Server mode: a warm process that keeps the imported modules and the pre-built
+parsers around, and runs each incoming command in a forked worker.
+
+See `client.py` for the protocol and the client side.
+"""
+
+import json
+import os
+import socket
+import sys
+import time
+import traceback
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any
+
+from .client import ACK, EXIT_CODE, HEADER, unix_path
+from .error import UnsupportedServerAddressError
+
+
+def source_files(objs: Iterable[Any]) -> list[Path]:
+    """
+    Source files that a server should watch for changes: those defining the
+    given objects, and the main script.
+    """
+    import inspect
+
+    files = set[Path]()
+    for obj in objs:
+        try:
+            if file := inspect.getsourcefile(obj):
+                files.add(Path(file))
+        except TypeError:
+            pass
+    if main_file := getattr(sys.modules.get("__main__"), "__file__", None):
+        files.add(Path(main_file))
+    return sorted(files)
+
+
+def _mtimes(files: list[Path]) -> list[float | None]:
+    def mtime(file: Path) -> float | None:
+        try:
+            return file.stat().st_mtime
+        except OSError:
+            return None
+
+    return [mtime(file) for file in files]
+
+
+def _recv_exact(conn: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Client closed the connection!")
+        data += chunk
+    return data
+
+
+def _listen(address: str) -> tuple[socket.socket, str]:
+    try:
+        path = unix_path(address)
+    except ValueError as e:
+        raise UnsupportedServerAddressError(address) from e
+
+    if os.path.exists(path):
+        # a leftover socket file from a dead server is simply replaced
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(path)
+            except ConnectionError:
+                os.unlink(path)
+            else:
+                raise OSError(f"A server is already running at `{path}`!")
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)  # only the owner should be able to run commands
+    try:
+        listener.bind(path)  # created with mode 0600 from the start
+    finally:
+        os.umask(umask)
+    listener.listen()
+    return listener, path
+
+
+def _exit_code(e: SystemExit) -> int:
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+def _work(
+    run: Callable[[list[str]], Any],
+    conn: socket.socket,
+    request: dict[str, Any],
+    fds: list[int],
+) -> None:
+    """
+    Run a single request in a forked worker, and report its exit code.
+    """
+    for target, fd in enumerate(fds[:3]):
+        os.dup2(fd, target)
+    for fd in fds:
+        os.close(fd)
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    sys.argv[1:] = request["argv"]
+
+    try:
+        run(request["argv"])
+        code = 0
+    except SystemExit as e:
+        code = _exit_code(e)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    conn.sendall(EXIT_CODE.pack(code))
+
+
+def _reap() -> None:
+    try:
+        while os.waitpid(-1, os.WNOHANG)[0]:
+            pass
+    except ChildProcessError:
+        pass
+
+
+def serve(
+    address: str,
+    run: Callable[[list[str]], Any],
+    *,
+    idle_timeout: float = 600.0,
+    watch: list[Path] | None = None,
+) -> None:
+    """
+    Serve requests at `address` until idle for `idle_timeout` seconds, or until
+    any of the `watch`ed source files change.
+
+    Each request is run in a forked worker which inherits everything that was
+    imported or built up front, so only the command itself is paid for.
+
+    Args:
+        address: The address to listen at, e.g. `unix:/run/user/1000/tool.sock`.
+        run: The function to run in a worker with the command-line arguments
+            of a request.
+        idle_timeout: Seconds of inactivity after which the server stops.
+        watch: Source files to watch. The server stops (without handling the
+            request) as soon as one of them changes, so that clients can fall back
+            to running fresh code.
+    """
+    watch = watch or []
+    mtimes = _mtimes(watch)
+    listener, path = _listen(address)
+    listener.settimeout(min(idle_timeout, 1.0))
+    last_active = time.monotonic()
+
+    try:
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except TimeoutError:
+                _reap()
+                if time.monotonic() - last_active > idle_timeout:
+                    return
+                if _mtimes(watch) != mtimes:
+                    return
+                continue
+
+            with conn:
+                conn.settimeout(None)
+                if _mtimes(watch) != mtimes:
+                    return  # stale, closing without a response
+                last_active = time.monotonic()
+                fds: list[int] = []
+                try:
+                    header, fds, _, _ = socket.recv_fds(conn, HEADER.size, 3)
+                    header += _recv_exact(conn, HEADER.size - len(header))
+                    (size,) = HEADER.unpack(header)
+                    request = json.loads(_recv_exact(conn, size))
+                    conn.sendall(ACK)  # from now on, the client cannot fall back
+                except (ConnectionError, ValueError):
+                    for fd in fds:
+                        os.close(fd)
+                    continue
+
+                sys.stdout.flush()
+                sys.stderr.flush()
+                if os.fork() == 0:  # worker
+                    listener.close()
+                    try:
+                        _work(run, conn, request, fds)
+                    finally:
+                        os._exit(0)
+                for fd in fds:
+                    os.close(fd)
+            _reap()
+    finally:
+        listener.close()
+        if os.path.exists(path):
+            os.unlink(path)
@@ -0,0 +1,118 @@
+"""
+Sharding of the elements of an n-ary argument of a command (e.g. `files:
+list[Path]`) across runs, requested with the reserved `--startle-shard i/N`
+option, or the `STARTLE_SHARD` environment variable (e.g. set from the task id
+of an array job). Each of the `N` runs, `0 <= i < N`, gets a disjoint part:
+
+- `i/N` (or `i/N:contiguous`) gives the `i`th of `N` contiguous slices of
+  (almost) equal size, in the order of the input.
+- `i/N:hash` gives the elements whose stable hash (CRC-32 of their string form)
+  modulo `N` is `i`, so that the assignment of an element does not depend on the
+  other elements (e.g. when the input grows).
+
+The argument is the one fanned out over (`fan_out`), if any, or else the only
+n-ary positional argument of the command. Sharding happens before the command
+is called (or fanned out over), with the other arguments left as is.
+"""
+
+import zlib
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Literal, cast
+
+from .error import FanOutOptionError, FanOutParamError, InvalidShardError
+
+if TYPE_CHECKING:
+    from .args import Args
+
+ENV = "STARTLE_SHARD"
+
+Mode = Literal["contiguous", "hash"]
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    A requested shard of the input: the `index`th of `count`. An `inherited`
+    shard (i.e. from the environment) is ignored by commands without an n-ary
+    argument to shard, as it may be meant for another program.
+    """
+
+    index: int
+    count: int
+    mode: Mode = "contiguous"
+    inherited: bool = False
+
+    @classmethod
+    def parse(cls, spec: str, inherited: bool = False) -> "Shard":
+        """
+        Parse a shard from its `i/N[:mode]` form.
+        """
+        shard, _, mode = spec.strip().partition(":")
+        index, slash, count = shard.partition("/")
+        try:
+            if not slash or mode not in ("", "contiguous", "hash"):
+                raise ValueError(spec)
+            result = cls(int(index), int(count), mode or "contiguous", inherited)
+        except ValueError:
+            raise InvalidShardError(spec) from None
+        if not 0 <= result.index < result.count:
+            raise InvalidShardError(spec)
+        return result
+
+    def select(self, value: Any) -> Any:
+        """
+        Select the part of the value of an n-ary argument in this shard, in the
+        same container type. Elements of unordered containers (sets) are sorted
+        by their string form first, so that all runs agree on their order.
+        """
+        container = cast(Callable[[list[Any]], Any], type(value))
+        items = list(value)
+        if isinstance(value, set | frozenset):
+            items.sort(key=lambda item: (str(item), repr(item)))
+        if self.mode == "hash":
+            part = [
+                item
+                for item in items
+                if zlib.crc32(str(item).encode()) % self.count == self.index
+            ]
+        else:
+            size = len(items)
+            start = self.index * size // self.count
+            part = items[start : (self.index + 1) * size // self.count]
+        return container(part)
+
+    def apply(
+        self,
+        func: Callable[..., Any],
+        args: "Args",
+        f_args: list[Any],
+        f_kwargs: dict[str, Any],
+        param: str | None = None,
+    ) -> tuple[list[Any], dict[str, Any]]:
+        """
+        Shard the parsed arguments of a command.
+
+        Args:
+            func: The command.
+            args: The parser of the command.
+            f_args: The positional arguments of the call, from `args`.
+            f_kwargs: The keyword arguments of the call, from `args`.
+            param: The name of the n-ary argument to shard. If None, the only
+                n-ary positional argument of the command.
+        Returns:
+            The arguments of the call, with the n-ary one sharded (or as they
+            are, if the shard is inherited and there is no such argument).
+        """
+        from ._fan_out import fix_arguments
+
+        try:
+            fixed, value = fix_arguments(func, args, f_args, f_kwargs, param, "shard")
+        except FanOutParamError:
+            if self.inherited:
+                return f_args, f_kwargs
+            if param is not None:
+                raise
+            obj_name = getattr(func, "__name__", repr(func))
+            raise FanOutOptionError("shard", obj_name, "shard") from None
+        return fixed.arguments(self.select(value))
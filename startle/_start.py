@@ -1,24 +1,71 @@
+import os
 import sys
-from collections.abc import Callable
+from collections.abc import Callable, Coroutine, Generator, Iterable, Sequence
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import partial
 from inspect import iscoroutinefunction
-from typing import Any, Literal, TypeVar, cast
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal, NoReturn, TypeAlias, TypeVar, cast
 
 from ._console import console, error, post_error
+from ._docstr import parse_docstring
 from ._inspect.make_args import make_args_from_func
+from ._registry import Registry
 from .args import Args
-from .cmds import Cmds
+from .cmds import CmdParser, Cmds
 from .error import (
+    BatchFileError,
     CmdsRecurseError,
     ParserOptionError,
     ParserValueError,
     SingleFunctionDefaultCommandError,
 )
 
+if TYPE_CHECKING:
+    from ._config import Sources
+    from ._fan_out import FanOut
+    from ._memo import Cache
+    from ._profile import Profile
+    from ._shard import Shard
+    from ._stream import Stream
+    from ._telemetry import Recorder
+
 T = TypeVar("T")
 
+Funcs: TypeAlias = "list[Callable[..., Any]] | dict[str, Callable[..., Any] | Funcs]"
+# functions as commands, possibly nested into command groups via dicts
+
+Runner: TypeAlias = Callable[[Coroutine[Any, Any, Any]], Any]
+# runs a coroutine to completion, e.g. `asyncio.run`
+
+_IMPORTING = ContextVar("startle_importing", default=False)
+
+
+class StartRefused(BaseException):
+    """
+    Raised by `start()` (and `start_async()`) within `refuse_start()`, instead
+    of running any command. A BaseException, so that it is not swallowed by an
+    `except Exception` around the call.
+    """
+
+
+@contextmanager
+def refuse_start() -> Generator[None]:
+    """
+    Refuse to run commands within the context, e.g. while importing a script
+    only for its functions.
+    """
+    token = _IMPORTING.set(True)
+    try:
+        yield
+    finally:
+        _IMPORTING.reset(token)
+
 
 def start(
-    obj: Callable[..., Any] | list[Callable[..., Any]] | dict[str, Callable[..., Any]],
+    obj: "Callable[..., Any] | Funcs",
     *,
     name: str | None = None,
     args: list[str] | None = None,
@@ -26,14 +73,34 @@ def start(
     default: str | None = None,
     recurse: bool = False,
     naming: Literal["flat", "nested"] = "flat",
+    server: str | None = None,
+    idle_timeout: float = 600.0,
+    repl: bool = False,
+    runner: Runner | None = None,
+    registry: Registry | None = None,
+    fan_out: str | None = None,
+    workers: int | None = None,
+    chunk_size: int = 1,
+    item_timeout: float | None = None,
+    ordered: bool = True,
+    config: "str | Path | Sequence[str | Path] | None" = None,
+    env_prefix: str | None = None,
+    env_delimiter: str = ",",
+    stream: str | None = None,
+    cache: "bool | Cache" = False,
 ) -> Any:
     """
     Given a function, or a container of functions `obj`, parse its arguments from
     the command-line and call it.
 
+    Reserved options (e.g. `--startle-batch FILE`) are handled before parsing,
+    and never passed to the function(s).
+
     Args:
         obj: The function or functions to parse the arguments for and invoke.
             If a list or dict, the functions are treated as subcommands.
+            Values of a dict can themselves be lists or dicts, which are treated
+            as groups of subcommands (e.g. `prog db migrate`).
         name: The name of the program. If None, uses the name of the script
             (i.e. sys.argv[0]).
         args: The arguments to parse. If None, uses the arguments from the command-line
@@ -50,19 +117,530 @@ def start(
             while "nested" means arguments are named using dot notation to indicate
             their nesting (e.g. `--foo.bar.baz`).
             Ignored if `recurse` is False.
+        server: (experimental) If given, instead of running a command, serve commands
+            at this address (e.g. `unix:/run/user/1000/tool.sock`) with the parsers
+            built up front, each in a forked worker. Use `startle/client.py` as the
+            (lightweight) client. Only supported on POSIX systems. Each command
+            runs as a single `start()` call would, i.e. with the other options
+            (e.g. `fan_out`, `stream`, `cache`) and its reserved options.
+        idle_timeout: Seconds of inactivity after which the server stops.
+            Ignored if `server` is None.
+        repl: If True, instead of running a single command, read commands from an
+            interactive prompt (with tab completion) until end of input, reusing the
+            same parsers and event loop. Each command runs as with `server`.
+            Ignored if `server` is given.
+        runner: The function to run async functions with, given their coroutine
+            (e.g. `asyncio.run`, `uvloop.run`, or `loop.run_until_complete` of a
+            long-lived loop). If None, uses `asyncio.run` (or, in `repl` mode, a
+            single loop for all the commands).
+        registry: The registry of parsers, metavars and completers to use (see
+            `startle.Registry`), for this call only. If None, uses the one bound
+            to the context, or the global one.
+        fan_out: The name of an n-ary argument (e.g. `files: list[Path]`) to fan
+            the command out over: instead of a single call, the command is called
+            per chunk of its elements (with the other arguments fixed) in a pool
+            of processes (or, if async, concurrently on an event loop), and the
+            results of the chunks are returned as a list (or if streaming, written
+            per chunk as they are collected). The reserved
+            `--startle-jobs N` (or `--startle-concurrency N`) option fans out as
+            well (over the only n-ary positional argument, if `fan_out` is None).
+        workers: The number of processes (or, for async commands, of concurrent
+            calls) to fan out to. If None, the number of CPUs. Overridden by
+            `--startle-jobs`. Ignored if not fanning out.
+        chunk_size: The number of elements per call when fanning out.
+        item_timeout: Seconds each call of an async command may take when fanning
+            out, after which it fails. If None, no limit.
+        ordered: Whether to return the results of a fan-out in the order of the
+            input. If False, they are in the order of completion.
+        config: A config file (TOML or JSON), or a list of them, to read values
+            of options from (later files taking precedence). Options given on the
+            command line take precedence over them, and their values over the
+            defaults. The reserved `--startle-config FILE` option adds a file
+            after these.
+        env_prefix: If given, read values of options from the environment
+            variables named after this prefix and the options (e.g. `APP_DB_HOST`
+            for `--db-host`, or `--db.host` with nested naming, given `APP_`).
+            They take precedence over config files, and options given on the
+            command line over them.
+        env_delimiter: The delimiter of the elements of n-ary options in
+            environment variables. If empty, the value is a single element.
+        stream: If given, write the results of the command to stdout as they are
+            produced, in this format: `lines`, `jsonl` (JSON lines) or `bytes`
+            (as they are), instead of returning them. Iterators (e.g. of generator
+            functions) and async iterators are written item by item, and other
+            results as a single item. Overridden by the reserved
+            `--startle-stream FORMAT` option.
+        cache: Whether to cache the results of pure commands on disk, by their
+            arguments (and the files of their `Path` arguments), and return them
+            from there instead of calling the command again. A `startle.Cache`
+            sets which commands to cache, and the size of the cache. Overridden
+            by the reserved `--startle-cache on|off|refresh` option.
     Returns:
         The return value of the function `obj`, or the subcommand of `obj` if it is
-        a list or dict.
+        a list or dict (a list of them per chunk, if fanned out). None if `server`
+        or `repl` is given, or if streaming.
+    """
+    if _IMPORTING.get():
+        raise StartRefused("`start()` was called while importing!")
+    if registry is not None:
+        with registry.bind():
+            return start(
+                obj,
+                name=name,
+                args=args,
+                catch=catch,
+                default=default,
+                recurse=recurse,
+                naming=naming,
+                server=server,
+                idle_timeout=idle_timeout,
+                repl=repl,
+                runner=runner,
+                fan_out=fan_out,
+                workers=workers,
+                chunk_size=chunk_size,
+                item_timeout=item_timeout,
+                ordered=ordered,
+                config=config,
+                env_prefix=env_prefix,
+                env_delimiter=env_delimiter,
+                stream=stream,
+                cache=cache,
+            )
+
+    if _completing(name):
+        _complete_request(obj, name, default, recurse, naming)
+
+    settings = _Settings(
+        fan_out,
+        workers,
+        chunk_size,
+        item_timeout,
+        ordered,
+        config,
+        env_prefix,
+        env_delimiter,
+        stream,
+        cache,
+    )
+    options: dict[str, Any] = {}
+    if server is None and not repl:
+        try:
+            args, reserved = _handle_reserved(obj, args, name, default, recurse, naming)
+            options = settings.resolve(reserved)
+        except (ParserOptionError, ParserValueError) as e:
+            if not catch:
+                raise
+            error(str(e))
+
+    if isinstance(obj, list) or isinstance(obj, dict):
+        obj = cast(Funcs, obj)
+        if recurse:
+            raise CmdsRecurseError()
+        if server is None and not repl:
+            with _recording(obj, name, args, default) as recorder:
+                return _start_cmds(
+                    obj,
+                    name,
+                    args,
+                    catch,
+                    default,
+                    runner=runner,
+                    recorder=recorder,
+                    **options,
+                )
+
+        spec = make_cmds(obj, name or "", default or "")
+        start_ = partial(_start_cmds, obj, name, catch=catch, spec=spec)
+        funcs, complete = list(spec[1].values()), spec[0].complete
+        if server is not None:
+            spec[0].build()
+    else:
+        if default is not None:
+            raise SingleFunctionDefaultCommandError()
+        if server is None and not repl:
+            with _recording(obj, name, args, None, recurse, naming) as recorder:
+                return _start_func(
+                    obj,
+                    name,
+                    args,
+                    catch,
+                    recurse,
+                    naming,
+                    runner=runner,
+                    recorder=recorder,
+                    **options,
+                )
+
+        args_ = make_args_from_func(obj, name or "", recurse=recurse, naming=naming)
+        start_ = partial(_start_func, obj, name, catch=catch, spec=args_)
+        funcs, complete = [obj], args_.complete
+
+    # each command of a server (or REPL) runs as `start()` would run it alone
+    run = partial(
+        _run_request,
+        start_,
+        settings,
+        partial(
+            _handle_reserved,
+            obj,
+            name=name,
+            default=default,
+            recurse=recurse,
+            naming=naming,
+        ),
+        catch,
+        runner,
+    )
+    if server is not None:
+        return _serve(server, run, funcs, idle_timeout)
+
+    from ._repl import repl as repl_
+
+    return repl_(run, complete, name=name, runner=runner)
+
+
+@dataclass
+class _Settings:
+    """
+    The options of `start()` that apply to each run of a command, along with the
+    reserved options of the run.
+    """
+
+    fan_out: str | None
+    workers: int | None
+    chunk_size: int
+    item_timeout: float | None
+    ordered: bool
+    config: "str | Path | Sequence[str | Path] | None"
+    env_prefix: str | None
+    env_delimiter: str
+    stream: str | None
+    cache: "bool | Cache"
+
+    def resolve(self, reserved: dict[str, str]) -> dict[str, Any]:
+        """
+        Resolve the settings of a run, given its reserved options.
+
+        Returns:
+            The `profile`, `fan`, `shard`, `sources`, `stream` and `cache`
+            arguments of `_start_func()` (or `_start_cmds()`).
+        """
+        profile, fan, shard, sources, streaming, memo = (None,) * 6
+        if "profile" in reserved:
+            from ._profile import Profile
+
+            profile = Profile.from_reserved(
+                reserved["profile"], reserved.get("profile-out")
+            )
+        jobs = reserved.get("concurrency", reserved.get("jobs"))
+        if self.fan_out is not None or jobs is not None:
+            from ._fan_out import FanOut
+
+            option = "concurrency" if "concurrency" in reserved else "jobs"
+            fan = FanOut.from_options(
+                self.fan_out,
+                self.workers,
+                self.chunk_size,
+                jobs,
+                self.item_timeout,
+                self.ordered,
+                option,
+            )
+        from ._shard import ENV as SHARD_ENV
+
+        if spec := reserved.get("shard", os.environ.get(SHARD_ENV)):
+            from ._shard import Shard
+
+            shard = Shard.parse(spec, inherited="shard" not in reserved)
+        if (
+            self.config is not None
+            or "config" in reserved
+            or self.env_prefix is not None
+        ):
+            from ._config import Sources
+
+            sources = Sources.from_options(
+                self.config, reserved.get("config"), self.env_prefix, self.env_delimiter
+            )
+        if (format := reserved.get("stream", self.stream)) is not None:
+            from ._stream import Stream
+
+            streaming = Stream.from_options(format)
+        if self.cache is not False or "cache" in reserved:
+            from ._memo import Cache
+
+            memo = Cache.from_options(self.cache, reserved.get("cache"))
+        return {
+            "profile": profile,
+            "fan": fan,
+            "shard": shard,
+            "sources": sources,
+            "stream": streaming,
+            "cache": memo,
+        }
+
+
+def _run_request(
+    start_: Callable[..., Any],
+    settings: _Settings,
+    handle_reserved: Callable[..., tuple[list[str] | None, dict[str, str]]],
+    catch: bool,
+    default_runner: Runner | None,
+    args: list[str],
+    runner: Runner | None = None,
+) -> Any:
+    """
+    Run a command of a server (or a REPL) with its arguments, handling their
+    reserved options, and with the settings of `start()`.
+    """
+    argv, options = args, dict[str, Any]()
+    try:
+        argv, reserved = handle_reserved(args)
+        options = settings.resolve(reserved)
+    except (ParserOptionError, ParserValueError) as e:
+        if not catch:
+            raise
+        error(str(e))
+    return start_(argv, runner=runner or default_runner, **options)
+
+
+@dataclass
+class _Deferred:
     """
+    A coroutine of an async command, left for the caller to await.
+    """
+
+    coro: Coroutine[Any, Any, Any]
+
+
+async def start_async(
+    obj: "Callable[..., Any] | Funcs",
+    *,
+    name: str | None = None,
+    args: list[str] | None = None,
+    catch: bool = True,
+    default: str | None = None,
+    recurse: bool = False,
+    naming: Literal["flat", "nested"] = "flat",
+    registry: Registry | None = None,
+) -> Any:
+    """
+    Like `start()`, but awaits async functions on the running event loop, instead
+    of running them in a new one. Useful inside async applications, or notebooks.
+    Sync functions are called directly (i.e. block the loop while they run).
+
+    Args:
+        obj: The function or functions to parse the arguments for and invoke.
+            See `start()`.
+        name: The name of the program. If None, uses the name of the script.
+        args: The arguments to parse. If None, uses the arguments from the command-line.
+        catch: Whether to catch and print (startle specific) errors instead of raising.
+        default: The default subcommand. See `start()`.
+        recurse: (experimental) Whether to recursively parse objects using their
+            initializers. See `start()`.
+        naming: How to name nested arguments when `recurse` is True. See `start()`.
+        registry: The registry of parsers, metavars and completers to use.
+            See `start()`.
+    Returns:
+        The (awaited) return value of the function `obj`, or the subcommand of `obj`
+        if it is a list or dict.
+    """
+    if _IMPORTING.get():
+        raise StartRefused("`start_async()` was called while importing!")
+    if registry is not None:
+        with registry.bind():
+            return await start_async(
+                obj,
+                name=name,
+                args=args,
+                catch=catch,
+                default=default,
+                recurse=recurse,
+                naming=naming,
+            )
+
     if isinstance(obj, list) or isinstance(obj, dict):
-        obj = cast(list[Callable[..., Any]] | dict[str, Callable[..., Any]], obj)
         if recurse:
             raise CmdsRecurseError()
-        return _start_cmds(obj, name, args, catch, default)
+        result = _start_cmds(
+            cast(Funcs, obj), name, args, catch, default, runner=_Deferred
+        )
     else:
         if default is not None:
             raise SingleFunctionDefaultCommandError()
-        return _start_func(obj, name, args, catch, recurse, naming)
+        result = _start_func(obj, name, args, catch, recurse, naming, runner=_Deferred)
+
+    if isinstance(result, _Deferred):
+        return await result.coro
+    return result
+
+
+def make_parser(
+    obj: "Callable[..., Any] | Funcs",
+    name: str | None = None,
+    default: str | None = None,
+    recurse: bool = False,
+    naming: Literal["flat", "nested"] = "flat",
+) -> Args | Cmds:
+    """
+    Make the parser for a function (Args), or a list or dict of functions (Cmds),
+    as `start()` would.
+    """
+    if isinstance(obj, list) or isinstance(obj, dict):
+        if recurse:
+            raise CmdsRecurseError()
+        return make_cmds(cast(Funcs, obj), name or "", default or "")[0]
+    if default is not None:
+        raise SingleFunctionDefaultCommandError()
+    return make_args_from_func(obj, name or "", recurse=recurse, naming=naming)
+
+
+def _completing(name: str | None) -> bool:
+    """
+    Whether the program is run by a completion script to complete a command
+    line, i.e. with `_STARTLE_COMPLETE` set to its name (so that other startle
+    programs run from there, inheriting the environment, still run as usual).
+    """
+    prog = os.environ.get("_STARTLE_COMPLETE")
+    return (
+        prog is not None
+        and prog == os.path.basename(name or sys.argv[0])
+        and "COMP_LINE" in os.environ
+        and "COMP_POINT" in os.environ
+    )
+
+
+def _complete_request(
+    obj: "Callable[..., Any] | Funcs",
+    name: str | None,
+    default: str | None,
+    recurse: bool,
+    naming: Literal["flat", "nested"],
+) -> NoReturn:
+    """
+    Print the completions for the command line in `COMP_LINE` (up to the
+    cursor at `COMP_POINT`), one per line, and exit.
+    """
+    from ._completion import complete_line
+
+    line = os.environ["COMP_LINE"]
+    try:
+        line = line[: int(os.environ["COMP_POINT"])]
+    except ValueError:
+        pass
+    parser = make_parser(obj, name, default, recurse, naming)
+    for candidate in complete_line(parser, line):
+        print(candidate)
+    raise SystemExit(0)
+
+
+def _handle_reserved(
+    obj: "Callable[..., Any] | Funcs",
+    args: list[str] | None,
+    name: str | None,
+    default: str | None,
+    recurse: bool,
+    naming: Literal["flat", "nested"],
+) -> tuple[list[str] | None, dict[str, str]]:
+    """
+    Handle reserved `--startle-*` options, exiting if they take over the run.
+
+    Returns:
+        The arguments with reserved options removed (None if `args` is None and
+        there are none, so that the function(s) still read from the CLI), and
+        the reserved options that apply to the run itself (e.g. `profile`).
+    """
+    from ._reserved import pop_reserved
+
+    reserved, remaining = pop_reserved(sys.argv[1:] if args is None else args)
+    if not reserved:
+        return args, reserved
+
+    if "completion" in reserved:
+        from ._completion import completion_script, spec_hash
+
+        shell = reserved["completion"]
+        if shell == "hash":
+            parser = make_parser(obj, name, default, recurse, naming)
+            print(spec_hash(parser.completion_spec()))
+        else:
+            script = completion_script(
+                obj, shell, name=name, default=default, recurse=recurse, naming=naming
+            )
+            print(script, end="")
+        raise SystemExit(0)
+
+    if "manifest" in reserved:
+        import json
+
+        parser = make_parser(obj, name, default, recurse, naming)
+        text = json.dumps(parser.to_manifest(), indent=2) + "\n"
+        if (path := reserved["manifest"]) == "-":
+            sys.stdout.write(text)
+        else:
+            with open(path, "w") as f:
+                f.write(text)
+        raise SystemExit(0)
+
+    if "batch" in reserved:
+        from ._batch import Executor, run_batch
+        from ._reserved import positive_int
+
+        path, jobs = reserved["batch"], positive_int(reserved.get("jobs", "1"))
+        executor = cast(Executor, reserved.get("executor", "thread"))
+        try:
+            lines = sys.stdin if path == "-" else open(path)
+        except OSError as e:
+            raise BatchFileError(path, e.strerror or str(e)) from e
+        with lines:
+            raise SystemExit(
+                run_batch(
+                    obj,
+                    lines,
+                    jobs=jobs,
+                    executor=executor,
+                    name=name,
+                    default=default,
+                    recurse=recurse,
+                    naming=naming,
+                )
+            )
+    return remaining, reserved
+
+
+def _recording(
+    obj: "Callable[..., Any] | Funcs",
+    name: str | None,
+    args: list[str] | None,
+    default: str | None,
+    recurse: bool = False,
+    naming: Literal["flat", "nested"] = "flat",
+) -> "AbstractContextManager[Recorder | None]":
+    """
+    Record the invocation into the telemetry log, if `STARTLE_TELEMETRY` is set.
+    """
+    if not (path := os.environ.get("STARTLE_TELEMETRY")):
+        return nullcontext()
+
+    from ._telemetry import Recorder
+
+    argv = sys.argv[1:] if args is None else args
+    return Recorder(path, obj, name, argv, default, recurse, naming)
+
+
+def _serve(
+    address: str,
+    run: Callable[[list[str]], Any],
+    funcs: Iterable[Callable[..., Any]],
+    idle_timeout: float,
+) -> None:
+    """
+    Serve commands with `run`, watching the sources of `funcs` for changes.
+    """
+    from ._server import serve, source_files
+
+    serve(address, run, idle_timeout=idle_timeout, watch=source_files(funcs))
 
 
 def _start_func(
@@ -72,6 +650,15 @@ def _start_func(
     catch: bool = True,
     recurse: bool = False,
     naming: Literal["flat", "nested"] = "flat",
+    spec: Args | None = None,
+    runner: Runner | None = None,
+    recorder: "Recorder | None" = None,
+    profile: "Profile | None" = None,
+    fan: "FanOut | None" = None,
+    shard: "Shard | None" = None,
+    sources: "Sources | None" = None,
+    stream: "Stream | None" = None,
+    cache: "Cache | None" = None,
 ) -> T:
     """
     Given a function `func`, parse its arguments from the CLI and call it.
@@ -87,27 +674,61 @@ def _start_func(
             while "nested" means arguments are named using dot notation to indicate
             their nesting (e.g. `--foo.bar.baz`).
             Ignored if `recurse` is False.
+        spec: Pre-built Args object for `func`, if any.
+        runner: The function to run `func` with if it is async.
+            If None, uses `asyncio.run`.
+        recorder: The telemetry recorder of the invocation, if any.
+        profile: The profile to run the command under, if any.
+        fan: The fan-out to run the command with, if any.
+        shard: The shard of the input to run the command on, if any.
+        sources: The sources of values other than the CLI (e.g. config files),
+            if any.
+        stream: The streaming of the results of the command to stdout, if any.
+        cache: The cache of the results of the command, if any.
     Returns:
         The return value of the function `func`.
     """
     # first, make Args object from the function
-    args_ = make_args_from_func(func, name or "", recurse=recurse, naming=naming)
+    args_ = (
+        make_args_from_func(func, name or "", recurse=recurse, naming=naming)
+        if spec is None
+        else spec
+    )
 
     try:
         # then, parse the arguments from the CLI
-        args_.parse(args)
+        if recorder:
+            recorder.phase("parse")
+        args_.parse(args, sources.layers(args_) if sources else ())
 
         # then turn the parsed arguments into function arguments
         f_args, f_kwargs = args_.make_func_args()
+        if recorder:
+            recorder.phase("bind")
+        if shard:
+            param = fan.param if fan else None
+            f_args, f_kwargs = shard.apply(func, args_, f_args, f_kwargs, param)
 
         # finally, call the function with the arguments
-        if iscoroutinefunction(func):
-            import asyncio
-
-            return asyncio.run(func(*f_args, **f_kwargs))
+        call: Callable[[], Any]
+        if fan:
+            call = fan.bind(
+                func, args_, f_args, f_kwargs, runner, lazy=stream is not None
+            )
         else:
-            return func(*f_args, **f_kwargs)
+            call = partial(call_func, func, f_args, f_kwargs, runner)
+        if cache:
+            call = cache.bind("", func, f_args, f_kwargs, call, fan)
+        if stream:
+            call = partial(stream.run, call, runner)
+        if recorder:
+            recorder.phase("call")
+        if profile:
+            return profile.run(call)
+        return call()
     except (ParserOptionError, ParserValueError) as e:
+        if recorder:
+            recorder.phase("error")
         if catch:
             error(str(e), exit=False, endl=False)
             args_.print_help(console(), usage_only=True)
@@ -116,76 +737,177 @@ def _start_func(
             raise e
 
 
+def call_func(
+    func: Callable[..., Any],
+    f_args: list[Any],
+    f_kwargs: dict[str, Any],
+    runner: Runner | None,
+) -> Any:
+    """
+    Call `func` with the arguments, running it with `runner` if it is async.
+    """
+    if iscoroutinefunction(func):
+        if runner is None:
+            import asyncio
+
+            runner = asyncio.run
+        return runner(func(*f_args, **f_kwargs))
+    else:
+        return func(*f_args, **f_kwargs)
+
+
+def make_cmds(
+    funcs: Funcs,
+    name: str,
+    default: str = "",
+) -> tuple[Cmds, dict[str, Callable[..., Any]]]:
+    """
+    Make a (possibly nested) Cmds object from a list or dict of functions.
+    Args of each function are built lazily, only if its command is selected.
+    If `name` is empty, the name of the script is used in program names of the
+    commands.
+
+    Returns:
+        The Cmds object, and a mapping from command paths (e.g. `db migrate`)
+        to the functions.
+    """
+
+    def _normalize(name: str) -> str:
+        return name.replace("_", "-")
+
+    items: list[tuple[str, Callable[..., Any] | Funcs]] = (
+        list(funcs.items())
+        if isinstance(funcs, dict)
+        else [(func.__name__, func) for func in funcs]
+    )
+
+    # TODO: more reliable way of getting the program name
+    prog = name or sys.argv[0]
+
+    parsers: dict[str, CmdParser] = {}
+    briefs: dict[str, str] = {}
+    path2func: dict[str, Callable[..., Any]] = {}
+    for original, item in items:
+        cmd = _normalize(original)
+        if isinstance(item, list | dict):
+            group, group_funcs = make_cmds(cast(Funcs, item), f"{prog} {cmd}")
+            parsers[original] = group
+            path2func.update({
+                f"{cmd} {path}": func for path, func in group_funcs.items()
+            })
+        else:
+            parsers[original] = partial(make_args_from_func, item, f"{prog} {cmd}")
+            briefs[original] = parse_docstring(item)[0]
+            path2func[cmd] = item
+
+    cmds = Cmds(parsers, program_name=name, default=default, cmd_briefs=briefs)
+    return cmds, path2func
+
+
 def _start_cmds(
-    funcs: list[Callable[..., Any]] | dict[str, Callable[..., Any]],
+    funcs: Funcs,
     name: str | None = None,
     cli_args: list[str] | None = None,
     catch: bool = True,
     default: str | None = None,
-):
+    spec: tuple[Cmds, dict[str, Callable[..., Any]]] | None = None,
+    runner: Runner | None = None,
+    recorder: "Recorder | None" = None,
+    profile: "Profile | None" = None,
+    fan: "FanOut | None" = None,
+    shard: "Shard | None" = None,
+    sources: "Sources | None" = None,
+    stream: "Stream | None" = None,
+    cache: "Cache | None" = None,
+) -> Any:
     """
     Given a list or dict of functions, parse the command from the CLI and call it.
 
     Args:
         funcs: The functions to parse the arguments for and invoke.
+            Nested lists or dicts are treated as groups of subcommands.
         name: The name of the program. If None, uses the name of the script.
         cli_args: The arguments to parse. If None, uses the arguments from the CLI.
         catch: Whether to catch and print errors instead of raising.
         default: The default subcommand to run if no subcommand is specified immediately
             after the program name.
+        spec: Pre-built Cmds object and the mapping from command paths to
+            functions (see `make_cmds`), if any.
+        runner: The function to run the command with if it is async.
+            If None, uses `asyncio.run`.
+        recorder: The telemetry recorder of the invocation, if any.
+        profile: The profile to run the command under, if any.
+        fan: The fan-out to run the command with, if any.
+        shard: The shard of the input to run the command on, if any.
+        sources: The sources of values other than the CLI (e.g. config files),
+            if any.
+        stream: The streaming of the results of the command to stdout, if any.
+        cache: The cache of the results of the command, if any.
     """
 
-    def _normalize(name: str) -> str:
-        return name.replace("_", "-")
-
-    def cmd_prog_name(cmd_name: str) -> str:
-        # TODO: more reliable way of getting the program name
-        return f"{name or sys.argv[0]} {cmd_name}"
-
-    items: list[tuple[str, Callable[..., Any]]] = (
-        list(funcs.items())
-        if isinstance(funcs, dict)
-        else [(func.__name__, func) for func in funcs]
-    )
-    cmds = Cmds(
-        {
-            original: make_args_from_func(func, cmd_prog_name(_normalize(original)))
-            for original, func in items
-        },
-        program_name=name or "",
-        default=default or "",
+    cmds, path2func = (
+        make_cmds(funcs, name or "", default or "") if spec is None else spec
     )
 
-    cmd2func: dict[str, Callable[..., Any]] = {
-        _normalize(original): func for original, func in items
-    }
-
+    cmd_group = cmds  # the innermost command group reached so far
     args: Args | None = None
     try:
+        # first, walk down the command groups to find the command
+        if recorder:
+            recorder.phase("select")
+        path: list[str] = []
+        remaining = cli_args if cli_args is not None else sys.argv[1:]
+        while args is None:
+            cmd, parser, remaining = cmd_group.select(remaining)
+            path.append(cmd)
+            if isinstance(parser, Cmds):
+                cmd_group = parser
+            else:
+                args = parser
+
         # then, parse the arguments from the CLI
-        cmd, args, remaining = cmds.get_cmd_parser(cli_args)
-        args.parse(remaining)
+        if recorder:
+            recorder.command(path)
+            recorder.phase("parse")
+        args.parse(remaining, sources.layers(args, path) if sources else ())
 
         # then turn the parsed arguments into function arguments
         f_args, f_kwargs = args.make_func_args()
+        if recorder:
+            recorder.phase("bind")
 
         # finally, call the function with the arguments
-        func = cmd2func[cmd]
-
-        if iscoroutinefunction(func):
-            import asyncio
-
-            return asyncio.run(func(*f_args, **f_kwargs))
+        func = path2func[" ".join(path)]
+        if shard:
+            param = fan.param if fan else None
+            f_args, f_kwargs = shard.apply(func, args, f_args, f_kwargs, param)
+        call: Callable[[], Any]
+        if fan:
+            call = fan.bind(
+                func, args, f_args, f_kwargs, runner, lazy=stream is not None
+            )
         else:
-            return func(*f_args, **f_kwargs)
+            call = partial(call_func, func, f_args, f_kwargs, runner)
+        if cache:
+            command = " ".join(path)
+            call = cache.bind(command, func, f_args, f_kwargs, call, fan)
+        if stream:
+            call = partial(stream.run, call, runner)
+        if recorder:
+            recorder.phase("call")
+        if profile:
+            return profile.run(call)
+        return call()
     except (ParserOptionError, ParserValueError) as e:
+        if recorder:
+            recorder.phase("error")
         if catch:
             error(str(e), exit=False, endl=False)
             if args:  # error happened after parsing the command
                 args.print_help(console(), usage_only=True)
                 post_error(exit=False)
             else:  # error happened before parsing the command
-                cmds.print_help(console())
+                cmd_group.print_help(console())
             raise SystemExit(1) from e
         else:
             raise e
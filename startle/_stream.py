@@ -0,0 +1,174 @@
+"""
+Streaming of the results of a command to stdout, requested with
+`start(func, stream="jsonl")` or the reserved `--startle-stream FORMAT` option,
+for commands that emit many records (e.g. generator functions).
+
+- Iterators (e.g. the generators of generator functions) and async iterators
+  (e.g. of async generator functions) are written item by item, as they are
+  produced, so that memory stays constant.
+- Any other result is written as a single item, and None as nothing.
+
+Items are written in one of the formats:
+
+- `lines`: the string form of each item, per line (bytes as they are).
+- `jsonl`: each item as JSON, per line (dataclasses as objects, enums as their
+  values, and anything else not serializable as its string form).
+- `bytes`: each item as it is (strings encoded as UTF-8), without separators.
+
+Output goes through a large buffer to the binary stdout. If the reader goes away
+(e.g. `| head`), the command is stopped early (its generator closed) and the
+rest of the output is discarded, without an error.
+"""
+
+import codecs
+import json
+import os
+import sys
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import suppress
+from dataclasses import asdict, dataclass, is_dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Literal, cast
+
+from .error import UnsupportedStreamFormatError
+
+if TYPE_CHECKING:
+    from ._start import Runner
+
+Format = Literal["lines", "jsonl", "bytes"]
+
+FORMATS: tuple[Format, ...] = ("lines", "jsonl", "bytes")
+
+BUFFER_SIZE = 1 << 16  # bytes to gather before writing to stdout
+
+
+def _jsonable(value: Any) -> Any:
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, set | frozenset | tuple):
+        return list(cast(Any, value))
+    return str(value)
+
+
+def _line(item: Any) -> bytes:
+    if isinstance(item, bytes | bytearray):
+        return bytes(item) + b"\n"
+    return f"{item}\n".encode()
+
+
+def _json_line(item: Any) -> bytes:
+    return (json.dumps(item, ensure_ascii=False, default=_jsonable) + "\n").encode()
+
+
+def _raw(item: Any) -> bytes:
+    if isinstance(item, bytes | bytearray):
+        return bytes(item)
+    return str(item).encode()
+
+
+ENCODERS: dict[Format, Callable[[Any], bytes]] = {
+    "lines": _line,
+    "jsonl": _json_line,
+    "bytes": _raw,
+}
+
+
+class _Writer:
+    """
+    A buffered writer of encoded items to stdout.
+    """
+
+    def __init__(self, encode: Callable[[Any], bytes]) -> None:
+        self.encode = encode
+        self.buffer = bytearray()
+        sys.stdout.flush()  # keep the order with what is printed so far
+        self.out = getattr(sys.stdout, "buffer", None)
+        self.decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+    def write(self, item: Any) -> None:
+        self.buffer += self.encode(item)
+        if len(self.buffer) >= BUFFER_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.out is None:  # e.g. stdout replaced with a text-only stream
+            sys.stdout.write(self.decoder.decode(bytes(self.buffer)))
+            sys.stdout.flush()
+        else:
+            self.out.write(self.buffer)
+            self.out.flush()
+        self.buffer.clear()
+
+
+def _discard_stdout() -> None:
+    """
+    Point stdout at the null device, once its reader is gone, so that nothing
+    else (e.g. flushing at exit) fails on the broken pipe.
+    """
+    with suppress(OSError, ValueError):
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        os.close(devnull)
+
+
+@dataclass
+class Stream:
+    """
+    A requested streaming of the results of the command.
+    """
+
+    format: Format
+
+    @classmethod
+    def from_options(cls, format: str) -> "Stream":
+        if format not in FORMATS:
+            raise UnsupportedStreamFormatError(format, FORMATS)
+        return cls(format)
+
+    def run(self, call: Callable[[], Any], runner: "Runner | None" = None) -> Any:
+        """
+        Run `call`, and write its results to stdout as they are produced.
+        Async iterators are consumed with `runner` (or `asyncio.run`).
+        """
+        result = call()
+        writer = _Writer(ENCODERS[self.format])
+        if isinstance(result, AsyncIterator):
+            if runner is None:
+                import asyncio
+
+                runner = asyncio.run
+            return runner(_drain_async(cast(AsyncIterator[Any], result), writer))
+        if isinstance(result, Iterator):
+            return _drain(cast(Iterator[Any], result), writer)
+        if result is not None:
+            return _drain(iter([result]), writer)
+
+
+def _drain(items: Iterator[Any], writer: _Writer) -> None:
+    try:
+        try:
+            for item in items:
+                writer.write(item)
+        finally:
+            writer.flush()  # what is produced so far, even on failure
+    except BrokenPipeError:
+        _discard_stdout()
+    finally:
+        if (close := getattr(items, "close", None)) is not None:
+            close()
+
+
+async def _drain_async(items: AsyncIterator[Any], writer: _Writer) -> None:
+    try:
+        try:
+            async for item in items:
+                writer.write(item)
+        finally:
+            writer.flush()  # what is produced so far, even on failure
+    except BrokenPipeError:
+        _discard_stdout()
+    finally:
+        if (aclose := getattr(items, "aclose", None)) is not None:
+            await aclose()
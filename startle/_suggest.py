@@ -0,0 +1,166 @@
+"""
+"Did you mean" suggestions for mistyped option and command names.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from operator import add
+
+
+def _grams(name: str) -> set[str]:
+    """
+    Padded character bigrams of a name, e.g. "ab" -> {"^a", "ab", "b$"}.
+    """
+    padded = f"^{name}$"
+    return set(map(add, padded, padded[1:]))
+
+
+def _bits(mask: int) -> Iterator[int]:
+    """
+    Indices of the set bits of `mask`, highest first.
+    """
+    digits = bin(mask)
+    last = len(digits) - 1
+    i = digits.find("1", 2)
+    while i != -1:
+        yield last - i
+        i = digits.find("1", i + 1)
+
+
+def _at_least(planes: list[int], count: int) -> int:
+    """
+    Mask of the positions whose counter, kept bit-sliced in `planes` (least
+    significant first), is at least `count` (which must be positive).
+    """
+    if count >> len(planes):
+        return 0
+    greater, equal = 0, -1
+    for p in reversed(range(len(planes))):
+        if count >> p & 1:
+            equal &= planes[p]
+        else:
+            greater |= equal & planes[p]
+            equal &= ~planes[p]
+    return greater | equal
+
+
+def _distance(a: str, b: str, bound: int) -> int:
+    """
+    Optimal string alignment distance (Levenshtein with adjacent transpositions)
+    between `a` and `b`, or `bound + 1` if it exceeds `bound`.
+
+    Since the bound is tiny, this skips the common prefix and tries each edit
+    at the first mismatch, which compares slices instead of filling a table.
+    """
+    if a == b:
+        return 0
+    if not bound or abs(len(a) - len(b)) > bound:
+        return bound + 1
+    i, n = 0, min(len(a), len(b))
+    while i < n and a[i] == b[i]:
+        i += 1
+    a, b = a[i:], b[i:]
+    best = 1 + min(
+        _distance(a[1:], b[1:], bound - 1),
+        _distance(a[1:], b, bound - 1),
+        _distance(a, b[1:], bound - 1),
+    )
+    if len(a) > 1 and len(b) > 1 and a[0] == b[1] and a[1] == b[0]:
+        best = min(best, 1 + _distance(a[2:], b[2:], bound - 1))
+    return min(best, bound + 1)
+
+
+class NameIndex:
+    """
+    An n-gram index over a fixed set of names.
+
+    A name within edit distance `k` of a query shares all but at most `3k` of
+    the query's bigrams. The names containing each bigram are kept as the bits
+    of an integer (with names sorted by length, so that lengths within `k` of
+    the query are a single range of bits), so counting the bigrams shared by
+    every name at once takes a handful of bitwise operations on those integers.
+    Only the names sharing the most bigrams, within that range and above that
+    minimum, are verified with a bounded edit distance. This keeps lookups well
+    under a millisecond even for ten thousand names, which matters for large
+    (e.g. recursive, flat-named) specs.
+
+    Since suggestions are only needed when reporting an error, the index is
+    meant to be constructed lazily on that path.
+    """
+
+    def __init__(self, names: Iterable[str]) -> None:
+        self._names = sorted(dict.fromkeys(names), key=len)
+        self._lengths = [len(name) for name in self._names]
+        size = len(self._names) // 8 + 1
+        rows: dict[str, bytearray] = {}
+        for i, name in enumerate(self._names):
+            byte, bit = i >> 3, 1 << (i & 7)
+            for gram in _grams(name):
+                if (row := rows.get(gram)) is None:
+                    row = rows[gram] = bytearray(size)
+                row[byte] |= bit
+        self._postings = {
+            gram: int.from_bytes(row, "little") for gram, row in rows.items()
+        }
+
+    def suggest(self, query: str, limit: int = 3, candidates: int = 32) -> list[str]:
+        """
+        Return up to `limit` names close to `query`, closest first.
+
+        Tolerated edit distance grows with the length of the query (up to 2), but tighter
+        distances are searched first since they verify far fewer names.
+
+        Args:
+            query: The mistyped name.
+            limit: The maximum number of suggestions to return.
+            candidates: The number of best n-gram matches to verify with edit distance.
+        """
+        grams = _grams(query)
+        # how many of the query's bigrams each name shares, bit-sliced
+        planes: list[int] = []
+        for gram in grams:
+            carry = self._postings.get(gram, 0)
+            for p, plane in enumerate(planes):
+                if not carry:
+                    break
+                planes[p], carry = plane ^ carry, plane & carry
+            else:
+                if carry:
+                    planes.append(carry)
+        for bound in range(1, min(2, max(1, (len(query) + 1) // 4)) + 1):
+            if found := self._search(
+                query, len(grams), planes, bound, limit, candidates
+            ):
+                return found
+        return []
+
+    def _search(
+        self,
+        query: str,
+        size: int,
+        planes: list[int],
+        bound: int,
+        limit: int,
+        candidates: int,
+    ) -> list[str]:
+        lo = bisect_left(self._lengths, len(query) - bound)
+        hi = bisect_right(self._lengths, len(query) + bound)
+        left = (1 << hi) - (1 << lo)
+
+        # the names sharing the most bigrams first, down to the minimum
+        matches: list[tuple[int, int]] = []
+        for shared in range(size, max(1, size - 3 * bound) - 1, -1):
+            mask = _at_least(planes, shared) & left
+            left &= ~mask
+            matches.extend((shared, i) for i in _bits(mask))
+            if len(matches) >= candidates:
+                break
+
+        scored: list[tuple[int, int, str]] = []
+        for shared, i in matches[:candidates]:
+            name = self._names[i]
+            dist = _distance(query, name, bound)
+            if dist <= bound:
+                scored.append((dist, -shared, name))
+        scored.sort()
+        return [name for _, _, name in scored[:limit]]
@@ -0,0 +1,174 @@
+"""
+Opt-in telemetry: when `STARTLE_TELEMETRY` is set to a file path, `start()`
+appends a JSON line to it per invocation, with the command path, the shape of
+the arguments (option names and counts, but no values unless
+`STARTLE_TELEMETRY_VALUES` is set), the timings of each phase, the peak RSS
+and the exit status.
+
+Records refer to the function(s) as `module:qualname`, so that they can be
+re-parsed offline against the current code with `python -m startle.replay`.
+"""
+
+import os
+import sys
+import time
+from types import TracebackType
+from typing import Any, Literal, cast
+
+ENV = "STARTLE_TELEMETRY"
+ENV_VALUES = "STARTLE_TELEMETRY_VALUES"
+
+VERSION = 1
+
+
+def target(obj: Any) -> Any:
+    """
+    Refer to a function as `module:qualname`, or to a (possibly nested) list or
+    dict of functions as a dict from command names to such references.
+    """
+    if isinstance(obj, dict):
+        items = cast(dict[str, Any], obj).items()
+        return {name: target(item) for name, item in items}
+    if isinstance(obj, list):
+        return {func.__name__: target(func) for func in cast(list[Any], obj)}
+    qualname = getattr(obj, "__qualname__", type(obj).__qualname__)
+    module = obj.__module__
+    if module == "__main__":
+        # run with `python -m`, the module can be imported by its actual name
+        spec = getattr(sys.modules.get("__main__"), "__spec__", None)
+        module = getattr(spec, "name", None) or module
+    return f"{module}:{qualname}"
+
+
+def argv_shape(argv: list[str]) -> dict[str, Any]:
+    """
+    Describe the arguments without their values: how many times each option
+    (or flag) is given, and how many other arguments there are.
+    """
+    options: dict[str, int] = {}
+    positionals = 0
+    for i, arg in enumerate(argv):
+        if arg == "--":
+            positionals += len(argv) - i - 1
+            break
+        if arg.startswith("-") and len(arg) > 1 and not _is_number(arg):
+            name = arg.partition("=")[0]
+            options[name] = options.get(name, 0) + 1
+        else:
+            positionals += 1  # includes option values, which are not told apart
+    return {"options": options, "positionals": positionals}
+
+
+def _is_number(arg: str) -> bool:
+    try:
+        float(arg)
+    except ValueError:
+        return False
+    return True
+
+
+def peak_rss_kb() -> int | None:
+    """
+    Peak resident set size of the process in KiB, or None if unavailable.
+    """
+    try:
+        import resource
+    except ImportError:  # e.g. on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # bytes on macOS
+
+
+def _status(exc: BaseException | None) -> int:
+    if exc is None:
+        return 0
+    if isinstance(exc, SystemExit):
+        code = exc.code
+        return code if isinstance(code, int) else 0 if code is None else 1
+    return 1
+
+
+class Recorder:
+    """
+    Collects the record of an invocation, and appends it to the telemetry log
+    when used as a context manager around it.
+
+    Phases are consecutive: starting one ends the previous one, and the last
+    one ends with the invocation. So the phases in a record also tell how far
+    the invocation got (e.g. no `call` phase if parsing failed).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        obj: Any,
+        name: str | None,
+        argv: list[str],
+        default: str | None = None,
+        recurse: bool = False,
+        naming: Literal["flat", "nested"] = "flat",
+    ) -> None:
+        self.path = path
+        self.record: dict[str, Any] = {
+            "version": VERSION,
+            "time": time.time(),
+            "program": name or os.path.basename(sys.argv[0]),
+            "target": target(obj),
+            "main": getattr(sys.modules.get("__main__"), "__file__", None),
+            "options": {"default": default, "recurse": recurse, "naming": naming},
+            "command": None,
+            "argv": argv_shape(argv),
+            "phases": {},
+        }
+        if os.environ.get(ENV_VALUES):
+            self.record["args"] = argv
+        self._phase: str | None = None
+        self._since = 0.0
+
+    def phase(self, name: str) -> None:
+        """
+        End the current phase (if any) and start the phase `name`.
+        """
+        now = time.perf_counter()
+        if self._phase is not None:
+            self.record["phases"][self._phase] = now - self._since
+        self._phase, self._since = name, now
+
+    def command(self, path: list[str]) -> None:
+        self.record["command"] = " ".join(path)
+
+    def __enter__(self) -> "Recorder":
+        self.phase("build")
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> Literal[False]:
+        self.phase("")
+        self.record["phases"].pop("", None)
+        self.record["peak_rss_kb"] = peak_rss_kb()
+        self.record["status"] = _status(exc)
+        if exc is not None and not isinstance(exc, SystemExit):
+            self.record["error"] = type(exc).__name__
+        self.write()
+        return False
+
+    def write(self) -> None:
+        """
+        Append the record to the log, as a single write so that concurrent
+        invocations do not interleave. Failures are never fatal.
+        """
+        import json
+
+        line = json.dumps(self.record, default=str) + "\n"
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode())
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
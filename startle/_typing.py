@@ -38,6 +38,13 @@ def strip_optional(type_: TypeHint) -> TypeHint:
     return type_
 
 
+def make_optional(type_: TypeHint) -> TypeHint:
+    """
+    Given T, return Optional[T].
+    """
+    return Optional[type_]  # type: ignore
+
+
 def _strip_unary_outer(type_: TypeHint, outer: Any) -> tuple[bool, TypeHint]:
     """
     Strip a unary outer type from a type hint. If given outer[T], return (True, T).
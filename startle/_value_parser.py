@@ -2,7 +2,7 @@
 String-to-type conversion functions.
 """
 
-from collections.abc import Callable
+from collections.abc import Callable, Mapping
 from enum import Enum
 from inspect import isclass
 from pathlib import Path
@@ -68,9 +68,12 @@ PARSERS: dict[Any, Callable[[str], Any]] = {
 }
 
 
-def _get_parser(type_: Any) -> Callable[[str], Any] | None:
+def get_parser(
+    type_: Any, parsers: Mapping[Any, Callable[[str], Any]] = PARSERS
+) -> Callable[[str], Any] | None:
     """
-    Get the parser function for a given type.
+    Get the parser function for a given type, among `parsers` (by default,
+    those of the global registry) and the built-in ones for enums and literals.
     """
 
     # if type is Optional[T], convert to T
@@ -91,17 +94,19 @@ def _get_parser(type_: Any) -> Callable[[str], Any] | None:
     if isclass(type_) and issubclass(type_, Enum):
         return lambda value: _to_enum(value, type_)
 
-    if fp := PARSERS.get(type_):
+    if fp := parsers.get(type_):
         return fp
 
     return None
 
 
-def parse(value: str, type_: Any) -> Any:
+def parse(
+    value: str, type_: Any, parsers: Mapping[Any, Callable[[str], Any]] = PARSERS
+) -> Any:
     """
     Parse or convert a string value to a given type.
     """
-    if parser := _get_parser(type_):
+    if parser := get_parser(type_, parsers):
         return parser(value)
 
     # otherwise it is unsupported
@@ -110,6 +115,14 @@ def parse(value: str, type_: Any) -> Any:
 
 def is_parsable(type_: Any) -> bool:
     """
-    Check if a type is parsable (supported).
+    Check if a type is parsable (supported) by the global registry.
     """
-    return _get_parser(type_) is not None
+    return get_parser(type_) is not None
+
+
+def as_str(value: Any) -> str:
+    """
+    The string form of an already typed value, as it would be given on the
+    command line (e.g. `true` for True).
+    """
+    return ("true" if value else "false") if isinstance(value, bool) else str(value)
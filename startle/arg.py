@@ -1,16 +1,16 @@
 from collections.abc import Callable, Sequence, Set
-from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, cast
 
-from ._metavar import get_metavar
-from ._value_parser import parse
+from ._registry import Completer, Registry, current
+from ._value_parser import as_str, parse
 from .error import ArgumentKindError, UnsupportedContainerTypeError
 
 if TYPE_CHECKING:
     from .args import Args
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Name:
     """
     Name of a command-line argument.
@@ -28,7 +28,7 @@ class Name:
         return self.long_or_short
 
 
-@dataclass
+@dataclass(slots=True)
 class Arg:
     """
     Represents a command-line argument.
@@ -67,8 +67,15 @@ class Arg:
 
     args: "Args | None" = None
 
-    _parsed: bool = False  # if this is already parsed
-    _value: Any = None  # the parsed value
+    # registry snapshot the argument is built with, and its converter from it
+    _registry: Registry = field(init=False, repr=False, compare=False)
+    _parser: Callable[[str], Any] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    # parsing state, kept out of the spec (i.e. the initializer, repr and equality)
+    _parsed: bool = field(default=False, init=False, repr=False, compare=False)
+    _value: Any = field(default=None, init=False, repr=False, compare=False)
 
     @property
     def is_flag(self) -> bool:
@@ -82,11 +89,29 @@ class Arg:
     def value(self) -> Any:
         return self._value
 
+    @property
+    def completer(self) -> Completer | None:
+        """
+        The completer registered for the type of the argument, if any.
+        """
+        return self._registry.completer_for(self.type_)
+
     def __post_init__(self):
         if not self.is_positional and not self.is_named:
             raise ArgumentKindError()
+        self._registry = current()
+        self._parser = self._registry.parser_for(self.type_)
         if not self.metavar:
-            self.metavar = get_metavar(self.type_)
+            self.metavar = self._registry.metavar_for(self.type_)
+
+    def convert(self, value: str) -> Any:
+        """
+        Convert a single value (an element, for n-ary arguments) to the type of
+        the argument.
+        """
+        if self._parser is None:  # unsupported, raise as `parse()` does
+            return parse(value, self.type_, self._registry.parsers)
+        return self._parser(value)
 
     def _append(
         self, container: Sequence[Any] | Set[Any], value: Any
@@ -120,8 +145,31 @@ class Arg:
             assert self.container_type is not None, "Programming error!"
             if self._value is None:
                 self._value = self.container_type()
-            self._value = self._append(self._value, parse(value, self.type_))
+            self._value = self._append(self._value, self.convert(value))
         else:
             assert value is not None, "Non-flag options should have values!"
-            self._value = parse(value, self.type_)
+            self._value = self.convert(value)
+        self._parsed = True
+
+    def assign(self, value: Any) -> None:
+        """
+        Parse a value from a source other than the command line (e.g. a config
+        file), where it may already be typed: a bool for a flag, or a list of
+        elements for an n-ary argument. Values are converted from their string
+        form, as if given on the command line.
+        """
+        if self.is_flag:
+            self._value = parse(as_str(value), bool, self._registry.parsers)
+            self._parsed = True
+            return
+        if not self.is_nary:
+            self.parse(as_str(value))
+            return
+        assert self.container_type is not None, "Programming error!"
+        self._value = self.container_type()
         self._parsed = True
+        values = cast(
+            Sequence[Any], value if isinstance(value, list | tuple) else [value]
+        )
+        for element in values:
+            self.parse(as_str(element))
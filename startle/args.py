@@ -1,17 +1,9 @@
 import sys
-from collections.abc import Iterable
+from collections.abc import Iterable, Mapping, Sequence
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, Any, Literal
-
-from ._help import (
-    Sty,
-    help,
-    usage,
-    var_args_usage_line,
-    var_kwargs_usage_line,
-    wrap_usage,
-)
-from .arg import Arg, Name
+from typing import TYPE_CHECKING, Any, Literal, NoReturn
+
+from .arg import Arg
 from .error import (
     BranchWithValueError,
     DuplicateOptionError,
@@ -23,6 +15,7 @@ from .error import (
     MissingOptionValueError,
     MissingRequiredOptionError,
     MissingRequiredPositionalArgumentError,
+    NoChoicesError,
     NonFlagInShortNameCombinationError,
     UnexpectedOptionError,
     UnexpectedPositionalArgumentError,
@@ -31,6 +24,9 @@ from .error import (
 if TYPE_CHECKING:
     from rich.console import Console
 
+    from ._ansi import Styled
+    from ._suggest import NameIndex
+
 
 @dataclass
 class _ParsingState:
@@ -47,6 +43,30 @@ class _ParsingState:
     positional_only: bool = False
 
 
+@dataclass
+class PartialParse:
+    """
+    The state after (tolerantly) parsing a partial command line, e.g. to
+    suggest what can come next. See `Args.parse_partial()`.
+
+    Attributes:
+        used: Named arguments given so far.
+        positional_count: Number of positional arguments given so far.
+        pending: The option whose value is expected next, if any.
+        nary: The n-ary option or positional argument being given values, if
+            any. More of its values can follow.
+        next_positional: The positional argument to be given next, if any.
+        positional_only: Whether `--` is given, after which everything is positional.
+    """
+
+    used: list[Arg] = field(default_factory=list[Arg])
+    positional_count: int = 0
+    pending: Arg | None = None
+    nary: Arg | None = None
+    next_positional: Arg | None = None
+    positional_only: bool = False
+
+
 class Missing:
     """
     A sentinel class to represent a missing value.
@@ -58,7 +78,7 @@ class Missing:
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Args:
     """
     A parser class to parse command-line arguments.
@@ -77,6 +97,26 @@ class Args:
     _var_args: Arg | None = None  # remaining unk args for functions with *args
     _var_kwargs: Arg | None = None  # remaining unk options for functions with **kwargs
     _parent: "Args | None" = None  # parent Args instance
+    # built lazily, only when suggesting, and kept out of the spec
+    _name_index: "NameIndex | None" = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _unknown_opts: dict[str, Any] = field(default_factory=dict[str, Any])
+    # values of unknown options (from var kwargs) by name, stored without Args
+    _unique_args: list[Arg] | None = field(default=None, repr=False, compare=False)
+    _kwarg_names: list[tuple[str, Arg]] | None = field(
+        default=None, repr=False, compare=False
+    )
+    _source_keys: dict[str, Arg] | None = field(default=None, repr=False, compare=False)
+    _env_keys: tuple[str, dict[str, Arg]] | None = field(
+        default=None, repr=False, compare=False
+    )
+    _child_args: list["tuple[Arg, Args]"] | None = field(
+        default=None, repr=False, compare=False
+    )
+    # caches of `_args` and of the keyword argument names of named-only options
+    # (see `make_func_args`), of `_source_index`, of `_env_index` and of
+    # `_children`, reset whenever an argument is added
 
     @property
     def _args(self) -> list[Arg]:
@@ -84,22 +124,24 @@ class Args:
         Uniquely listed arguments. Note that an argument can be both positional and named,
         hence be in both lists.
         """
-        seen = set[int]()
-        unique_args: list[Arg] = []
-        for arg in self._positional_args + self._named_args:
-            if id(arg) not in seen:
-                unique_args.append(arg)
-                seen.add(id(arg))
-        return unique_args
+        if self._unique_args is None:
+            seen = set[int]()
+            unique_args: list[Arg] = []
+            for arg in self._positional_args + self._named_args:
+                if id(arg) not in seen:
+                    unique_args.append(arg)
+                    seen.add(id(arg))
+            self._unique_args = unique_args
+        return self._unique_args
 
     @property
-    def _children(self) -> Iterable["tuple[Arg, Args]"]:
+    def _children(self) -> list["tuple[Arg, Args]"]:
         """
-        Yield all child Args instances. Only relevant when parsing recursively.
+        All child Args instances. Only relevant when parsing recursively.
         """
-        for arg in self._args:
-            if arg.args:
-                yield arg, arg.args
+        if self._child_args is None:
+            self._child_args = [(arg, arg.args) for arg in self._args if arg.args]
+        return self._child_args
 
     def _any_parsed_leaf(self) -> bool:
         """
@@ -160,10 +202,35 @@ class Args:
                 return result
         return None
 
+    def _long_names(self) -> Iterable[str]:
+        """
+        Yield long names of all named arguments among self and the children.
+        """
+        for arg in self._named_args:
+            if arg.name.long:
+                yield arg.name.long
+        for _, child_args in self._children:
+            yield from child_args._long_names()
+
+    def _suggest(self, name: str) -> list[str]:
+        """
+        Suggest known option names close to a mistyped `name`.
+        The underlying index is built on first use, so that successful parses
+        do not pay for it.
+        """
+        if self._name_index is None:
+            from ._suggest import NameIndex
+
+            self._name_index = NameIndex(self._long_names())
+        query = name.split("=", 1)[0].replace("_", "-")
+        return [f"--{s}" for s in self._name_index.suggest(query)]
+
     def add(self, arg: Arg):
         """
         Add an argument to the parser.
         """
+        self._unique_args = self._kwarg_names = self._source_keys = None
+        self._env_keys = self._child_args = None
         if arg.is_positional:  # positional argument
             self._positional_args.append(arg)
         if arg.is_named:  # named argument
@@ -187,13 +254,64 @@ class Args:
     def enable_unknown_opts(self, arg: Arg) -> None:
         """
         Enable variadic keyword arguments for parsing unknown named options.
-        This Arg itself is not used to store anything, it is used as a reference to generate
-        Arg objects as needed on the fly.
+        This Arg itself is not used to store anything, it is used as a reference for
+        how to parse the values of unknown options (see `_parse_unknown_opt`).
         """
         if arg.is_nary and arg.container_type is None:
             raise MissingContainerTypeError()
         self._var_kwargs = arg
 
+    def _parse_unknown_opt(
+        self, name: str, args: list[str], state: _ParsingState, value: str | None
+    ) -> _ParsingState:
+        """
+        Parse an unknown option as the var kwargs Arg describes, storing its
+        value(s) in `_unknown_opts` rather than creating an Arg for it, so that
+        many ad-hoc options stay cheap. `value` is given for the equals syntax.
+        Return new index after consuming the argument (and its values).
+        """
+        assert self._var_kwargs is not None, "Programming error!"
+        nary = self._var_kwargs.is_nary
+        if name in self._unknown_opts and not nary:
+            raise DuplicateOptionError(name)
+
+        state.idx += 1
+        if value is not None:
+            values = [value]
+        elif nary:
+            start = state.idx
+            while state.idx < len(args) and self._is_name(args[state.idx]) is False:
+                state.idx += 1
+            values = args[start : state.idx]
+        else:
+            values = args[state.idx : state.idx + 1]
+            state.idx += 1
+        if not values:
+            raise MissingOptionValueError(name)
+
+        convert = self._var_kwargs.convert
+        if nary:
+            self._unknown_opts.setdefault(name, []).extend(map(convert, values))
+        else:
+            self._unknown_opts[name] = convert(values[0])
+        return state
+
+    def _reset(self) -> None:
+        """
+        Reset the parsing state of self and the children, so that the same
+        parser can be used to parse again. Unknown options (from var kwargs) of
+        a previous parse are forgotten.
+        """
+        for arg in self._args:
+            arg._parsed = False  # type: ignore
+            arg._value = None  # type: ignore
+            if arg.args:
+                arg.args._reset()
+        if self._var_args:
+            self._var_args._parsed = False  # type: ignore
+            self._var_args._value = None  # type: ignore
+        self._unknown_opts.clear()
+
     def _parse_equals_syntax(self, name: str, state: _ParsingState) -> _ParsingState:
         """
         Parse a cli argument as a named argument using the equals syntax (e.g. `--name=value`).
@@ -205,17 +323,8 @@ class Args:
         normal_name = name.replace("_", "-")
         if normal_name not in self._name2idx:
             if self._var_kwargs:
-                self.add(
-                    Arg(
-                        name=Name(long=normal_name),  # does long always work?
-                        type_=self._var_kwargs.type_,
-                        container_type=self._var_kwargs.container_type,
-                        is_named=True,
-                        is_nary=self._var_kwargs.is_nary,
-                    )
-                )
-            else:
-                raise UnexpectedOptionError(name)
+                return self._parse_unknown_opt(normal_name, [], state, value)
+            raise UnexpectedOptionError(name)
         opt = self._named_args[self._name2idx[normal_name]]
         if opt.args is not None:
             raise BranchWithValueError(str(opt.name))
@@ -296,6 +405,8 @@ class Args:
         if name in ["help", "?"]:
             self.print_help()
             raise SystemExit(0)
+        if name.partition("=")[0] == "help-choices":
+            self._print_choices(name, args, state)
 
         for _, child_args in self._children:
             try:
@@ -308,18 +419,8 @@ class Args:
         normal_name = name.replace("_", "-")
         if normal_name not in self._name2idx:
             if self._var_kwargs:
-                assert self._var_kwargs.type_ is not None
-                self.add(
-                    Arg(
-                        name=Name(long=normal_name),  # does long always work?
-                        type_=self._var_kwargs.type_,
-                        container_type=self._var_kwargs.container_type,
-                        is_named=True,
-                        is_nary=self._var_kwargs.is_nary,
-                    )
-                )
-            else:
-                raise UnexpectedOptionError(name)
+                return self._parse_unknown_opt(normal_name, args, state, None)
+            raise UnexpectedOptionError(name)
         opt = self._named_args[self._name2idx[normal_name]]
         if opt.args is not None:
             raise BranchWithValueError(str(opt.name))
@@ -350,6 +451,30 @@ class Args:
         state.idx += 2
         return state
 
+    def _print_choices(
+        self, name: str, args: list[str], state: _ParsingState
+    ) -> NoReturn:
+        """
+        Print all choices of the option named by `--help-choices <option>`.
+        """
+        _, eq, target = name.partition("=")
+        if not eq:
+            if state.idx + 1 >= len(args):
+                raise MissingOptionValueError("help-choices")
+            target = args[state.idx + 1]
+        target = target.lstrip("-").replace("_", "-")
+        for _, arg in self._help_rows():
+            if target and target in (arg.name.long, arg.name.short):
+                break
+        else:
+            raise UnexpectedOptionError(target)
+        if not isinstance(arg.metavar, list):
+            raise NoChoicesError(str(arg.name))
+        from ._ansi import write_text
+
+        write_text("".join(f"{choice}\n" for choice in arg.metavar))
+        raise SystemExit(0)
+
     def _parse_positional(self, args: list[str], state: _ParsingState) -> _ParsingState:
         """
         Parse a cli argument as a positional argument.
@@ -414,7 +539,7 @@ class Args:
         # check that all required args are given first, before assigning any
         # defaults; this keeps `is_parsed` a reliable "user-provided" signal for
         # callers that catch the raise (see `_any_parsed_leaf`).
-        for arg in self._positional_args + self._named_args:
+        for arg in self._args:
             if not arg.is_parsed and arg.required:
                 if arg.is_named:
                     # if a positional arg is also named, prefer this type of error message
@@ -423,12 +548,15 @@ class Args:
                     raise MissingRequiredPositionalArgumentError(str(arg.name))
 
         # assign defaults to any unparsed optional args
-        for arg in self._positional_args + self._named_args:
+        for arg in self._args:
             if not arg.is_parsed:
                 arg._value = arg.default  # type: ignore
                 arg._parsed = True  # type: ignore
 
-    def _parse(self, args: list[str]):
+    def _parse(
+        self, args: list[str], sources: Sequence[Mapping[str, Any]] = ()
+    ) -> None:
+        self._reset()
         state = _ParsingState()
 
         while state.idx < len(args):
@@ -450,13 +578,249 @@ class Args:
                             self._var_args.parse(args[state.idx])
                             state.idx += 1
                         else:
-                            raise e
+                            raise UnexpectedOptionError(
+                                e.name, self._suggest(e.name)
+                            ) from None
             else:
                 # this must be a positional argument
                 state = self._parse_positional(args, state)
 
+        if sources:
+            self._apply_sources(sources)
         self._check_completion()
 
+    def _source_index(self) -> dict[str, Arg]:
+        """
+        Map the keys of sources other than the command line (see `parse()`) to
+        leaf arguments: their long names, and their dotted paths through the
+        recursively parsed arguments (e.g. `model.optimizer.lr`).
+        """
+        if self._source_keys is None:
+            index: dict[str, Arg] = {}
+
+            def visit(args: Args, path: str) -> None:
+                for arg in args._args:
+                    last = arg.name.long.rpartition(".")[2]
+                    if arg.args is not None:
+                        visit(arg.args, f"{path}{last}.")
+                    elif last:
+                        index.setdefault(arg.name.long, arg)
+                        index.setdefault(path + last, arg)
+
+            visit(self, "")
+            self._source_keys = index
+        return self._source_keys
+
+    def _env_index(self, prefix: str) -> dict[str, Arg]:
+        """
+        Map the names of environment variables to leaf arguments: the keys of
+        `_source_index()` in upper case, with dashes and dots as underscores,
+        after `prefix` (e.g. `APP_MODEL_LR` for `model.lr`, and `APP_LR` for
+        `lr` with flat naming).
+        """
+        if self._env_keys is None or self._env_keys[0] != prefix:
+            index: dict[str, Arg] = {}
+            for key, arg in self._source_index().items():
+                name = prefix + key.upper().replace("-", "_").replace(".", "_")
+                index.setdefault(name, arg)
+            self._env_keys = (prefix, index)
+        return self._env_keys[1]
+
+    def _apply_sources(self, sources: Sequence[Mapping[str, Any]]) -> None:
+        """
+        Assign the arguments not given on the command line from the sources,
+        the last one that has a value taking precedence.
+        """
+        index = self._source_index()
+        for source in reversed(sources):
+            for key, value in source.items():
+                arg = index.get(key.replace("_", "-"))
+                if arg is not None and not arg.is_parsed:
+                    arg.assign(value)
+
+    def _positional_leaves(self) -> list[Arg]:
+        positional_only, positional_and_named, _ = self._traverse_args()
+        return positional_only + positional_and_named
+
+    def parse_partial(self, args: list[str]) -> PartialParse:
+        """
+        Parse a partial command line, e.g. one being typed, to find out what
+        can come next. Unlike `parse()`, this never raises, does not parse the
+        values, and does not change the state of the parser: unknown options and
+        excess positional arguments are ignored, and incomplete input is fine.
+
+        Args:
+            args: The (complete) arguments so far.
+        Returns:
+            The state after the arguments. See `PartialParse`.
+        """
+        state = PartialParse()
+        slots = self._positional_leaves()
+        slot_idx = 0
+        used: set[int] = set()  # ids, as Args compare by value
+
+        for arg in args:
+            if state.pending is not None:
+                state.pending = None  # consumed as its value
+                continue
+            if not state.positional_only and arg == "--":
+                state.positional_only = True
+                state.nary = None
+                continue
+            if not state.positional_only and arg.startswith("-") and arg != "-":
+                state.nary = None
+                names = self._is_combined_short_names(arg)
+                candidates = list(names) if names else [arg.lstrip("-")]
+                opts = [
+                    self._find_arg_by_name(name.split("=", 1)[0].replace("_", "-"))
+                    for name in candidates
+                ]
+                for opt in opts:
+                    if opt is not None and id(opt) not in used:
+                        state.used.append(opt)
+                        used.add(id(opt))
+                last = opts[-1]
+                if last is not None and not last.is_flag and "=" not in arg:
+                    if last.is_nary:
+                        state.nary = last
+                    else:
+                        state.pending = last
+                continue
+            if state.nary is not None:
+                continue  # another value of the n-ary argument
+
+            state.positional_count += 1
+            # skip over positional slots already given as options, like `parse()`
+            while slot_idx < len(slots) and id(slots[slot_idx]) in used:
+                slot_idx += 1
+            if slot_idx < len(slots):
+                if slots[slot_idx].is_nary:
+                    state.nary = slots[slot_idx]
+                slot_idx += 1
+
+        while slot_idx < len(slots) and id(slots[slot_idx]) in used:
+            slot_idx += 1
+        state.next_positional = (
+            slots[slot_idx] if slot_idx < len(slots) else self._var_args
+        )
+        return state
+
+    def complete(self, words: list[str], text: str) -> list[str]:
+        """
+        Suggest completions for `text`, given the preceding `words` of the
+        command line (excluding the program name): the values of an option
+        (also as `--opt=value`), names of the options not given yet, or the
+        values of the next positional argument.
+
+        Values are completed from choices (e.g. of `Literal` or `Enum` types),
+        as paths for `Path` types, or with completers registered for the type
+        (see `startle.register()`).
+        """
+        from ._completion import complete_value
+
+        state = self.parse_partial(words)
+        if state.pending is not None:
+            return complete_value(state.pending, text)
+
+        if not state.positional_only and text.startswith("-"):
+            name, eq, value = text.partition("=")
+            if eq:
+                opt = self._find_arg_by_name(name.lstrip("-").replace("_", "-"))
+                if opt is None or opt.is_flag:
+                    return []
+                return [f"{name}={v}" for v in complete_value(opt, value)]
+
+            used = {id(arg) for arg in state.used}
+            _, positional_and_named, named_only = self._traverse_args()
+            names = [
+                f"--{arg.name.long}"
+                for arg in positional_and_named + named_only
+                if arg.name.long and (arg.is_nary or id(arg) not in used)
+            ]
+            return sorted(n for n in [*names, "--help"] if n.startswith(text))
+
+        arg = state.nary or state.next_positional
+        return complete_value(arg, text) if arg is not None else []
+
+    def completion_spec(self) -> dict[str, Any]:
+        """
+        Describe the options and positional arguments, and how their values are
+        completed, as a JSON-serializable dict. Used to generate static shell
+        completion scripts (see `startle.completion_script()`).
+
+        How values are completed is one of: a list of choices, `"path"` for
+        paths, or None for free text.
+        """
+        from ._completion import value_completion
+
+        positional_only, positional_and_named, named_only = self._traverse_args()
+
+        options: list[dict[str, Any]] = []
+        for arg in positional_and_named + named_only:
+            names = [f"--{arg.name.long}"] if arg.name.long else []
+            names += [f"-{arg.name.short}"] if arg.name.short else []
+            value = (
+                None
+                if arg.is_flag
+                else {"nary": arg.is_nary, "complete": value_completion(arg)}
+            )
+            options.append({"names": names, "value": value})
+        options.append({"names": ["--help"], "value": None})
+
+        positionals: list[list[str] | str | None] = []
+        rest = value_completion(self._var_args) if self._var_args else None
+        for arg in positional_only + positional_and_named:
+            if arg.is_nary:  # consumes all the remaining positional arguments
+                rest = value_completion(arg)
+                break
+            positionals.append(value_completion(arg))
+
+        return {"options": options, "positionals": positionals, "rest": rest}
+
+    def _manifest_order(self) -> list[Arg]:
+        """
+        Arguments in an order that, when added one by one, reproduces both the
+        positional and the named arguments.
+        """
+        positional, named = self._positional_args, self._named_args
+        order: list[Arg] = []
+        i = j = 0
+        while i < len(positional) or j < len(named):
+            if i < len(positional) and not positional[i].is_named:
+                order.append(positional[i])
+                i += 1
+            elif j < len(named) and not named[j].is_positional:
+                order.append(named[j])
+                j += 1
+            else:
+                assert positional[i] is named[j], "Programming error!"
+                order.append(positional[i])
+                i, j = i + 1, j + 1
+        return order
+
+    def to_manifest(self) -> dict[str, Any]:
+        """
+        Describe the full parser spec as a versioned, JSON-serializable dict,
+        from which `startle.load_manifest()` constructs an equivalent parser.
+        """
+        from ._manifest import VERSION, encode_arg
+
+        def encode(arg: Arg) -> dict[str, Any]:
+            data = encode_arg(arg)
+            if arg.args is not None:
+                data["args"] = arg.args.to_manifest()
+            return data
+
+        return {
+            "version": VERSION,
+            "kind": "args",
+            "brief": self.brief,
+            "program_name": self.program_name,
+            "args": [encode(arg) for arg in self._manifest_order()],
+            "var_args": encode_arg(self._var_args) if self._var_args else None,
+            "var_kwargs": encode_arg(self._var_kwargs) if self._var_kwargs else None,
+        }
+
     def make_func_args(self) -> tuple[list[Any], dict[str, Any]]:
         """
         Transform parsed arguments into function arguments.
@@ -468,15 +832,30 @@ class Args:
         is preferred, to handle variadic args correctly.
         """
 
-        def var(opt: Arg) -> str:
-            return opt.name.long_or_short.replace("-", "_").split(".")[-1]
+        def var(name: str) -> str:
+            return name.replace("-", "_").split(".")[-1]
+
+        if self._kwarg_names is None:
+            self._kwarg_names = [
+                (var(opt.name.long_or_short), opt)
+                for opt in self._named_args
+                if not opt.is_positional
+            ]
 
         positional_args = [arg.value for arg in self._positional_args]
         named_args = {
-            var(opt): opt.value
-            for opt in self._named_args
-            if opt not in self._positional_args and opt.value is not Missing
+            name: opt.value
+            for name, opt in self._kwarg_names
+            if opt.value is not Missing
         }
+        if self._unknown_opts:
+            assert self._var_kwargs is not None, "Programming error!"
+            container = self._var_kwargs.container_type
+            for name, value in self._unknown_opts.items():
+                if container is None or container is list:
+                    named_args[var(name)] = value
+                else:  # nary values are collected into a list while parsing
+                    named_args[var(name)] = container(value)
 
         if not self._parent and self._var_args and self._var_args.value:
             # Append variadic positional arguments to the end of positional args.
@@ -486,19 +865,29 @@ class Args:
 
         return positional_args, named_args
 
-    def parse(self, cli_args: list[str] | None = None) -> "Args":
+    def parse(
+        self,
+        cli_args: list[str] | None = None,
+        sources: Sequence[Mapping[str, Any]] = (),
+    ) -> "Args":
         """
         Parse the command-line arguments.
 
         Args:
             cli_args: The arguments to parse. If None, uses the arguments from the CLI.
+            sources: Other sources of values (e.g. config files), in increasing
+                order of precedence, as mappings from option names (or dotted
+                paths of recursively parsed arguments, e.g. `model.lr`) to values.
+                Arguments not given on the command line take their values from
+                them, converted as if given on the command line, before falling
+                back to their defaults. Keys that match no argument are ignored.
         Returns:
             Self, for chaining.
         """
         if cli_args is not None:
-            self._parse(cli_args)
+            self._parse(cli_args, sources)
         else:
-            self._parse(sys.argv[1:])
+            self._parse(sys.argv[1:], sources)
         return self
 
     def _traverse_args(self) -> tuple[list[Arg], list[Arg], list[Arg]]:
@@ -545,26 +934,34 @@ class Args:
         Print the help message to the console.
 
         Args:
-            console: A rich console to print to. If None, uses the default console.
+            console: A rich console to print to. If None, renders plain (or ANSI
+                colored) text to stdout without `rich`, reusing cached help
+                for the same spec, terminal width and color mode if available.
             usage_only: Whether to print only the usage line.
         """
-        import sys
+        if self._parent:
+            # only the top-level Args can print help
+            return self._parent.print_help(console, usage_only)
+
+        if console is None:
+            from ._ansi import write_help
+
+            return write_help(
+                self._help_key(usage_only),
+                lambda width: self._format_help(width, usage_only),
+            )
 
-        from rich.console import Console
         from rich.markdown import Markdown
         from rich.table import Table
         from rich.text import Text
 
-        if self._parent:
-            # only the top-level Args can print help
-            return self._parent.print_help(console, usage_only)
+        from ._ansi import Sty, wrap_usage
+        from ._help import lines, text
 
         name = self.program_name or sys.argv[0]
-
-        positional_only, positional_and_named, named_only = self._traverse_args()
+        components, rows = self._help_parts()
 
         # (1) print brief if it exists
-        console = console or Console()
         console.print()
         if self.brief and not usage_only:
             try:
@@ -576,22 +973,7 @@ class Args:
 
         # (2) then print usage line
         console.print(Text("Usage:", style=Sty.title))
-        usage_components: list[Text] = []
-        pos_only_str = Text(" ").join([
-            usage(arg, "usage line") for arg in positional_only
-        ])
-        if pos_only_str:
-            usage_components.append(pos_only_str)
-        for opt in positional_and_named:
-            usage_components.append(usage(opt, "usage line"))
-        if self._var_args:
-            usage_components.append(var_args_usage_line(self._var_args))
-        for opt in named_only:
-            usage_components.append(usage(opt, "usage line"))
-        if self._var_kwargs:
-            usage_components.append(var_kwargs_usage_line(self._var_kwargs))
-
-        console.print(wrap_usage(f"  {name}", usage_components, console.width or 80))
+        console.print(lines(wrap_usage(f"  {name}", components, console.width or 80)))
 
         if usage_only:
             console.print()
@@ -601,35 +983,118 @@ class Args:
         console.print(Text("\nwhere", style=Sty.title))
 
         table = Table(show_header=False, box=None, padding=(0, 0, 0, 2))
+        for row in rows:
+            table.add_row(*map(text, row))
 
-        for arg in positional_only:
-            table.add_row("[dim](positional)[/dim]", usage(arg), help(arg))
-        for opt in positional_and_named:
-            table.add_row("[dim](pos. or opt.)[/dim]", usage(opt), help(opt))
-        if self._var_args:
-            table.add_row(
-                "[dim](positional)[/dim]",
-                usage(self._var_args),
-                help(self._var_args),
+        console.print(table)
+        console.print()
+
+    def _help_parts(self) -> "tuple[list[Styled], list[list[Styled]]]":
+        """
+        The components of the usage line, and the rows of the table of
+        arguments, of the help message. Shared by the `rich` and the plain
+        renderers, which only lay them out.
+        """
+        from ._ansi import (
+            Sty,
+            Styled,
+            help,
+            hidden_choices,
+            usage,
+            var_args_usage_line,
+            var_kwargs_usage_line,
+        )
+
+        positional_only, positional_and_named, named_only = self._traverse_args()
+
+        components: list[Styled] = []
+        if positional_only:
+            components.append(
+                Styled(" ").join([usage(arg, "usage line") for arg in positional_only])
             )
-        for opt in named_only:
-            table.add_row("[dim](option)[/dim]", usage(opt), help(opt))
+        components += [usage(opt, "usage line") for opt in positional_and_named]
+        if self._var_args:
+            components.append(var_args_usage_line(self._var_args))
+        components += [usage(opt, "usage line") for opt in named_only]
         if self._var_kwargs:
-            table.add_row(
-                "[dim](option)[/dim]",
-                usage(self._var_kwargs),
-                help(self._var_kwargs),
-            )
-
-        table.add_row(
-            "[dim](option)[/dim]",
-            Text.assemble(
+            components.append(var_kwargs_usage_line(self._var_kwargs))
+
+        rows = [
+            [Styled((kind, "dim")), usage(arg), help(arg)]
+            for kind, arg in self._help_rows()
+        ]
+        if any(hidden_choices(arg) for _, arg in self._help_rows()):
+            rows.append([
+                Styled(("(option)", "dim")),
+                Styled(
+                    ("--help-choices", f"{Sty.name} {Sty.opt} dim"),
+                    " ",
+                    ("<option>", f"{Sty.var} dim"),
+                ),
+                Styled(("List all choices of an option and exit.", "italic dim")),
+            ])
+        rows.append([
+            Styled(("(option)", "dim")),
+            Styled(
                 ("-?", f"{Sty.name} {Sty.opt} dim"),
                 ("|", f"{Sty.opt} dim"),
                 ("--help", f"{Sty.name} {Sty.opt} dim"),
             ),
-            "[i dim]Show this help message and exit.[/]",
+            Styled(("Show this help message and exit.", "italic dim")),
+        ])
+        return components, rows
+
+    def _help_rows(self) -> list[tuple[str, Arg]]:
+        """
+        The arguments listed in the help message, each with its kind.
+        """
+        positional_only, positional_and_named, named_only = self._traverse_args()
+        rows = [("(positional)", arg) for arg in positional_only]
+        rows += [("(pos. or opt.)", arg) for arg in positional_and_named]
+        if self._var_args:
+            rows.append(("(positional)", self._var_args))
+        rows += [("(option)", arg) for arg in named_only]
+        if self._var_kwargs:
+            rows.append(("(option)", self._var_kwargs))
+        return rows
+
+    def _help_key(self, usage_only: bool) -> tuple[Any, ...] | None:
+        """
+        Fingerprint of everything the (plain) help message depends on, or None
+        if it depends on defaults without a stable `repr`.
+        """
+        from ._ansi import Unstable, arg_key
+
+        try:
+            args = [(kind, arg_key(arg)) for kind, arg in self._help_rows()]
+        except Unstable:
+            return None
+        return (
+            "args",
+            self.program_name or sys.argv[0],
+            self.brief,
+            usage_only,
+            args,
         )
 
-        console.print(table)
-        console.print()
+    def _format_help(self, width: int, usage_only: bool) -> "list[Styled]":
+        """
+        Render the help message into lines of styled text without `rich`.
+        """
+        from ._ansi import Sty, Styled, markdown_block, table, wrap_usage
+
+        name = self.program_name or sys.argv[0]
+        components, rows = self._help_parts()
+
+        lines = [Styled()]
+        if self.brief and not usage_only:
+            lines += [*markdown_block(self.brief, width), Styled()]
+
+        lines.append(Styled(("Usage:", Sty.title)))
+        lines += wrap_usage(f"  {name}", components, width)
+
+        if usage_only:
+            return [*lines, Styled()]
+
+        lines += [Styled(), Styled(("where", Sty.title))]
+        return [*lines, *table(rows, width), Styled()]
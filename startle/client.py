@@ -0,0 +1,120 @@
+"""
+A tiny client for startle's server mode (see `start(..., server=...)`).
+
+This module only depends on the standard library, and does not import the rest
+of `startle`, so that it can be run as a script with minimal startup overhead:
+
+    python path/to/startle/client.py unix:/path/to/tool.sock [args ...]
+
+The client forwards its arguments, environment, working directory and standard
+streams to the server, and exits with the exit code of the command. If the
+server is not available (not running, or stale because its sources changed),
+and `STARTLE_SERVER_FALLBACK` is set, it is used as the command to run instead
+(e.g. `python tool.py`), with the arguments appended.
+
+The server acknowledges a request (with a single byte) once it has accepted it,
+right before running the command. The fallback is only used when no such
+acknowledgement came, so that a command is never run twice (e.g. when its worker
+is killed before it reports its exit code).
+"""
+
+import json
+import os
+import shlex
+import socket
+import struct
+import sys
+from collections.abc import Mapping, Sequence
+
+HEADER = struct.Struct("!I")
+EXIT_CODE = struct.Struct("!i")
+ACK = b"\x06"
+
+
+def unix_path(address: str) -> str:
+    """
+    Get the socket path from a `unix:<path>` address.
+    """
+    scheme, _, path = address.partition(":")
+    if scheme != "unix" or not path:
+        raise ValueError(f"Unsupported server address `{address}`!")
+    return path
+
+
+def request(
+    address: str,
+    argv: Sequence[str],
+    *,
+    env: Mapping[str, str] | None = None,
+    cwd: str | None = None,
+    fds: tuple[int, int, int] = (0, 1, 2),
+) -> int | None:
+    """
+    Run a command on a server.
+
+    Args:
+        address: The address of the server, e.g. `unix:/run/user/1000/tool.sock`.
+        argv: The command-line arguments (excluding the program name).
+        env: The environment variables. If None, uses the current environment.
+        cwd: The working directory. If None, uses the current working directory.
+        fds: The file descriptors to use as stdin, stdout and stderr of the command.
+    Returns:
+        The exit code of the command, or None if the server is not available
+        (i.e. did not accept the command, which is then not run).
+    Raises:
+        ConnectionError: If the server accepted the command, but did not report
+            its exit code (e.g. its worker was killed by a signal).
+    """
+    payload = json.dumps({
+        "argv": list(argv),
+        "env": dict(os.environ if env is None else env),
+        "cwd": os.getcwd() if cwd is None else cwd,
+    }).encode()
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(unix_path(address))
+            socket.send_fds(sock, [HEADER.pack(len(payload))], list(fds))
+            sock.sendall(payload)
+        except (FileNotFoundError, ConnectionError):
+            return None
+
+        try:
+            ack = sock.recv(len(ACK))
+        except ConnectionError:
+            return None
+        if ack != ACK:
+            return None  # server closed without running the command
+
+        response = b""
+        while len(response) < EXIT_CODE.size:
+            chunk = sock.recv(EXIT_CODE.size - len(response))
+            if not chunk:
+                raise ConnectionError("Command exited without an exit code!")
+            response += chunk
+    return EXIT_CODE.unpack(response)[0]
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: client.py unix:<socket path> [args ...]", file=sys.stderr)
+        return 2
+    address, args = argv[0], argv[1:]
+    sys.stdout.flush()
+    try:
+        code = request(address, args)
+    except ConnectionError as e:
+        print(f"startle server at `{address}`: {e}", file=sys.stderr)
+        return 255
+    if code is not None:
+        return code
+    if fallback := os.environ.get("STARTLE_SERVER_FALLBACK"):
+        cmd = [*shlex.split(fallback), *args]
+        os.execvp(cmd[0], cmd)
+    print(f"startle server at `{address}` is not available.", file=sys.stderr)
+    return 255
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
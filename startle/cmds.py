@@ -1,6 +1,7 @@
 import sys
+from collections.abc import Callable
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Union
 
 from .args import Args
 from .error import (
@@ -13,6 +14,13 @@ from .error import (
 if TYPE_CHECKING:
     from rich.console import Console
 
+    from ._ansi import Styled
+    from ._suggest import NameIndex
+
+
+CmdParser = Union[Args, "Cmds", Callable[[], Args]]
+# an Args object, a nested command group, or a factory to build Args lazily
+
 
 @dataclass
 class Cmds:
@@ -21,20 +29,31 @@ class Cmds:
 
     Parsing is done by treating the first argument as a command and then
     passing the remaining arguments to the Args object associated with that
-    command.
+    command. A command can also map to another Cmds object, i.e. a group of
+    subcommands, in which case the selection continues with the next argument.
+
+    Args objects can be given as factories (zero-argument callables), in which
+    case they are only built if their command is selected. `cmd_briefs` then
+    provides the briefs to list in the help message.
     """
 
-    cmd_parsers: dict[str, Args] = field(default_factory=dict[str, Args])
+    cmd_parsers: dict[str, CmdParser] = field(default_factory=dict[str, CmdParser])
     brief: str = ""
     program_name: str = ""
     default: str = ""
+    cmd_briefs: dict[str, str] = field(default_factory=dict[str, str])
+
+    # built lazily, only when suggesting, and kept out of the spec
+    _name_index: "NameIndex | None" = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self):
         # Normalize cmd keys (and `default`) to the canonical hyphen form so
         # that user input is found regardless of which form was registered.
         # Two registrations that collide post-normalization are unrecoverable
         # (one would silently shadow the other) — surface as a config error.
-        normalized: dict[str, Args] = {}
+        normalized: dict[str, CmdParser] = {}
         originals_by_norm: dict[str, list[str]] = {}
         for key, parser in self.cmd_parsers.items():
             norm_key = key.replace("_", "-")
@@ -44,6 +63,9 @@ class Cmds:
             if len(originals) > 1:
                 raise DuplicateCommandError(norm_key, originals)
         self.cmd_parsers = normalized
+        self.cmd_briefs = {
+            key.replace("_", "-"): brief for key, brief in self.cmd_briefs.items()
+        }
 
         if self.default:
             self.default = self.default.replace("_", "-")
@@ -52,11 +74,88 @@ class Cmds:
                     self.default, list(self.cmd_parsers.keys())
                 )
 
-    def get_cmd_parser(
-        self, cli_args: list[str] | None = None
-    ) -> tuple[str, Args, list[str]]:
-        cli_args = cli_args if cli_args is not None else sys.argv[1:]
+    def _suggest(self, cmd: str) -> list[str]:
+        """
+        Suggest known command names close to a mistyped `cmd`.
+        The underlying index is built on first use.
+        """
+        if self._name_index is None:
+            from ._suggest import NameIndex
+
+            self._name_index = NameIndex(self.cmd_parsers)
+        return self._name_index.suggest(cmd)
+
+    def parser(self, cmd: str) -> "Args | Cmds":
+        """
+        Get the parser for a (normalized) command, building it if needed.
+        """
+        parser = self.cmd_parsers[cmd]
+        if not isinstance(parser, Args | Cmds):
+            parser = self.cmd_parsers[cmd] = parser()
+        return parser
+
+    def complete(self, words: list[str], text: str) -> list[str]:
+        """
+        Suggest completions for `text`, given the preceding `words` of the
+        command line (excluding the program name).
+        """
+        if not words:
+            matches = [cmd for cmd in self.cmd_parsers if cmd.startswith(text)]
+            if self.default and text.startswith("-"):
+                matches += self.parser(self.default).complete(words, text)
+            return sorted(matches)
+        cmd = words[0].replace("_", "-")
+        if cmd in self.cmd_parsers:
+            return self.parser(cmd).complete(words[1:], text)
+        if self.default:
+            return self.parser(self.default).complete(words, text)
+        return []
+
+    def completion_spec(self) -> dict[str, Any]:
+        """
+        Describe the commands, recursively, as a JSON-serializable dict. Builds
+        all the parsers. See `Args.completion_spec()`.
+        """
+        return {
+            "commands": {
+                cmd: self.parser(cmd).completion_spec() for cmd in self.cmd_parsers
+            },
+            "default": self.default,
+        }
+
+    def to_manifest(self) -> dict[str, Any]:
+        """
+        Describe the commands, recursively, as a versioned, JSON-serializable
+        dict. Builds all the parsers. See `Args.to_manifest()`.
+        """
+        from ._manifest import VERSION
+
+        return {
+            "version": VERSION,
+            "kind": "cmds",
+            "brief": self.brief,
+            "program_name": self.program_name,
+            "default": self.default,
+            "commands": {
+                cmd: self.parser(cmd).to_manifest() for cmd in self.cmd_parsers
+            },
+        }
 
+    def build(self) -> None:
+        """
+        Build all lazily constructed parsers, including those of nested groups.
+        """
+        for cmd in self.cmd_parsers:
+            if isinstance(parser := self.parser(cmd), Cmds):
+                parser.build()
+
+    def select(self, cli_args: list[str]) -> tuple[str, "Args | Cmds", list[str]]:
+        """
+        Select the command at this level (without descending into groups).
+
+        Returns:
+            The selected command, its parser, and the remaining arguments.
+        """
         if not cli_args and not self.default:
             raise MissingCommandError()
 
@@ -70,14 +169,35 @@ class Cmds:
 
             if normal_cmd not in self.cmd_parsers:
                 if not self.default:
-                    raise UnexpectedCommandError(cmd)
-                return self.default, self.cmd_parsers[self.default], cli_args
+                    raise UnexpectedCommandError(cmd, self._suggest(normal_cmd))
+                return self.default, self.parser(self.default), cli_args
 
-            return normal_cmd, self.cmd_parsers[normal_cmd], cli_args[1:]
+            return normal_cmd, self.parser(normal_cmd), cli_args[1:]
 
         assert self.default, "Programming error!"
 
-        return self.default, self.cmd_parsers[self.default], cli_args
+        return self.default, self.parser(self.default), cli_args
+
+    def get_cmd_parser(
+        self, cli_args: list[str] | None = None
+    ) -> tuple[str, Args, list[str]]:
+        """
+        Select a command, descending into nested command groups as needed.
+
+        Returns:
+            The path of the selected command (space separated for nested
+            commands, e.g. `db migrate`), its Args, and the remaining arguments.
+        """
+        cli_args = cli_args if cli_args is not None else sys.argv[1:]
+
+        path: list[str] = []
+        cmds = self
+        while True:
+            cmd, parser, cli_args = cmds.select(cli_args)
+            path.append(cmd)
+            if isinstance(parser, Args):
+                return " ".join(path), parser, cli_args
+            cmds = parser
 
     def print_help(
         self, console: "Console | None" = None, usage_only: bool = False
@@ -86,70 +206,114 @@ class Cmds:
         Print the help message to the console.
 
         Args:
-            console: A rich console to print to. If None, uses the default console.
+            console: A rich console to print to. If None, renders plain (or ANSI
+                colored) text to stdout without `rich`, reusing cached help
+                for the same spec, terminal width and color mode if available.
             usage_only: Whether to print only the usage line.
         """
-        import sys
+        if console is None:
+            from ._ansi import write_help
+
+            return write_help(
+                self._help_key(usage_only),
+                lambda width: self._format_help(width, usage_only),
+            )
 
-        from rich.console import Console
         from rich.table import Table
         from rich.text import Text
 
-        name = self.program_name or sys.argv[0]
+        from ._ansi import Sty
+        from ._help import text
 
-        sty_pos_name = "bold"
-        sty_opt = "green"
-        sty_var = "blue"
-        sty_title = "bold underline dim"
-        sty_help = "italic"
+        usage, rows, hint = self._help_parts()
 
-        console = console or Console()
         if self.brief and not usage_only:
             console.print(self.brief + "\n")
 
         console.print(
-            Text.assemble(
-                "\n",
-                ("Usage:", sty_title),
-                "\n",
-                f"  {name} ",
-                ("<", sty_var),
-                ("command", f"{sty_var} {sty_pos_name}"),
-                (">", sty_var),
-                " ",
-                ("<command-specific-args>", sty_var),
-                "\n",
-            )
+            Text.assemble("\n", ("Usage:", Sty.title), "\n", text(usage), "\n")
         )
 
-        console.print(Text("Commands:", style=sty_title))
+        console.print(Text("Commands:", style=Sty.title))
 
         table = Table(show_header=False, box=None, padding=(0, 0, 0, 2))
-        for cmd, args in self.cmd_parsers.items():
-            brief = args.brief.split("\n\n")[0]
-            table.add_row(
-                Text(cmd, style=f"{sty_pos_name} {sty_var}"),
-                Text.assemble(
-                    (brief, sty_help),
+        for row in rows:
+            table.add_row(*map(text, row))
+        console.print(table)
+
+        console.print(Text.assemble("\n", text(hint), "\n"))
+
+    def _help_parts(self) -> "tuple[Styled, list[list[Styled]], Styled]":
+        """
+        The usage line, the rows of the table of commands, and the closing hint
+        of the help message. Shared by the `rich` and the plain renderers, which
+        only lay them out.
+        """
+        from ._ansi import Sty, Styled
+
+        name = self.program_name or sys.argv[0]
+        command = Styled("<", ("command", Sty.pos_name), ">", style=Sty.var)
+
+        usage = Styled(f"  {name} ", command, " ", ("<command-specific-args>", Sty.var))
+        rows = [
+            [
+                Styled((cmd, f"{Sty.pos_name} {Sty.var}")),
+                Styled(
+                    (self._cmd_brief(cmd), "italic"),
                     (" (default command)", "green") if cmd == self.default else "",
                 ),
-            )
-        console.print(table)
+            ]
+            for cmd in self.cmd_parsers
+        ]
+        hint = Styled(
+            ("Run ", "dim"),
+            f"`{name} ",
+            command,
+            " ",
+            ("--help", Sty.opt),
+            "`",
+            (" to see all command-specific options.", "dim"),
+        )
+        return usage, rows, hint
 
-        console.print(
-            Text.assemble(
-                "\n",
-                ("Run ", "dim"),
-                "`",
-                name,
-                " ",
-                ("<", sty_var),
-                ("command", f"{sty_var} {sty_pos_name}"),
-                (">", sty_var),
-                " ",
-                ("--help", f"{sty_opt}"),
-                "`",
-                (" to see all command-specific options.", "dim"),
-                "\n",
-            )
+    def _cmd_brief(self, cmd: str) -> str:
+        parser = self.cmd_parsers[cmd]
+        brief = (
+            parser.brief
+            if isinstance(parser, Args | Cmds)
+            else self.cmd_briefs.get(cmd, "")
         )
+        return brief.split("\n\n")[0]
+
+    def _help_key(self, usage_only: bool) -> tuple[Any, ...]:
+        """
+        Fingerprint of everything the (plain) help message depends on.
+        """
+        return (
+            "cmds",
+            self.program_name or sys.argv[0],
+            self.brief,
+            usage_only,
+            self.default,
+            [(cmd, self._cmd_brief(cmd)) for cmd in self.cmd_parsers],
+        )
+
+    def _format_help(self, width: int, usage_only: bool) -> "list[Styled]":
+        """
+        Render the help message into lines of styled text without `rich`.
+        """
+        from ._ansi import Sty, Styled, table, text_block
+
+        usage, rows, hint = self._help_parts()
+
+        lines: list[Styled] = []
+        if self.brief and not usage_only:
+            lines += [*text_block(self.brief, width), Styled()]
+        lines += [
+            Styled(),
+            Styled(("Usage:", Sty.title)),
+            usage,
+            Styled(),
+            Styled(("Commands:", Sty.title)),
+        ]
+        return [*lines, *table(rows, width), Styled(), *hint.wrap(width), Styled()]
@@ -1,3 +1,4 @@
+from collections.abc import Sequence
 from typing import Any
 
 
@@ -26,6 +27,15 @@ class ParserConfigError(Exception):
     pass
 
 
+def _did_you_mean(suggestions: Sequence[str]) -> str:
+    if not suggestions:
+        return ""
+    quoted = [f"`{s}`" for s in suggestions]
+    if len(quoted) == 1:
+        return f" Did you mean {quoted[0]}?"
+    return f" Did you mean {', '.join(quoted[:-1])} or {quoted[-1]}?"
+
+
 # Below are the specific errors derived from one of the above base errors
 
 
@@ -89,8 +99,10 @@ class UnexpectedOptionError(ParserOptionError):
     Exception raised when an unexpected option is provided to the parser.
     """
 
-    def __init__(self, name: str) -> None:
-        super().__init__(f"Unexpected option `{name}`!")
+    def __init__(self, name: str, suggestions: Sequence[str] = ()) -> None:
+        self.name = name
+        self.suggestions = list(suggestions)
+        super().__init__(f"Unexpected option `{name}`!" + _did_you_mean(suggestions))
 
 
 class UnexpectedPositionalArgumentError(ParserOptionError):
@@ -165,8 +177,129 @@ class UnexpectedCommandError(ParserOptionError):
     Exception raised when an unknown command is given and there is no default command.
     """
 
-    def __init__(self, cmd: str) -> None:
-        super().__init__(f"Unknown command `{cmd}`!")
+    def __init__(self, cmd: str, suggestions: Sequence[str] = ()) -> None:
+        self.cmd = cmd
+        self.suggestions = list(suggestions)
+        super().__init__(f"Unknown command `{cmd}`!" + _did_you_mean(suggestions))
+
+
+class UnsupportedShellError(ParserValueError):
+    """
+    Raised when completion is requested for an unsupported shell.
+    """
+
+    def __init__(self, shell: str, shells: Sequence[str]) -> None:
+        self.shell = shell
+        choices = ", ".join(f"`{s}`" for s in shells)
+        super().__init__(f"Unsupported shell `{shell}`! Choose from {choices}.")
+
+
+class InvalidShardError(ParserValueError):
+    """
+    Exception raised when the requested shard is not of the form `i/N`.
+    """
+
+    def __init__(self, shard: str) -> None:
+        super().__init__(
+            f"Invalid shard `{shard}`! Expected `i/N` (or `i/N:hash`), with 0 <= i < N."
+        )
+
+
+class UnsupportedProfileModeError(ParserValueError):
+    """
+    Raised when profiling is requested with an unsupported mode.
+    """
+
+    def __init__(self, mode: str, modes: Sequence[str]) -> None:
+        self.mode = mode
+        choices = ", ".join(f"`{m}`" for m in modes)
+        super().__init__(f"Unsupported profile mode `{mode}`! Choose from {choices}.")
+
+
+class BatchFileError(ParserValueError):
+    """
+    Raised when the file of commands of batch mode cannot be read.
+    """
+
+    def __init__(self, path: str, reason: str) -> None:
+        self.path = path
+        self.reason = reason
+        super().__init__(f"Cannot read batch file `{path}`: {reason}!")
+
+
+class UnsupportedExecutorError(ParserValueError):
+    """
+    Raised when batch mode is requested with an unsupported executor.
+    """
+
+    def __init__(self, executor: str, executors: Sequence[str]) -> None:
+        self.executor = executor
+        choices = ", ".join(f"`{e}`" for e in executors)
+        super().__init__(f"Unsupported executor `{executor}`! Choose from {choices}.")
+
+
+class UnsupportedCacheModeError(ParserValueError):
+    """
+    Raised when caching of results is requested with an unsupported mode.
+    """
+
+    def __init__(self, mode: str, modes: Sequence[str]) -> None:
+        self.mode = mode
+        choices = ", ".join(f"`{m}`" for m in modes)
+        super().__init__(f"Unsupported cache mode `{mode}`! Choose from {choices}.")
+
+
+class UnsupportedStreamFormatError(ParserValueError):
+    """
+    Raised when streaming is requested in an unsupported format.
+    """
+
+    def __init__(self, format: str, formats: Sequence[str]) -> None:
+        self.format = format
+        choices = ", ".join(f"`{f}`" for f in formats)
+        super().__init__(
+            f"Unsupported stream format `{format}`! Choose from {choices}."
+        )
+
+
+class ConfigFileError(ParserValueError):
+    """
+    Raised when a config file cannot be read or parsed.
+    """
+
+    def __init__(self, path: str, reason: str) -> None:
+        self.path = path
+        self.reason = reason
+        super().__init__(f"Cannot load config file `{path}`: {reason}!")
+
+
+class RecordsError(ParserValueError):
+    """
+    Raised when records cannot be converted into instances of a class. Holds the
+    number (1-based) of each failing record, along with its error: a parse error,
+    or any exception raised by the class itself (e.g. in `__post_init__`).
+    """
+
+    def __init__(self, obj_name: str, errors: Sequence[tuple[int, Exception]]) -> None:
+        self.errors = list(errors)
+        lines = "".join(
+            f"\n  Record {n}: {error}"
+            if isinstance(error, ParserOptionError | ParserValueError)
+            else f"\n  Record {n}: {type(error).__name__}: {error}"
+            for n, error in self.errors
+        )
+        super().__init__(
+            f"Cannot convert {len(self.errors)} record(s) into `{obj_name}`:{lines}"
+        )
+
+
+class NoChoicesError(ParserOptionError):
+    """
+    Raised when `--help-choices` is asked for an argument without choices.
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__(f"Option `{name}` has no choices to list!")
 
 
 class NotAClassError(ParserConfigError):
@@ -196,11 +329,11 @@ class NameCollisionError(ParserConfigError):
 
 class HelpCollisionError(ParserConfigError):
     """
-    Exception raised when `help` is used as a parameter name.
+    Exception raised when `help` (or `help_choices`) is used as a parameter name.
     """
 
-    def __init__(self, obj_name: str) -> None:
-        super().__init__(f"Cannot use `help` as parameter name in `{obj_name}`!")
+    def __init__(self, obj_name: str, name: str = "help") -> None:
+        super().__init__(f"Cannot use `{name}` as parameter name in `{obj_name}`!")
 
 
 class ReservedShortNameError(ParserConfigError):
@@ -351,3 +484,75 @@ class DuplicateCommandError(ParserConfigError):
             f"Multiple commands normalize to the same name `{normalized}`: "
             f"{', '.join(f'`{o}`' for o in originals)}"
         )
+
+
+class UnsupportedServerAddressError(ParserConfigError):
+    """
+    Exception raised when the address given for server mode is not supported.
+    """
+
+    def __init__(self, address: str) -> None:
+        super().__init__(
+            f"Unsupported server address `{address}`! Expected `unix:<socket path>`."
+        )
+
+
+class ManifestError(ParserConfigError):
+    """
+    Exception raised when a parser cannot be constructed from a manifest.
+    """
+
+
+class FanOutOptionError(ParserOptionError):
+    """
+    Raised when a reserved option (e.g. `--startle-jobs`) asks to fan a command
+    out over (or to shard) its n-ary argument, which cannot be told.
+    """
+
+    def __init__(
+        self, option: str, obj_name: str, action: str = "fan out over"
+    ) -> None:
+        super().__init__(
+            f"Cannot tell which argument of `{obj_name}()` to {action} for "
+            f"`--startle-{option}`! Expected exactly one n-ary (positional) argument."
+        )
+
+
+class FanOutParamError(ParserConfigError):
+    """
+    Exception raised when the argument to fan a command out over (or to shard)
+    is not an n-ary argument of the command, or cannot be told.
+    """
+
+    def __init__(
+        self, param_name: str | None, obj_name: str, action: str = "fan out over"
+    ) -> None:
+        if param_name is None:
+            super().__init__(
+                f"Cannot tell which argument of `{obj_name}()` to {action}! "
+                "Expected exactly one n-ary (positional) argument, or `fan_out`."
+            )
+        else:
+            super().__init__(
+                f"Cannot {action} `{param_name}` of `{obj_name}()`! "
+                "Expected an n-ary argument (e.g. a list)."
+            )
+
+
+# Below are errors raised while running a command, rather than while parsing
+
+
+class FanOutError(Exception):
+    """
+    Exception raised when a command fails on some elements of the argument it
+    is fanned out over. The original exception is chained as the cause.
+    """
+
+    def __init__(self, items: Sequence[Any], error: BaseException) -> None:
+        self.items = list(items)
+        self.error = error
+        shown = ", ".join(f"`{item}`" for item in self.items)
+        reason = (
+            f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+        )
+        super().__init__(f"Failed on {shown}: {reason}")
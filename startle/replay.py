@@ -0,0 +1,255 @@
+"""
+Replay the parses recorded in a telemetry log (see `STARTLE_TELEMETRY`) against
+the current code, to benchmark them and to catch regressions:
+
+    python -m startle.replay log.jsonl [--repeat 5] [--slowdown 1.5]
+
+Only the records with argument values (i.e. logged with `STARTLE_TELEMETRY_VALUES`
+set) can be re-parsed, the others are counted as skipped. Commands are never
+called. The exit code is 1 if the outcome of any parse changed (e.g. it used to
+succeed and now fails), or if a command got slower than `--slowdown` times its
+recorded parse time.
+"""
+
+import json
+import os
+import sys
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from statistics import median
+from typing import Any, TextIO, cast
+
+from . import error as errors
+from ._ansi import capture_output
+from ._start import make_parser, refuse_start
+from .args import Args
+from .cmds import Cmds
+from .error import ManifestError, ParserConfigError, ParserOptionError, ParserValueError
+
+_MAIN = "__startle_replay_main__"
+
+
+@dataclass
+class _Group:
+    """
+    Replayed records of the same command of the same program.
+    """
+
+    program: str
+    command: str
+    recorded: list[float] = field(default_factory=list[float])
+    replayed: list[float] = field(default_factory=list[float])
+    changed: list[str] = field(default_factory=list[str])
+
+
+def read_log(lines: Iterable[str]) -> list[dict[str, Any]]:
+    """
+    Read the records of a telemetry log, skipping malformed lines.
+    """
+    records: list[dict[str, Any]] = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            records.append(cast(dict[str, Any], record))
+    return records
+
+
+def _load_main(path: str) -> Any:
+    """
+    Import the script of a recorded `__main__` module under another name, so
+    that it does not run its commands if guarded by `__name__ == "__main__"`,
+    and with `start()` refusing to run them if not.
+    """
+    import importlib.util
+
+    if _MAIN in sys.modules:
+        return sys.modules[_MAIN]
+    spec = importlib.util.spec_from_file_location(_MAIN, path)
+    if spec is None or spec.loader is None:
+        raise ManifestError(f"Cannot import `{path}`!")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[_MAIN] = module
+    sys.path.insert(0, os.path.dirname(os.path.abspath(path)))
+    try:
+        with refuse_start():
+            spec.loader.exec_module(module)
+    except KeyboardInterrupt:
+        del sys.modules[_MAIN]
+        raise
+    except BaseException as e:  # including SystemExit, and StartRefused
+        del sys.modules[_MAIN]
+        raise ManifestError(f"Cannot import `{path}`: {e!r}") from e
+    return module
+
+
+def resolve_target(target: Any, main: str | None) -> Any:
+    """
+    Resolve the function(s) referred to by the `target` of a record, importing
+    their modules without running any command.
+    """
+    from ._manifest import resolve
+
+    if isinstance(target, dict):
+        items = cast(dict[str, Any], target).items()
+        return {name: resolve_target(item, main) for name, item in items}
+    module, _, qualname = str(target).partition(":")
+    if module != "__main__":
+        try:
+            with refuse_start():
+                return resolve(target)
+        except (KeyboardInterrupt, ManifestError):
+            raise
+        except BaseException as e:
+            raise ManifestError(f"Cannot import `{module}`: {e!r}") from e
+    if main is None:
+        raise ManifestError(f"Cannot resolve `{target}` without its script!")
+    obj = _load_main(main)
+    try:
+        for part in qualname.split("."):
+            obj = getattr(obj, part)
+    except AttributeError as e:
+        raise ManifestError(f"Cannot resolve `{target}` in `{main}`!") from e
+    return obj
+
+
+def recorded_outcome(record: dict[str, Any]) -> str:
+    """
+    Whether the recorded parse succeeded (`ok`), exited early (`exit`, e.g. for
+    `--help`), failed (`error`), or hit a misconfigured command (`config-error`,
+    e.g. a subcommand with an unsupported parameter type).
+    """
+    if "call" in record.get("phases", {}):
+        return "ok"
+    error = getattr(errors, str(record.get("error")), None)
+    if isinstance(error, type) and issubclass(error, ParserConfigError):
+        return "config-error"
+    return "exit" if record.get("status") == 0 else "error"
+
+
+def parse_outcome(parser: Args | Cmds, argv: list[str]) -> str:
+    """
+    Parse `argv` with `parser` (down to the selected command, if any), without
+    calling anything, and tell the outcome as in `recorded_outcome`.
+    """
+    try:
+        with capture_output():
+            while isinstance(parser, Cmds):
+                _, parser, argv = parser.select(argv)
+            parser.parse(argv).make_func_args()
+    except SystemExit as e:
+        return "exit" if not e.code else "error"
+    except (ParserOptionError, ParserValueError):
+        return "error"
+    except ParserConfigError:
+        return "config-error"
+    return "ok"
+
+
+def replay(
+    records: Iterable[dict[str, Any]],
+    *,
+    repeat: int = 1,
+    slowdown: float | None = None,
+    out: TextIO | None = None,
+) -> int:
+    """
+    Replay the parses of `records`, and report them per command.
+
+    Args:
+        records: Records of a telemetry log, as read by `read_log`.
+        repeat: How many times to parse each record, keeping the fastest time.
+        slowdown: If given, flag commands whose median parse time is more than
+            this many times their recorded median.
+        out: Where to write the report. If None, uses stdout.
+    Returns:
+        The exit code: 1 if an outcome changed or a command got slower, else 0.
+    """
+    write = (out or sys.stdout).write
+    parsers: dict[str, Args | Cmds | str] = {}
+    groups: dict[tuple[str, str], _Group] = {}
+    skipped = 0
+
+    for record in records:
+        argv = record.get("args")
+        if not isinstance(argv, list):
+            skipped += 1
+            continue
+        argv = [str(a) for a in cast(list[Any], argv)]
+        options = record.get("options", {})
+        key = json.dumps(
+            [record.get("target"), record.get("program"), options], sort_keys=True
+        )
+        if key not in parsers:
+            try:
+                obj = resolve_target(record.get("target"), record.get("main"))
+                parsers[key] = make_parser(
+                    obj,
+                    record.get("program"),
+                    options.get("default"),
+                    options.get("recurse", False),
+                    options.get("naming", "flat"),
+                )
+            except (ManifestError, ParserConfigError) as e:
+                parsers[key] = str(e)
+        parser = parsers[key]
+        if isinstance(parser, str):
+            skipped += 1
+            continue
+
+        program, command = str(record.get("program")), record.get("command") or ""
+        group = groups.setdefault((program, command), _Group(program, command))
+        phases: dict[str, float] = record.get("phases", {})
+        group.recorded.append(phases.get("select", 0.0) + phases.get("parse", 0.0))
+
+        outcome, best = "", float("inf")
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            outcome = parse_outcome(parser, argv)
+            best = min(best, time.perf_counter() - start)
+        group.replayed.append(best)
+        if outcome != (expected := recorded_outcome(record)):
+            group.changed.append(f"{argv!r}: {expected} -> {outcome}")
+
+    status = 0
+    for group in groups.values():
+        before, after = median(group.recorded), median(group.replayed)
+        ratio = after / before if before else 0.0
+        slow = slowdown is not None and ratio > slowdown
+        status |= bool(group.changed) or slow
+        name = f"{group.program} {group.command}".strip()
+        write(
+            f"{name}: {len(group.replayed)} parses, "
+            f"median {before * 1e3:.3f}ms -> {after * 1e3:.3f}ms ({ratio:.2f}x)"
+            f"{' SLOWER' if slow else ''}\n"
+        )
+        for change in group.changed:
+            write(f"  changed: {change}\n")
+    write(f"{sum(len(g.replayed) for g in groups.values())} replayed, ")
+    write(f"{skipped} skipped.\n")
+    return int(status)
+
+
+def main(log: Path, /, *, repeat: int = 1, slowdown: float | None = None) -> None:
+    """
+    Replay the parses recorded in a telemetry log against the current code.
+
+    Args:
+        log: The telemetry log (JSON lines), as written with `STARTLE_TELEMETRY`.
+        repeat: How many times to parse each record, keeping the fastest time.
+        slowdown: Fail if the median parse time of a command is more than this
+            many times its recorded median.
+    """
+    with open(log) as f:
+        records = read_log(f)
+    raise SystemExit(replay(records, repeat=repeat, slowdown=slowdown))
+
+
+if __name__ == "__main__":
+    from . import start
+
+    start(main, name="python -m startle.replay")
@@ -0,0 +1,245 @@
+"""
+Dispatch of text commands to functions, for embedding startle into a long-lived
+application (e.g. a chat bot, or an RPC gateway):
+
+    router = Router({"deploy": deploy, "rollback": rollback})
+    result = router.dispatch("deploy svc --canary 5")
+    if result.ok:
+        ...  # result.value is the return value of `deploy`
+    else:
+        ...  # result.error.message tells what is wrong with the command
+
+Parsers are built once. Unlike `start()`, a router never prints (help is
+returned as text) and never exits: problems with a command line are returned
+as a `DispatchError`. Exceptions raised by the commands themselves propagate.
+"""
+
+import shlex
+import threading
+from collections.abc import Callable, Sequence
+from contextlib import nullcontext
+from dataclasses import dataclass
+from functools import lru_cache
+from inspect import iscoroutinefunction
+from typing import Any, Literal, cast
+
+from ._ansi import capture_output
+from ._inspect.make_args import make_args_from_func
+from ._registry import Registry
+from ._start import Funcs, Runner, call_func, make_cmds
+from .error import (
+    CmdsRecurseError,
+    ParserOptionError,
+    ParserValueError,
+    SingleFunctionDefaultCommandError,
+)
+
+ErrorKind = Literal["syntax", "option", "value", "help"]
+
+
+@dataclass(frozen=True, slots=True)
+class DispatchError:
+    """
+    Why a command line was not dispatched.
+
+    - `syntax`: the line could not be split into arguments (e.g. an unclosed quote).
+    - `option`: options or arguments are missing, unexpected, or repeated
+      (including an unknown command), i.e. a `startle.error.ParserOptionError`.
+    - `value`: a value could not be parsed into the type of its argument,
+      i.e. a `startle.error.ParserValueError`.
+    - `help`: help was requested (e.g. `--help`), and `message` is the help text.
+    """
+
+    kind: ErrorKind
+    message: str
+    exception: Exception | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Dispatch:
+    """
+    The outcome of dispatching a command line.
+
+    Attributes:
+        command: The path of the command (e.g. `db migrate`), or "" for a single
+            function, or if no command could be selected.
+        value: The return value of the command, if it was called.
+        error: Why the command was not called, if it was not.
+    """
+
+    command: str
+    value: Any = None
+    error: DispatchError | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass(slots=True)
+class _Call:
+    command: str
+    func: Callable[..., Any]
+    is_async: bool
+    args: list[Any]
+    kwargs: dict[str, Any]
+
+    def __call__(self, runner: Runner | None) -> Dispatch:
+        if self.is_async:
+            return Dispatch(
+                self.command, call_func(self.func, self.args, self.kwargs, runner)
+            )
+        return Dispatch(self.command, self.func(*self.args, **self.kwargs))
+
+
+def _may_help(argv: Sequence[str]) -> bool:
+    """
+    Whether the arguments may request help (e.g. `--help`, `-?`, `-ab?`).
+    """
+    joined = "\0".join(argv)  # to rule out most lines without a loop
+    if "?" not in joined and "help" not in joined:
+        return False
+    return any(arg[:1] == "-" and ("help" in arg or "?" in arg) for arg in argv)
+
+
+def _tokenize(line: str) -> tuple[tuple[str, ...], bool]:
+    argv = tuple(shlex.split(line))
+    return argv, _may_help(argv)
+
+
+class Router:
+    """
+    Given a function, or a container of functions `obj`, build the parsers once,
+    and dispatch command lines to the function(s).
+
+    Dispatching is thread-safe: the arguments are parsed under a lock, and the
+    commands are called outside of it.
+
+    Args:
+        obj: The function or functions to dispatch to. If a list or dict, the
+            functions are treated as (possibly nested) commands. See `start()`.
+        name: The name of the program, for help text.
+        default: The default command. See `start()`.
+        recurse: (experimental) Whether to recursively parse objects using their
+            initializers. See `start()`.
+        naming: How to name nested arguments when `recurse` is True. See `start()`.
+        registry: The registry of parsers and metavars to build with.
+            See `start()`.
+        runner: The function to run async commands with in `dispatch()`.
+            If None, uses `asyncio.run`. Ignored by `adispatch()`.
+        cache_size: How many distinct lines to keep the tokenization of.
+    """
+
+    def __init__(
+        self,
+        obj: "Callable[..., Any] | Funcs",
+        *,
+        name: str = "",
+        default: str | None = None,
+        recurse: bool = False,
+        naming: Literal["flat", "nested"] = "flat",
+        registry: Registry | None = None,
+        runner: Runner | None = None,
+        cache_size: int = 4096,
+    ) -> None:
+        self._runner = runner
+        self._lock = threading.Lock()
+        self._tokenize = lru_cache(maxsize=cache_size)(_tokenize)
+        with registry.bind() if registry is not None else nullcontext():
+            if isinstance(obj, list) or isinstance(obj, dict):
+                if recurse:
+                    raise CmdsRecurseError()
+                funcs = cast(Funcs, obj)
+                self._cmds, self._path2func = make_cmds(funcs, name, default or "")
+                self._cmds.build()
+                self._args = None
+            else:
+                if default is not None:
+                    raise SingleFunctionDefaultCommandError()
+                self._cmds, self._path2func = None, {"": obj}
+                self._args = make_args_from_func(
+                    obj, name, recurse=recurse, naming=naming
+                )
+        self._async = {
+            path for path, func in self._path2func.items() if iscoroutinefunction(func)
+        }
+
+    def dispatch(self, line: str) -> Dispatch:
+        """
+        Split a command line into arguments (as a POSIX shell would, without
+        expansions), parse them and call the command with them.
+
+        Returns:
+            The outcome, with the return value of the command if it was called.
+        """
+        try:
+            argv, may_help = self._tokenize(line)
+        except ValueError as e:  # from shlex
+            return Dispatch("", error=DispatchError("syntax", str(e), e))
+        call = self._prepare(list(argv), may_help)
+        if isinstance(call, Dispatch):
+            return call
+        return call(self._runner)
+
+    def dispatch_argv(self, argv: Sequence[str]) -> Dispatch:
+        """
+        Like `dispatch()`, but with the arguments already split.
+        """
+        call = self._prepare(list(argv), _may_help(argv))
+        if isinstance(call, Dispatch):
+            return call
+        return call(self._runner)
+
+    async def adispatch(self, line: str | Sequence[str]) -> Dispatch:
+        """
+        Like `dispatch()` (or `dispatch_argv()`, if given a sequence of arguments),
+        but awaits async commands on the running event loop. Sync commands are
+        called directly (i.e. block the loop while they run).
+        """
+        if isinstance(line, str):
+            try:
+                argv, may_help = self._tokenize(line)
+            except ValueError as e:  # from shlex
+                return Dispatch("", error=DispatchError("syntax", str(e), e))
+        else:
+            argv, may_help = line, _may_help(line)
+        call = self._prepare(list(argv), may_help)
+        if isinstance(call, Dispatch):
+            return call
+        value = call.func(*call.args, **call.kwargs)
+        if call.is_async:
+            value = await value
+        return Dispatch(call.command, value)
+
+    def _prepare(self, argv: list[str], may_help: bool) -> _Call | Dispatch:
+        """
+        Parse the arguments into a call of the command, or the error if any.
+        If the arguments may request help, the help text printed by the
+        parsers is captured (and returned as the error) instead.
+        """
+        if not may_help:
+            with self._lock:
+                return self._parse(argv)
+        with self._lock, capture_output() as printed:
+            call = self._parse(argv)
+        if isinstance(call, Dispatch) and call.error and call.error.kind == "help":
+            return Dispatch(call.command, error=DispatchError("help", "".join(printed)))
+        return call
+
+    def _parse(self, argv: list[str]) -> _Call | Dispatch:
+        command = ""
+        try:
+            if self._cmds is None:
+                assert self._args is not None, "Programming error!"
+                args = self._args
+            else:
+                command, args, argv = self._cmds.get_cmd_parser(argv)
+            f_args, f_kwargs = args.parse(argv).make_func_args()
+        except ParserOptionError as e:
+            return Dispatch(command, error=DispatchError("option", str(e), e))
+        except ParserValueError as e:
+            return Dispatch(command, error=DispatchError("value", str(e), e))
+        except SystemExit:  # i.e. after printing help
+            return Dispatch(command, error=DispatchError("help", ""))
+        func = self._path2func[command]
+        return _Call(command, func, command in self._async, f_args, f_kwargs)
@@ -0,0 +1,16 @@
+import os
+from collections.abc import Iterator
+
+from pytest import TempPathFactory, fixture
+
+
+@fixture(autouse=True, scope="session")
+def _isolated_cache(tmp_path_factory: TempPathFactory) -> Iterator[None]:
+    # keep the on-disk cache (e.g. of rendered help) out of the user's home
+    previous = os.environ.get("STARTLE_CACHE_DIR")
+    os.environ["STARTLE_CACHE_DIR"] = str(tmp_path_factory.mktemp("cache"))
+    yield
+    if previous is None:
+        del os.environ["STARTLE_CACHE_DIR"]
+    else:
+        os.environ["STARTLE_CACHE_DIR"] = previous
@@ -0,0 +1,214 @@
+import asyncio
+import io
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Literal
+
+from pytest import CaptureFixture, MonkeyPatch, mark, raises
+from startle import run_batch, start
+from startle.error import (
+    BatchFileError,
+    MissingOptionValueError,
+    UnsupportedExecutorError,
+    ValueParsingError,
+)
+
+
+def add(a: int, b: int) -> int:
+    """
+    Add two numbers.
+    """
+    return a + b
+
+
+def nap(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def fail(msg: str) -> None:
+    raise RuntimeError(msg)
+
+
+async def anap(seconds: float) -> float:
+    await asyncio.sleep(seconds)
+    return seconds
+
+
+def _run(obj: Any, lines: list[str], **kwargs: Any) -> tuple[int, list[Any]]:
+    output = io.StringIO()
+    status = run_batch(obj, lines, output=output, **kwargs)
+    return status, [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+@mark.parametrize("executor", ["thread", "process", "async"])
+def test_batch(executor: Literal["thread", "process", "async"]):
+    lines = ["add 1 2", "", "# comment", "add --a 3 --b 4", "fail boom", "add 1"]
+    status, records = _run([add, fail], lines, jobs=2, executor=executor)
+    assert status == 1
+    assert records == [
+        {"line": 1, "status": 0, "result": 3},
+        {"line": 4, "status": 0, "result": 7},
+        {"line": 5, "status": 1, "error": "RuntimeError: boom"},
+        {"line": 6, "status": 2, "error": "Required option `b` is not provided!"},
+    ]
+
+
+@mark.parametrize("executor", ["thread", "async"])
+def test_batch_ordered_and_concurrent(executor: Literal["thread", "async"]):
+    obj = nap if executor == "thread" else anap
+    lines = ["0.3", "0.1", "0.2", "0"]
+    begin = time.perf_counter()
+    status, records = _run(obj, lines, jobs=4, executor=executor)
+    elapsed = time.perf_counter() - begin
+    assert status == 0
+    assert [r["result"] for r in records] == [0.3, 0.1, 0.2, 0]
+    assert [r["line"] for r in records] == [1, 2, 3, 4]
+    assert elapsed < 0.55
+
+
+def test_batch_bounded():
+    running: list[int] = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def work(i: int) -> int:
+        with lock:
+            running.append(i)
+            peak[0] = max(peak[0], len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(i)
+        return i
+
+    status, records = _run(work, [str(i) for i in range(20)], jobs=3)
+    assert status == 0
+    assert [r["result"] for r in records] == list(range(20))
+    assert peak[0] <= 3
+
+
+def test_batch_single_function_errors():
+    status, records = _run(add, ["1 2", "1 2 3", "1 'x", "--help"])
+    assert status == 1
+    assert records[0] == {"line": 1, "status": 0, "result": 3}
+    assert records[1]["status"] == 2
+    assert "Unexpected positional argument" in records[1]["error"]
+    assert records[2] == {"line": 3, "status": 2, "error": "No closing quotation"}
+    assert records[3]["status"] == 0
+    assert "Add two numbers." in records[3]["error"]
+    assert "Usage:" in records[3]["error"]
+
+
+def test_batch_help_not_printed(capsys: CaptureFixture[str]):
+    status, records = _run(
+        {"math": {"add": add}}, ["--help", "math add -?", "math --help"]
+    )
+    assert capsys.readouterr().out == ""
+    assert status == 0
+    assert [r["status"] for r in records] == [0, 0, 0]
+    assert "math" in records[0]["error"]
+    assert "Add two numbers." in records[1]["error"]
+
+
+def test_batch_config_error():
+    def bad(x: list[str] | None) -> None:
+        pass
+
+    status, records = _run({"add": add, "bad": bad}, ["bad x", "add 1 2"])
+    assert status == 1
+    assert records[0]["status"] == 2
+    assert records[0]["error"].startswith("UnsupportedTypeError: ")
+    assert records[1] == {"line": 2, "status": 0, "result": 3}
+
+
+def test_batch_nested_commands():
+    status, records = _run({"math": {"add": add}}, ["math add 1 2", "math sub 1"])
+    assert status == 1
+    assert records[0] == {"line": 1, "status": 0, "result": 3}
+    assert records[1]["status"] == 2
+    assert records[1]["error"].startswith("Unknown command `sub`!")
+
+
+def test_start_batch(
+    tmp_path: Path, capsys: CaptureFixture[str], monkeypatch: MonkeyPatch
+):
+    jobs = tmp_path / "jobs.txt"
+    jobs.write_text("add 1 2\nadd 3 4\n")
+
+    with raises(SystemExit) as exc:
+        start([add, fail], args=["--startle-batch", str(jobs), "--startle-jobs=2"])
+    assert exc.value.code == 0
+    out = capsys.readouterr().out
+    assert out == (
+        '{"line": 1, "status": 0, "result": 3}\n{"line": 2, "status": 0, "result": 7}\n'
+    )
+
+    monkeypatch.setattr(sys, "stdin", io.StringIO("fail x\n"))
+    monkeypatch.setattr(sys, "argv", ["prog", "--startle-batch", "-"])
+    with raises(SystemExit) as exc:
+        start([add, fail])
+    assert exc.value.code == 1
+    out = capsys.readouterr().out
+    assert out == '{"line": 1, "status": 1, "error": "RuntimeError: x"}\n'
+
+    with raises(MissingOptionValueError):
+        start([add, fail], args=["--startle-batch"], catch=False)
+
+
+@mark.parametrize("executor", ["thread", "process", "async"])
+def test_start_batch_executor(
+    tmp_path: Path, capsys: CaptureFixture[str], executor: str
+):
+    jobs = tmp_path / "jobs.txt"
+    jobs.write_text("add 1 2\n")
+    args = ["--startle-batch", str(jobs), "--startle-executor", executor]
+    with raises(SystemExit) as exc:
+        start([add, fail], args=args)
+    assert exc.value.code == 0
+    assert capsys.readouterr().out == '{"line": 1, "status": 0, "result": 3}\n'
+
+
+def test_start_batch_unsupported_executor(tmp_path: Path):
+    jobs = tmp_path / "jobs.txt"
+    jobs.write_text("add 1 2\n")
+    args = ["--startle-batch", str(jobs), "--startle-executor", "fiber"]
+    with raises(UnsupportedExecutorError, match="Unsupported executor `fiber`!"):
+        start([add, fail], args=args, catch=False)
+
+
+@mark.parametrize("jobs", ["abc", "0", "-2"])
+def test_start_batch_invalid_jobs(
+    tmp_path: Path, capsys: CaptureFixture[str], jobs: str
+):
+    path = tmp_path / "jobs.txt"
+    path.write_text("add 1 2\n")
+    args = ["--startle-batch", str(path), "--startle-jobs", jobs]
+    with raises(
+        ValueParsingError, match=f"Cannot parse positive integer from `{jobs}`!"
+    ):
+        start([add, fail], args=args, catch=False)
+    with raises(SystemExit) as exc:
+        start([add, fail], args=args)
+    assert exc.value.code == 1
+    assert "Cannot parse positive integer" in capsys.readouterr().out
+
+
+def test_start_batch_missing_file(tmp_path: Path, capsys: CaptureFixture[str]):
+    path = tmp_path / "missing.txt"
+    args = ["--startle-batch", str(path)]
+    with raises(BatchFileError, match=f"Cannot read batch file `{path}`: No such file"):
+        start([add, fail], args=args, catch=False)
+    with raises(SystemExit) as exc:
+        start([add, fail], args=args)
+    assert exc.value.code == 1
+    assert "Cannot read batch file" in capsys.readouterr().out
+
+
+def test_reserved_after_separator():
+    def echo(*words: str) -> list[str]:
+        return list(words)
+
+    assert start(echo, args=["--", "--startle-batch", "x"]) == ["--startle-batch", "x"]
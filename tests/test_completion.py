@@ -0,0 +1,308 @@
+import os
+import shutil
+import subprocess
+import sys
+from enum import Enum
+from pathlib import Path
+from typing import Any, Literal
+
+import startle._completion
+from pytest import CaptureFixture, MonkeyPatch, mark, raises
+from startle import completion_script, register, start
+from startle._start import make_parser
+from startle.error import UnsupportedShellError
+
+
+class Color(Enum):
+    RED = 1
+    DARK_BLUE = 2
+
+
+def add(
+    a: int,
+    b: int,
+    *,
+    mode: Literal["fast", "slow"] = "fast",
+    verbose: bool = False,
+) -> int:
+    """
+    Add two numbers.
+    """
+    return a + b
+
+
+def cat(
+    path: Path,
+    *more: Path,
+    color: Color = Color.RED,
+    tags: list[str] = [],
+) -> None:
+    """
+    Print files.
+    """
+
+
+def up(steps: int = 1) -> None:
+    """
+    Migrate up.
+    """
+
+
+def down(steps: int = 1) -> None:
+    """
+    Migrate down.
+    """
+
+
+CMDS: Any = {"add": add, "cat": cat, "db": {"migrate": [up, down]}}
+
+
+def test_completion_spec():
+    spec = make_parser(add).completion_spec()
+    assert spec == {
+        "options": [
+            {"names": ["--a", "-a"], "value": {"nary": False, "complete": None}},
+            {"names": ["--b", "-b"], "value": {"nary": False, "complete": None}},
+            {
+                "names": ["--mode", "-m"],
+                "value": {"nary": False, "complete": ["fast", "slow"]},
+            },
+            {"names": ["--verbose", "-v"], "value": None},
+            {"names": ["--help"], "value": None},
+        ],
+        "positionals": [None, None],
+        "rest": None,
+    }
+
+    spec = make_parser(cat).completion_spec()
+    assert spec["positionals"] == ["path"]
+    assert spec["rest"] == "path"
+    assert spec["options"][1]["value"]["complete"] == ["red", "dark-blue"]
+    assert spec["options"][2]["value"] == {"nary": True, "complete": None}
+
+    spec = make_parser(CMDS, default="add").completion_spec()
+    assert list(spec["commands"]) == ["add", "cat", "db"]
+    assert spec["default"] == "add"
+    assert list(spec["commands"]["db"]["commands"]["migrate"]["commands"]) == [
+        "up",
+        "down",
+    ]
+
+
+@mark.parametrize("shell", ["bash", "zsh", "fish"])
+def test_completion_script_hash(shell: str):
+    def hash_line(script: str) -> str:
+        return next(line for line in script.splitlines() if "spec-hash" in line)
+
+    script = completion_script(CMDS, shell, name="tool")
+    assert hash_line(script) == hash_line(completion_script(CMDS, shell, name="tool"))
+    assert hash_line(script) != hash_line(completion_script([add], shell, name="tool"))
+    assert "_tool_candidates" in script or shell == "fish"
+
+
+def test_unsupported_shell():
+    with raises(UnsupportedShellError, match="Unsupported shell `tcsh`!"):
+        completion_script(add, "tcsh")
+
+
+def test_start_completion(capsys: CaptureFixture[str]):
+    with raises(SystemExit) as exc:
+        start(CMDS, name="tool", args=["--startle-completion", "fish"])
+    assert exc.value.code == 0
+    out = capsys.readouterr().out
+    assert out == completion_script(CMDS, "fish", name="tool")
+
+    with raises(SystemExit):
+        start(CMDS, name="tool", args=["--startle-completion=hash"])
+    assert capsys.readouterr().out.strip() in out
+
+    with raises(SystemExit) as exc:
+        start(CMDS, name="tool", args=["--startle-completion", "tcsh"])
+    assert exc.value.code == 1
+    assert capsys.readouterr().out.startswith("Error: Unsupported shell `tcsh`!")
+
+
+def _complete_bash(script: str, words: list[str], cwd: Path) -> list[str]:
+    probe = """
+    COMP_WORDS=("$@")
+    COMP_CWORD=$((${#COMP_WORDS[@]} - 1))
+    _tool
+    printf '%s\\n' "${COMPREPLY[@]}"
+    """
+    result = subprocess.run(
+        ["bash", "-c", script + probe, "bash", "tool", *words],
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+        check=True,
+    )
+    return sorted(result.stdout.split())
+
+
+@mark.skipif(shutil.which("bash") is None, reason="bash is not available")
+def test_bash_completion(tmp_path: Path):
+    (tmp_path / "a.txt").touch()
+    (tmp_path / "b.txt").touch()
+
+    script = completion_script(CMDS, "bash", name="tool")
+
+    def complete(*words: str) -> list[str]:
+        return _complete_bash(script, list(words), tmp_path)
+
+    assert complete("") == ["add", "cat", "db"]
+    assert complete("d") == ["db"]
+    assert complete("db", "migrate", "") == ["down", "up"]
+    assert complete("db", "migrate", "up", "--") == ["--help", "--steps"]
+    assert complete("add", "--mode", "") == ["fast", "slow"]
+    assert complete("add", "-m", "s") == ["slow"]
+    assert complete("add", "1", "-v", "--mode", "fast", "--v") == ["--verbose"]
+    assert complete("cat", "a") == ["a.txt"]
+    assert complete("cat", "a.txt", "") == ["a.txt", "b.txt"]
+    assert complete("cat", "--color", "") == ["dark-blue", "red"]
+    assert complete("cat", "--tags", "x", "") == []
+    assert complete("cat", "--tags", "x", "--c") == ["--color"]
+
+    script = completion_script(CMDS, "bash", name="tool", default="add")
+    assert _complete_bash(script, ["--m"], tmp_path) == ["--mode"]
+    assert _complete_bash(script, ["--mode", ""], tmp_path) == ["fast", "slow"]
+
+    script = completion_script(cat, "bash", name="tool")
+    assert _complete_bash(script, ["--color", "d"], tmp_path) == ["dark-blue"]
+    assert _complete_bash(script, ["--", "-"], tmp_path) == []
+
+
+def test_parse_partial():
+    args = make_parser(add)
+    state = args.parse_partial(["1", "--mode"])
+    assert state.pending is not None and state.pending.name.long == "mode"
+    assert state.positional_count == 1
+
+    state = args.parse_partial(["1", "--mode", "fast", "-v"])
+    assert state.pending is None
+    assert [str(arg.name) for arg in state.used] == ["mode", "verbose"]
+    assert state.next_positional is not None
+    assert state.next_positional.name.long == "b"
+
+    state = args.parse_partial(["--a", "1", "2"])
+    assert state.next_positional is None
+
+    state = args.parse_partial(["--nope", "x", "y", "z", "--mode=slow"])
+    assert state.pending is None and state.positional_count == 3
+
+    args = make_parser(cat)
+    state = args.parse_partial(["a", "b", "--tags", "x"])
+    assert state.nary is not None and state.nary.name.long == "tags"
+    state = args.parse_partial(["--tags", "x", "--", "-c"])
+    assert state.nary is None and state.positional_only
+    assert state.next_positional is not None
+
+
+def test_complete(tmp_path: Path, monkeypatch: MonkeyPatch):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.py").touch()
+    (tmp_path / "setup.py").touch()
+    (tmp_path / ".hidden").touch()
+    monkeypatch.chdir(tmp_path)
+
+    args = make_parser(add)
+    assert args.complete([], "--") == ["--a", "--b", "--help", "--mode", "--verbose"]
+    assert args.complete(["--verbose", "--mode", "fast"], "--") == [
+        "--a",
+        "--b",
+        "--help",
+    ]
+    assert args.complete(["--mode"], "") == ["fast", "slow"]
+    assert args.complete([], "--mode=s") == ["--mode=slow"]
+    assert args.complete([], "--verbose=") == []
+    assert args.complete(["1"], "") == []
+
+    args = make_parser(cat)
+    assert args.complete([], "") == ["setup.py", "src/"]
+    assert args.complete(["x"], "src/") == ["src/main.py"]
+    assert args.complete([], ".h") == [".hidden"]
+    assert args.complete(["--color"], "d") == ["dark-blue"]
+    assert args.complete(["--tags", "x", "--tags", "y"], "--t") == ["--tags"]
+
+    cmds = make_parser(CMDS)
+    assert cmds.complete(["cat", "--color"], "") == ["red", "dark-blue"]
+    assert cmds.complete(["db", "migrate", "up"], "--") == ["--help", "--steps"]
+
+
+class Region(str):
+    pass
+
+
+def test_dynamic_completion(monkeypatch: MonkeyPatch, capsys: CaptureFixture[str]):
+    monkeypatch.setattr(startle._registry.DEFAULT, "completers", {})
+    register(Region, parser=Region, completer=lambda prefix: ["eu-1", "eu-2", "us-1"])
+
+    def deploy(region: Region, *, replicas: int = 1) -> None:
+        pass
+
+    assert make_parser(deploy).completion_spec()["positionals"] == ["dynamic"]
+    assert make_parser(deploy).complete([], "eu") == ["eu-1", "eu-2"]
+
+    monkeypatch.setenv("_STARTLE_COMPLETE", "deploy")
+    monkeypatch.setenv("COMP_LINE", "deploy u --replicas 2")
+    monkeypatch.setenv("COMP_POINT", "8")
+    with raises(SystemExit) as exc:
+        start(deploy, name="deploy")
+    assert exc.value.code == 0
+    assert capsys.readouterr().out == "us-1\n"
+
+    monkeypatch.setenv("COMP_LINE", "deploy --replicas 2 ")
+    monkeypatch.setenv("COMP_POINT", "20")
+    with raises(SystemExit):
+        start(deploy, name="deploy")
+    assert capsys.readouterr().out == "eu-1\neu-2\nus-1\n"
+
+
+def test_inherited_completion_environment(monkeypatch: MonkeyPatch):
+    def deploy(region: str, *, replicas: int = 1) -> tuple[str, int]:
+        return region, replicas
+
+    # e.g. run from a completion function, without being the program to complete
+    monkeypatch.setenv("COMP_LINE", "other --x ")
+    monkeypatch.setenv("COMP_POINT", "10")
+    assert start(deploy, name="deploy", args=["eu"]) == ("eu", 1)
+    monkeypatch.setenv("_STARTLE_COMPLETE", "other")
+    assert start(deploy, name="deploy", args=["eu"]) == ("eu", 1)
+
+
+@mark.skipif(shutil.which("bash") is None, reason="bash is not available")
+def test_bash_dynamic_completion(tmp_path: Path):
+    tool = tmp_path / "tool"
+    tool.write_text(
+        f"#!{sys.executable}\n"
+        "from startle import register, start\n"
+        "class Region(str): pass\n"
+        "register(Region, parser=Region, completer=lambda p: ['eu-1', 'us-1'])\n"
+        "def deploy(region: Region, *, replicas: int = 1): pass\n"
+        "start(deploy)\n"
+    )
+    tool.chmod(0o755)
+    env = {**os.environ, "PYTHONPATH": str(Path(startle.__file__).parent.parent)}
+    script = subprocess.run(
+        [str(tool), "--startle-completion", "bash"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    ).stdout
+
+    probe = """
+    COMP_WORDS=("$@")
+    COMP_CWORD=$((${#COMP_WORDS[@]} - 1))
+    COMP_LINE="$*"
+    COMP_POINT=${#COMP_LINE}
+    _tool
+    printf '%s\\n' "${COMPREPLY[@]}"
+    """
+    result = subprocess.run(
+        ["bash", "-c", script + probe, "bash", str(tool), "--replicas", "2", "u"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    assert result.stdout.split() == ["us-1"]
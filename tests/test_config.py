@@ -0,0 +1,197 @@
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Literal
+
+from pytest import MonkeyPatch, mark, raises
+from startle import start
+from startle._config import _docs, load
+from startle.error import ConfigFileError, ValueParsingError
+
+
+@dataclass
+class Optimizer:
+    lr: float = 0.1
+    momentum: float = 0.0
+
+
+@dataclass
+class Model:
+    depth: int = 1
+    optimizer: Optimizer = field(default_factory=Optimizer)
+
+
+def train(
+    *,
+    epochs: int = 1,
+    tags: tuple[str, ...] = (),
+    verbose: bool = False,
+    model: Model = field(default_factory=Model),
+) -> tuple[int, tuple[str, ...], bool, Model]:
+    return epochs, tags, verbose, model
+
+
+def fit(*, epochs: int = 1, tags: tuple[str, ...] = (), verbose: bool = False):
+    return epochs, tags, verbose
+
+
+def migrate(*, steps: int = 1) -> int:
+    return steps
+
+
+CONFIG = {
+    "epochs": 10,
+    "tags": ["a", "b"],
+    "verbose": True,
+    "model": {"depth": 3, "optimizer": {"lr": 0.5}},
+}
+
+needs_toml = mark.skipif(sys.version_info < (3, 11), reason="needs tomllib")
+
+
+def write(path: Path, doc: object) -> Path:
+    path.write_text(json.dumps(doc))
+    return path
+
+
+def test_config_file(tmp_path: Path):
+    path = write(tmp_path / "fit.json", {"epochs": 10, "tags": "a", "verbose": True})
+    assert start(fit, args=[], config=path) == (10, ("a",), True)
+    assert start(fit, args=[], config=str(path)) == (10, ("a",), True)
+
+    # the command line takes precedence
+    args = ["--epochs", "2", "--tags", "c", "d"]
+    assert start(fit, args=args, config=path) == (2, ("c", "d"), True)
+
+    # later files take precedence, and `--startle-config` comes last
+    other = write(tmp_path / "other.json", {"epochs": 20, "verbose": False})
+    assert start(fit, args=[], config=[path, other]) == (20, ("a",), False)
+    args = ["--startle-config", str(path)]
+    assert start(fit, args=args, config=other) == (10, ("a",), True)
+
+
+@mark.parametrize("naming", ["flat", "nested"])
+def test_config_recurse(tmp_path: Path, naming: Literal["flat", "nested"]):
+    path = write(tmp_path / "train.json", CONFIG)
+    depth = "--depth" if naming == "flat" else "--model.depth"
+    epochs, tags, verbose, model = start(
+        train,
+        args=[depth, "4"],
+        recurse=True,
+        naming=naming,
+        config=path,
+    )
+    assert (epochs, tags, verbose) == (10, ("a", "b"), True)
+    assert model == Model(4, Optimizer(0.5, 0.0))
+
+
+def test_config_dotted_and_flat_keys(tmp_path: Path):
+    path = write(tmp_path / "train.json", {"model.depth": 2, "momentum": 0.9})
+    *_, model = start(train, args=[], recurse=True, config=path)
+    assert model == Model(2, Optimizer(0.1, 0.9))
+
+
+def test_config_commands(tmp_path: Path):
+    doc = {"epochs": 3, "steps": 5, "db": {"migrate": {"steps": 7}}}
+    path = write(tmp_path / "app.json", doc)
+    commands = {"fit": fit, "db": {"migrate": migrate}}
+    assert start(commands, args=["fit"], config=path) == (3, (), False)
+    assert start(commands, args=["db", "migrate"], config=path) == 7
+    assert start(commands, args=["db", "migrate", "--steps", "1"], config=path) == 1
+
+
+@needs_toml
+def test_config_toml(tmp_path: Path):
+    path = tmp_path / "train.toml"
+    path.write_text(
+        'epochs = 10\ntags = ["a", "b"]\nverbose = true\n\n'
+        "[model]\ndepth = 3\n\n[model.optimizer]\nlr = 0.5\n"
+    )
+    *_, model = start(train, args=[], recurse=True, config=path)
+    assert model == Model(3, Optimizer(0.5, 0.0))
+
+
+def test_config_cache(tmp_path: Path):
+    path = write(tmp_path / "fit.json", {"epochs": 10})
+    assert load(path) == {"epochs": 10}
+
+    # cached in the process, and on disk, by path, mtime and size
+    _docs.clear()
+    stat = path.stat()
+    path.write_text(json.dumps({"epochs": 99}))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert load(path) == {"epochs": 10}
+
+    path.write_text(json.dumps({"epochs": 100}))
+    assert load(path) == {"epochs": 100}
+
+
+def test_config_errors(tmp_path: Path):
+    with raises(ConfigFileError, match="Cannot load config file `.*missing.json`"):
+        start(fit, args=[], config=tmp_path / "missing.json", catch=False)
+
+    path = tmp_path / "fit.yaml"
+    path.write_text("epochs: 1")
+    with raises(ConfigFileError, match=re.escape("expected a `.toml` or `.json`")):
+        start(fit, args=[], config=path, catch=False)
+
+    path = tmp_path / "bad.json"
+    path.write_text("{")
+    with raises(ConfigFileError):
+        start(fit, args=[], config=path, catch=False)
+
+    path = write(tmp_path / "fit.json", {"epochs": "many"})
+    with raises(ValueParsingError, match="Cannot parse integer from `many`!"):
+        start(fit, args=[], config=path, catch=False)
+
+
+def test_env(monkeypatch: MonkeyPatch):
+    monkeypatch.setenv("APP_EPOCHS", "5")
+    monkeypatch.setenv("APP_TAGS", "a,b")
+    monkeypatch.setenv("APP_VERBOSE", "yes")
+    monkeypatch.setenv("OTHER_EPOCHS", "6")
+    assert start(fit, args=[], env_prefix="APP_") == (5, ("a", "b"), True)
+    assert start(fit, args=["--epochs", "2"], env_prefix="APP_")[0] == 2
+    assert start(fit, args=[], env_prefix="OTHER_") == (6, (), False)
+    assert start(fit, args=[])[0] == 1  # opt-in
+
+    monkeypatch.setenv("APP_TAGS", "a:b,c")
+    assert start(fit, args=[], env_prefix="APP_", env_delimiter=":")[1] == (
+        "a",
+        "b,c",
+    )
+    assert start(fit, args=[], env_prefix="APP_", env_delimiter="")[1] == ("a:b,c",)
+
+
+@mark.parametrize("naming", ["flat", "nested"])
+def test_env_recurse(monkeypatch: MonkeyPatch, naming: Literal["flat", "nested"]):
+    monkeypatch.setenv("APP_MODEL_OPTIMIZER_LR", "0.5")
+    monkeypatch.setenv("APP_MODEL_DEPTH", "3")
+    *_, model = start(train, args=[], recurse=True, naming=naming, env_prefix="APP_")
+    assert model == Model(3, Optimizer(0.5, 0.0))
+    if naming == "flat":
+        monkeypatch.setenv("APP_MOMENTUM", "0.9")
+        *_, model = start(train, args=[], recurse=True, env_prefix="APP_")
+        assert model == Model(3, Optimizer(0.5, 0.9))
+
+
+def test_env_over_config(tmp_path: Path, monkeypatch: MonkeyPatch):
+    path = write(tmp_path / "fit.json", {"epochs": 10, "verbose": True})
+    monkeypatch.setenv("APP_EPOCHS", "20")
+    result = start(fit, args=[], config=path, env_prefix="APP_")
+    assert result == (20, (), True)
+    result = start(fit, args=["--epochs", "30"], config=path, env_prefix="APP_")
+    assert result == (30, (), True)
+
+
+def test_env_commands(monkeypatch: MonkeyPatch):
+    monkeypatch.setenv("APP_STEPS", "4")
+    commands = {"fit": fit, "db": {"migrate": migrate}}
+    assert start(commands, args=["db", "migrate"], env_prefix="APP_") == 4
+
+    monkeypatch.setenv("APP_STEPS", "four")
+    with raises(ValueParsingError, match="Cannot parse integer from `four`!"):
+        start(commands, args=["db", "migrate"], env_prefix="APP_", catch=False)
@@ -0,0 +1,242 @@
+import asyncio
+import os
+import re
+import time
+from pathlib import Path
+
+from pytest import CaptureFixture, mark, raises
+from startle import start
+from startle.error import (
+    FanOutError,
+    FanOutOptionError,
+    FanOutParamError,
+    ValueParsingError,
+)
+
+
+def count(files: list[Path], /, *, suffix: str = "") -> list[tuple[str, int, int]]:
+    """
+    Count the lines of files, along with the process that counted them.
+    """
+    return [
+        (f.name + suffix, len(f.read_text().splitlines()), os.getpid()) for f in files
+    ]
+
+
+def square(nums: tuple[int, ...], *, offset: int = 0) -> list[int]:
+    if 13 in nums:
+        raise ValueError("unlucky")
+    return [n * n + offset for n in nums]
+
+
+async def asquare(*, nums: list[int]) -> list[int]:
+    return [n * n for n in nums]
+
+
+def two_lists(a: list[int], b: list[int]) -> None:
+    pass
+
+
+def scalar(a: int, b: list[int]) -> None:
+    pass
+
+
+def pair_of_ints(a: int, b: int) -> int:
+    return a + b
+
+
+@mark.parametrize("workers", [1, 3])
+def test_fan_out(tmp_path: Path, workers: int):
+    files = []
+    for i in range(7):
+        path = tmp_path / f"{i}.txt"
+        path.write_text("line\n" * i)
+        files.append(str(path))
+
+    results = start(
+        count,
+        args=[*files, "--suffix", "!"],
+        fan_out="files",
+        workers=workers,
+    )
+    assert [r[0][:2] for r in results] == [(f"{i}.txt!", i) for i in range(7)]
+    pids = {r[0][2] for r in results}
+    if workers == 1:
+        assert pids == {os.getpid()}
+    else:
+        assert os.getpid() not in pids and 1 <= len(pids) <= workers
+
+
+def test_fan_out_chunks():
+    nums = [str(i) for i in range(10)]
+    results = start(
+        square, args=[*nums, "--offset", "1"], fan_out="nums", workers=2, chunk_size=4
+    )
+    assert results == [[1, 2, 5, 10], [17, 26, 37, 50], [65, 82]]
+
+
+def test_fan_out_keyword_and_async():
+    results = start(asquare, args=["--nums", "1", "2", "3"], fan_out="nums", workers=1)
+    assert results == [[1], [4], [9]]
+
+
+def test_startle_jobs():
+    args = ["1", "2", "3", "--startle-jobs", "2"]
+    assert start(square, args=args) == [[1], [4], [9]]
+    assert start(square, args=["1", "2"]) == [1, 4]  # without fanning out
+
+    with raises(ValueParsingError, match="Cannot parse integer from `many`!"):
+        start(square, args=["1", "--startle-jobs", "many"], catch=False)
+
+
+@mark.parametrize("workers", [1, 2])
+def test_fan_out_failure(workers: int):
+    args = ["1", "13", "2", "13"]
+    with raises(
+        FanOutError, match=re.escape("Failed on `13`: ValueError: unlucky")
+    ) as e:
+        start(square, args=args, fan_out="nums", workers=workers)
+    assert e.value.items == [13]
+    assert isinstance(e.value.__cause__, ValueError)
+
+
+def test_fan_out_option_errors(capsys: CaptureFixture[str]):
+    # asked for on the command line, hence reported as an option error
+    with raises(
+        FanOutOptionError,
+        match=re.escape(
+            "Cannot tell which argument of `two_lists()` to fan out over for "
+            "`--startle-jobs`!"
+        ),
+    ):
+        start(two_lists, args=["1", "--b", "2", "--startle-jobs", "2"], catch=False)
+    with raises(FanOutOptionError, match=re.escape("`--startle-concurrency`")):
+        start(pair_of_ints, args=["1", "2", "--startle-concurrency", "2"], catch=False)
+    with raises(SystemExit) as e:
+        start(pair_of_ints, args=["1", "2", "--startle-jobs", "4"])
+    assert e.value.code == 1
+    assert "Cannot tell which argument of `pair_of_ints()`" in capsys.readouterr().out
+
+
+def test_fan_out_param_errors():
+    with raises(
+        FanOutParamError, match=re.escape("Cannot fan out over `a` of `scalar()`!")
+    ):
+        start(scalar, args=["1", "2"], fan_out="a")
+    with raises(
+        FanOutParamError, match=re.escape("Cannot fan out over `c` of `scalar()`!")
+    ):
+        start(scalar, args=["1", "2"], fan_out="c")
+
+
+def test_fan_out_commands():
+    results = start(
+        [square, scalar], args=["square", "2", "3"], fan_out="nums", workers=1
+    )
+    assert results == [[4], [9]]
+
+
+async def wait(delays: list[float]) -> float:
+    await asyncio.sleep(delays[0])
+    return delays[0]
+
+
+@mark.parametrize("ordered", [True, False])
+def test_fan_out_async(ordered: bool):
+    args = ["0.3", "0.1", "0.2", "0", "--startle-concurrency", "4"]
+    begin = time.perf_counter()
+    results = start(wait, args=args, ordered=ordered)
+    assert time.perf_counter() - begin < 0.55  # concurrently, not 0.6s in total
+    if ordered:
+        assert results == [0.3, 0.1, 0.2, 0.0]
+    else:
+        assert results == [0.0, 0.1, 0.2, 0.3]
+
+
+def test_fan_out_async_bounded():
+    in_flight, peak = 0, 0
+
+    async def track(items: list[int]) -> int:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return items[0]
+
+    items = [str(i) for i in range(20)]
+    assert start(track, args=items, fan_out="items", workers=3) == list(range(20))
+    assert peak == 3
+
+
+def test_fan_out_async_timeout():
+    args = ["0.01", "0.5", "0.01"]
+    begin = time.perf_counter()
+    with raises(FanOutError, match=re.escape("Failed on `0.5`: TimeoutError")) as e:
+        start(wait, args=args, fan_out="delays", workers=3, item_timeout=0.1)
+    assert time.perf_counter() - begin < 0.4
+    assert isinstance(e.value.__cause__, asyncio.TimeoutError)
+
+
+def test_fan_out_pool_as_completed():
+    nums = [str(i) for i in range(10)]
+    results = start(square, args=nums, fan_out="nums", workers=3, ordered=False)
+    assert sorted(r[0] for r in results) == [i * i for i in range(10)]
+
+
+@mark.parametrize("workers", [1, 3])
+def test_fan_out_stream(capsys: CaptureFixture[str], workers: int):
+    nums = [str(i) for i in range(5)]
+    start(square, args=nums, fan_out="nums", workers=workers, stream="jsonl")
+    assert capsys.readouterr().out == "[0]\n[1]\n[4]\n[9]\n[16]\n"
+
+
+def test_fan_out_lazy():
+    from startle._fan_out import FanOut
+    from startle._inspect.make_args import make_args_from_func
+
+    args = make_args_from_func(square)
+    args.parse([str(i) for i in range(100)] + ["13"])
+    f_args, f_kwargs = args.make_func_args()
+    results = FanOut("nums", workers=2).bind(
+        square, args, f_args, f_kwargs, lazy=True
+    )()
+    assert [next(results) for _ in range(3)] == [[0], [1], [4]]
+    results.close()  # e.g. the reader of a stream went away, before chunk `13`
+
+
+@mark.parametrize("ordered", [True, False])
+def test_fan_out_async_stream(capsys: CaptureFixture[str], ordered: bool):
+    args = ["0.2", "0.1", "0", "--startle-concurrency", "3"]
+    start(wait, args=args, ordered=ordered, stream="lines")
+    out = capsys.readouterr().out
+    assert out == ("0.2\n0.1\n0.0\n" if ordered else "0.0\n0.1\n0.2\n")
+
+
+def test_fan_out_async_lazy():
+    from startle._fan_out import FanOut
+    from startle._inspect.make_args import make_args_from_func
+
+    started: list[float] = []
+
+    async def note(delays: list[float]) -> float:
+        started.append(delays[0])
+        await asyncio.sleep(delays[0])
+        return delays[0]
+
+    args = make_args_from_func(note)
+    args.parse(["0", "0.01", "10", "10", "10"])
+    f_args, f_kwargs = args.make_func_args()
+    fan = FanOut("delays", workers=2, ordered=False)
+    results = fan.bind(note, args, f_args, f_kwargs, lazy=True)()
+
+    async def first_two() -> list[float]:
+        try:
+            return [await anext(results), await anext(results)]
+        finally:
+            await results.aclose()  # cancels the calls in flight
+
+    begin = time.perf_counter()
+    assert asyncio.run(first_two()) == [0.0, 0.01]
+    assert time.perf_counter() - begin < 1
+    assert started == [0, 0.01, 10, 10]
@@ -0,0 +1,131 @@
+import os
+import sys
+from enum import Enum
+from pathlib import Path
+from typing import Literal
+
+from pytest import CaptureFixture, MonkeyPatch, mark, raises
+from rich.console import Console
+from startle import start
+from startle._ansi import page
+from startle._inspect.make_args import make_args_from_func
+from startle.error import (
+    MissingOptionValueError,
+    NoChoicesError,
+    ParserConfigError,
+    UnexpectedOptionError,
+)
+
+from ._utils import remove_trailing_spaces
+
+Big = Enum("Big", [f"member_{i}" for i in range(3000)])
+
+
+def f(
+    level: Literal["a", "b", "c", "d", "e", "f", "g", "h", "i", "j", "k", "l"],
+    /,
+    *,
+    big: Big = Big.member_1,
+    small: Literal["x", "y"] = "x",
+    count: int = 0,
+) -> None:
+    pass
+
+
+def test_truncated_choices(capsys: CaptureFixture[str], monkeypatch: MonkeyPatch):
+    monkeypatch.setenv("COLUMNS", "200")
+    args = make_args_from_func(f, program_name="prog")
+
+    console = Console(width=200, highlight=False, color_system=None)
+    with console.capture() as capture:
+        args.print_help(console)
+    rich = remove_trailing_spaces(capture.get())
+
+    args.print_help()
+    plain = remove_trailing_spaces(capsys.readouterr().out)
+    assert plain == rich
+
+    assert "member-2999" not in plain
+    assert "<level:a|b|c|d|e|...>" in plain
+    assert "--big member-0|member-1|member-2|member-3|member-4|..." in plain
+    assert "--small x|y " in plain
+    assert "(+2995 more, see --help-choices big)" in plain
+    assert "(+7 more, see --help-choices level)" in plain
+    assert "--help-choices <option>" in plain
+    assert "List all choices of an option and exit." in plain
+
+
+@mark.parametrize(
+    "cli_args",
+    [
+        ["--help-choices", "big"],
+        ["--help-choices", "--big"],
+        ["--help-choices=big"],
+        ["a", "--count", "1", "--help-choices", "-b"],
+    ],
+)
+def test_help_choices(capsys: CaptureFixture[str], cli_args: list[str]):
+    with raises(SystemExit) as exc:
+        start(f, args=cli_args, catch=False)
+    assert exc.value.code == 0
+    out = capsys.readouterr().out.splitlines()
+    assert len(out) == 3000
+    assert out[:2] == ["member-0", "member-1"]
+
+    with raises(SystemExit):
+        start(f, args=["--help-choices", "level"], catch=False)
+    assert capsys.readouterr().out.split() == list("abcdefghijkl")
+
+
+def test_help_choices_errors():
+    with raises(NoChoicesError, match="Option `c|count` has no choices to list!"):
+        start(f, args=["--help-choices", "count"], catch=False)
+    with raises(UnexpectedOptionError, match="Unexpected option `nope`!"):
+        start(f, args=["--help-choices", "nope"], catch=False)
+    with raises(MissingOptionValueError, match="Option `help-choices` is missing"):
+        start(f, args=["--help-choices"], catch=False)
+
+
+def test_help_choices_reserved():
+    def g(*, help_choices: int = 0) -> None:
+        pass
+
+    with raises(
+        ParserConfigError,
+        match=r"Cannot use `help_choices` as parameter name in `g\(\)`!",
+    ):
+        start(g, args=[], catch=False)
+
+
+def test_page(monkeypatch: MonkeyPatch, tmp_path: Path):
+    out = tmp_path / "paged"
+    pager = tmp_path / "pager.py"
+    pager.write_text(
+        f"import sys; open({str(out)!r}, 'wb').write(sys.stdin.buffer.read())"
+    )
+
+    class Tty:
+        def isatty(self) -> bool:
+            return True
+
+        def fileno(self) -> int:
+            return 1
+
+    monkeypatch.setattr(sys, "stdout", Tty())
+    monkeypatch.setattr(os, "get_terminal_size", lambda fd: os.terminal_size((80, 3)))
+
+    # opt-in, even if `PAGER` is set
+    monkeypatch.delenv("STARTLE_PAGER", raising=False)
+    monkeypatch.setenv("PAGER", f"{sys.executable} {pager}")
+    assert not page(b"1\n2\n3\n4\n")
+    assert not out.exists()
+
+    monkeypatch.setenv("STARTLE_PAGER", f"{sys.executable} {pager}")
+    assert not page(b"short\n")
+    assert page(b"1\n2\n3\n4\n")
+    assert out.read_bytes() == b"1\n2\n3\n4\n"
+
+    monkeypatch.setenv("STARTLE_PAGER", "")
+    assert not page(b"1\n2\n3\n4\n")
+    monkeypatch.setenv("STARTLE_PAGER", "no-such-pager-command")
+    assert not page(b"1\n2\n3\n4\n")
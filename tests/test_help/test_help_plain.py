@@ -0,0 +1,261 @@
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+
+from pytest import CaptureFixture, MonkeyPatch, mark
+from rich.console import Console
+from startle import Registry
+from startle._inspect.make_args import make_args_from_class, make_args_from_func
+from startle._start import make_parser
+from startle.args import Args
+from startle.cmds import Cmds
+
+from ._utils import remove_trailing_spaces
+
+
+class Mode(Enum):
+    FAST = 1
+    EXTRA_SLOW = 2
+
+
+CALLS: list[str] = []
+
+
+def items() -> list[str]:
+    CALLS.append("items")
+    return ["a", "b"]
+
+
+@dataclass
+class Config:
+    items: list[str] = field(default_factory=items)
+    count: int = 1
+
+
+def fusion(
+    left: Path,
+    right: Path,
+    /,
+    output: Path,
+    *extra: int,
+    mode: Mode = Mode.FAST,
+    tags: list[str] = [],
+    name: str = "",
+    verbose: bool = False,
+    **kwargs: float,
+) -> None:
+    """
+    Fuse two files.
+
+    Args:
+        left: The left file.
+        right: The right file.
+        output: Where to write the fused file.
+        mode: How fast to fuse.
+        tags: Tags to attach.
+        name: An optional name.
+        verbose: Whether to be verbose.
+    """
+
+
+def up(steps: int = 1) -> None:
+    """
+    Apply migrations.
+    """
+
+
+def down(steps: int = 1) -> None:
+    """
+    Revert migrations.
+    """
+
+
+def rich_help(parser: Args | Cmds, width: int, usage_only: bool = False) -> str:
+    console = Console(width=width, highlight=False, color_system=None)
+    with console.capture() as capture:
+        parser.print_help(console, usage_only=usage_only)
+    return remove_trailing_spaces(capture.get())
+
+
+def plain_help(
+    parser: Args | Cmds, capsys: CaptureFixture[str], usage_only: bool = False
+) -> str:
+    parser.print_help(usage_only=usage_only)
+    return remove_trailing_spaces(capsys.readouterr().out)
+
+
+@mark.parametrize("usage_only", [False, True])
+@mark.parametrize("width", [120, 60])
+def test_plain_matches_rich(
+    capsys: CaptureFixture[str],
+    monkeypatch: MonkeyPatch,
+    usage_only: bool,
+    width: int,
+):
+    monkeypatch.setenv("COLUMNS", str(width))
+    parser = make_args_from_func(fusion, program_name="fusion")
+    plain = plain_help(parser, capsys, usage_only)
+    if width == 120:
+        assert plain == rich_help(parser, width, usage_only)
+    else:
+        # rich balances column widths differently, but the usage line is the same
+        expected = rich_help(parser, width, usage_only)
+        assert plain.split("where")[0] == expected.split("where")[0]
+        assert max(len(line) for line in plain.splitlines()) <= width
+
+    cmds = make_parser({"up": up, "down": down}, name="db", default="up")
+    assert isinstance(cmds, Cmds)
+    assert plain_help(cmds, capsys, usage_only) == rich_help(cmds, width, usage_only)
+
+
+def test_color(capsys: CaptureFixture[str], monkeypatch: MonkeyPatch):
+    parser = make_args_from_func(fusion, program_name="fusion")
+
+    monkeypatch.setenv("FORCE_COLOR", "1")
+    parser.print_help()
+    assert "\x1b[1;32m--output\x1b[0m" in capsys.readouterr().out
+
+    monkeypatch.setenv("NO_COLOR", "1")
+    parser.print_help()
+    assert "\x1b[" not in capsys.readouterr().out
+
+
+def test_cache(capsys: CaptureFixture[str], monkeypatch: MonkeyPatch, tmp_path: Path):
+    monkeypatch.setenv("STARTLE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("COLUMNS", "80")
+    parser = make_args_from_class(Config, program_name="f")
+
+    parser.print_help()
+    first = capsys.readouterr().out
+    assert "(default: ['a', 'b'])" in first and CALLS == ["items"]
+    [entry] = (tmp_path / "help").iterdir()
+    assert entry.read_text() == first
+
+    # a cache hit writes the stored bytes, without calling default factories
+    CALLS.clear()
+    entry.write_text("cached help\n")
+    parser.print_help()
+    assert capsys.readouterr().out == "cached help\n"
+    assert CALLS == []
+
+    # a different width or color mode is a separate entry
+    monkeypatch.setenv("COLUMNS", "100")
+    parser.print_help()
+    assert "Show this help message and exit." in capsys.readouterr().out
+    monkeypatch.setenv("FORCE_COLOR", "1")
+    parser.print_help()
+    assert "\x1b[" in capsys.readouterr().out
+    assert len(list((tmp_path / "help").iterdir())) == 3
+
+    # so is a changed spec
+    parser = make_args_from_class(Config, program_name="g")
+    parser.print_help()
+    assert "\n  g [" in capsys.readouterr().out
+    assert len(list((tmp_path / "help").iterdir())) == 4
+
+
+class Opaque:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+def test_cache_unstable_default(
+    capsys: CaptureFixture[str], monkeypatch: MonkeyPatch, tmp_path: Path
+):
+    monkeypatch.setenv("STARTLE_CACHE_DIR", str(tmp_path))
+    registry = Registry()
+    registry.register(datetime, parser=datetime.fromisoformat)
+    registry.register(Opaque, parser=Opaque)
+
+    def f(*, when: datetime = datetime(2024, 1, 2), blob: str = "x") -> None:
+        pass
+
+    # defaults with a stable `repr` are part of the key
+    parser = make_args_from_func(f, program_name="f", registry=registry)
+    parser.print_help()
+    assert "(default: 2024-01-02 00:00:00)" in capsys.readouterr().out
+    assert len(list((tmp_path / "help").iterdir())) == 1
+
+    # others, e.g. with the address of the object, are not cached
+    def g(*, thing: Opaque = Opaque("x")) -> None:
+        pass
+
+    parser = make_args_from_func(g, program_name="g", registry=registry)
+    assert parser._help_key(False) is None
+    parser.print_help()
+    assert "(default: <" in capsys.readouterr().out
+    assert len(list((tmp_path / "help").iterdir())) == 1
+
+
+def test_cache_default_factory_code():
+    @dataclass
+    class A:
+        items: list[int] = field(default_factory=lambda: [1])
+
+    @dataclass
+    class B:
+        items: list[int] = field(default_factory=lambda: [2])
+
+    # same module and qualified name, but a different default
+    a = make_args_from_class(A, program_name="f")
+    b = make_args_from_class(B, program_name="f")
+    assert a._help_key(False) != b._help_key(False)
+
+
+def brief(text: str) -> Callable[[], None]:
+    def f() -> None:
+        pass
+
+    f.__doc__ = text
+    return f
+
+
+MARKDOWN = """
+Fuse **two** files, with `fast` mode
+and *care*, keeping snake_case_names.
+
+- first item, which is long enough to wrap around the width of the terminal
+- second `item`
+  continued
+
+1. one
+2. [two](https://example.com)
+"""
+
+
+@mark.parametrize("width", [120, 40])
+def test_markdown_brief(
+    capsys: CaptureFixture[str], monkeypatch: MonkeyPatch, width: int
+):
+    monkeypatch.setenv("COLUMNS", str(width))
+    parser = make_args_from_func(brief(MARKDOWN), program_name="f")
+    plain = plain_help(parser, capsys)
+    assert "**" not in plain and "`" not in plain
+    assert plain == rich_help(parser, width)
+
+    monkeypatch.setenv("FORCE_COLOR", "1")
+    parser.print_help()
+    out = capsys.readouterr().out
+    assert "\x1b[1mtwo\x1b[0m" in out
+    assert "\x1b[1;36mfast\x1b[0m" in out
+    assert "\x1b[3mcare\x1b[0m" in out
+
+
+def test_cache_disabled(capsys: CaptureFixture[str], monkeypatch: MonkeyPatch):
+    monkeypatch.setenv("STARTLE_CACHE_DIR", "")
+    parser = make_args_from_func(fusion, program_name="fusion")
+    parser.print_help()
+    assert "Fuse two files." in capsys.readouterr().out
+
+
+def test_unwritable_cache(
+    capsys: CaptureFixture[str], monkeypatch: MonkeyPatch, tmp_path: Path
+):
+    blocker = tmp_path / "file"
+    blocker.touch()
+    monkeypatch.setenv("STARTLE_CACHE_DIR", str(blocker))
+    parser = make_args_from_func(fusion, program_name="fusion")
+    parser.print_help()
+    assert "Fuse two files." in capsys.readouterr().out
@@ -0,0 +1,214 @@
+import json
+import re
+from dataclasses import dataclass, field
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path
+from typing import Any, Literal
+
+from pytest import CaptureFixture, mark, raises
+from startle import load_manifest, start
+from startle._inspect.make_args import make_args_from_class
+from startle._start import make_parser
+from startle.args import Args
+from startle.cmds import Cmds
+from startle.error import ManifestError
+
+
+class Color(Enum):
+    RED = 1
+    DARK_BLUE = 2
+
+
+def tags() -> list[str]:
+    return ["x"]
+
+
+@dataclass
+class Inner:
+    """
+    Inner config.
+
+    Attributes:
+        level: The level.
+        color: The color.
+    """
+
+    level: int = 1
+    color: Color = Color.RED
+
+
+@dataclass
+class Outer:
+    """
+    Outer config.
+
+    Attributes:
+        inner: The inner config.
+        name: The name.
+        tags: The tags.
+    """
+
+    inner: Inner = field(default_factory=Inner)
+    name: str = "outer"
+    tags: list[str] = field(default_factory=tags)
+
+
+def simple(
+    src: Path,
+    /,
+    mode: Literal["fast", "slow"] = "fast",
+    *rest: float,
+    color: Color = Color.DARK_BLUE,
+    pair: tuple[int, ...] = (1, 2),
+    kinds: frozenset[int] = frozenset({2, 1}),
+    limit: int | None = None,
+    verbose: bool = False,
+    **extra: int,
+) -> None:
+    """
+    Do something simple.
+
+    Args:
+        src: The source.
+        mode: The mode.
+        color: The color.
+    """
+
+
+def up(steps: int = 1) -> None:
+    """
+    Migrate up.
+    """
+
+
+def down(steps: int = 1) -> None:
+    """
+    Migrate down.
+    """
+
+
+PARSERS: list[Any] = [
+    lambda: make_parser(simple, name="simple"),
+    lambda: make_parser(Outer, name="outer", recurse=True),
+    lambda: make_args_from_class(Outer, recurse=True, naming="nested"),
+    lambda: make_parser({"simple": simple, "db": [up, down]}, default="simple"),
+]
+
+
+@mark.parametrize("make", PARSERS)
+def test_round_trip(make: Any):
+    manifest = make().to_manifest()
+    text = json.dumps(manifest)
+    assert json.loads(text) == manifest
+    assert load_manifest(text).to_manifest() == manifest
+    assert load_manifest(manifest).to_manifest() == manifest
+
+
+def test_manifest_contents():
+    manifest = make_parser(simple).to_manifest()
+    assert manifest["version"] == 1 and manifest["kind"] == "args"
+    src, mode, color, pair, kinds, limit, verbose = manifest["args"]
+    assert src["kind"] == "positional" and src["type"] == "pathlib:Path"
+    assert mode["kind"] == "both" and mode["type"] == {"literal": ["fast", "slow"]}
+    assert mode["choices"] == ["fast", "slow"] and mode["default"] == "fast"
+    assert color["name"] == {"short": "c", "long": "color"}
+    assert color["default"] == {"enum": f"{__name__}:Color", "name": "DARK_BLUE"}
+    assert color["choices"] == ["red", "dark-blue"]
+    assert pair["container"] == "tuple" and pair["nary"]
+    assert pair["default"] == {"tuple": [1, 2]}
+    assert kinds["default"] == {"frozenset": [1, 2]}
+    assert limit["type"] == {"optional": "builtins:int"}
+    assert verbose["default"] is False and verbose["required"] is False
+    assert manifest["var_args"]["type"] == "builtins:float"
+    assert manifest["var_kwargs"]["name"]["long"] == "<key>"
+
+    manifest = make_parser(Outer, recurse=True).to_manifest()
+    inner = manifest["args"][0]
+    assert inner["type"] == f"{__name__}:Inner"
+    assert inner["default"] == {"dataclass_factory": True}
+    assert [a["name"]["long"] for a in inner["args"]["args"]] == ["level", "color"]
+
+
+@mark.parametrize(
+    "cli_args",
+    [
+        ["a.txt"],
+        ["a.txt", "slow", "1.5", "2", "--color", "red", "--pair", "3", "--x", "4"],
+        ["a.txt", "--mode", "slow", "--kinds", "7", "--limit", "3", "-v"],
+    ],
+)
+def test_same_parse(cli_args: list[str]):
+    original = make_parser(simple)
+    loaded = load_manifest(original.to_manifest())
+    assert isinstance(original, Args) and isinstance(loaded, Args)
+    expected = original.parse(cli_args).make_func_args()
+    assert loaded.parse(cli_args).make_func_args() == expected
+
+
+def test_same_recursive_parse():
+    original = make_parser(Outer, recurse=True)
+    loaded = load_manifest(original.to_manifest())
+    assert isinstance(original, Args) and isinstance(loaded, Args)
+    for cli_args in [[], ["--level", "3", "--name", "n"], ["--color", "dark-blue"]]:
+        expected = original.parse(cli_args).make_func_args()
+        assert loaded.parse(cli_args).make_func_args() == expected
+
+
+def test_same_help(capsys: CaptureFixture[str]):
+    for make in PARSERS:
+        original = make()
+        original.print_help()
+        expected = capsys.readouterr().out
+        load_manifest(original.to_manifest()).print_help()
+        assert capsys.readouterr().out == expected
+
+    cmds = load_manifest(PARSERS[-1]().to_manifest())
+    assert isinstance(cmds, Cmds)
+    assert cmds.get_cmd_parser(["db", "up", "--steps", "3"])[0] == "db up"
+
+
+def test_errors():
+    manifest = make_parser(simple).to_manifest()
+    with raises(ManifestError, match="Unsupported manifest version `2`!"):
+        load_manifest({**manifest, "version": 2})
+    with raises(ManifestError, match="Unknown manifest kind `nope`!"):
+        load_manifest({**manifest, "kind": "nope"})
+    with raises(ManifestError, match="must be a JSON object"):
+        load_manifest("[]")
+    with raises(ManifestError, match="Malformed manifest"):
+        load_manifest({"version": 1, "kind": "args"})
+
+    manifest["args"][0]["type"] = "no_such_module:Type"
+    with raises(ManifestError, match="Cannot resolve `no_such_module:Type`!"):
+        load_manifest(manifest)
+
+    def local(x: float = Decimal("1.5")) -> None:  # type: ignore
+        pass
+
+    # fails at export rather than when loading
+    with raises(
+        ManifestError,
+        match=re.escape("Cannot export the default value `Decimal('1.5')` of `x`!"),
+    ):
+        make_parser(local).to_manifest()
+
+    manifest = make_parser(simple).to_manifest()
+    manifest["args"][1]["default"] = {"repr": "Decimal('1.5')"}
+    with raises(ManifestError, match="Cannot restore the default value"):
+        load_manifest(manifest)
+
+
+def test_start_manifest(capsys: CaptureFixture[str], tmp_path: Path):
+    with raises(SystemExit) as exc:
+        start([up, down], name="tool", args=["--startle-manifest", "-"])
+    assert exc.value.code == 0
+    manifest = json.loads(capsys.readouterr().out)
+    assert manifest == make_parser([up, down], name="tool").to_manifest()
+
+    path = tmp_path / "manifest.json"
+    with raises(SystemExit):
+        start(up, args=[f"--startle-manifest={path}"])
+    assert (
+        load_manifest(path.read_text()).to_manifest() == make_parser(up).to_manifest()
+    )
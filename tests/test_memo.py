@@ -0,0 +1,178 @@
+import os
+import re
+from collections.abc import Iterator
+from enum import Enum
+from pathlib import Path
+
+from pytest import CaptureFixture, MonkeyPatch, fixture, raises
+from startle import Cache, Registry, start
+from startle._memo import NAMESPACE
+from startle.error import UnsupportedCacheModeError
+
+calls: list[str] = []
+
+
+class Unit(Enum):
+    KB = "kb"
+    MB = "mb"
+
+
+def size(
+    path: Path, *, unit: Unit = Unit.KB, tags: frozenset[str] = frozenset()
+) -> int:
+    calls.append("size")
+    return path.stat().st_size // (1 if unit is Unit.KB else 1000)
+
+
+def words(text: str) -> Iterator[str]:
+    calls.append("words")
+    yield from text.split()
+
+
+def report(n: int) -> list[int]:
+    calls.append("report")
+    return list(range(n))
+
+
+def now(n: int) -> int:
+    calls.append("now")
+    return n
+
+
+class Opaque:
+    def __init__(self, value: int) -> None:
+        self.value = value
+
+
+def opaque(value: Opaque) -> int:
+    calls.append("opaque")
+    return value.value
+
+
+@fixture(autouse=True)
+def _fresh_cache(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("STARTLE_CACHE_DIR", str(tmp_path / "cache"))
+    calls.clear()
+
+
+def test_cache_hits(tmp_path: Path):
+    data = tmp_path / "data.bin"
+    data.write_bytes(b"x" * 2000)
+    args = [str(data), "--unit", "mb"]
+    assert start(size, args=args, cache=True) == 2
+    assert start(size, args=args, cache=True) == 2
+    assert calls == ["size"]
+
+    # other arguments, in any order of set elements
+    start(size, args=[str(data), "--tags", "a", "b"], cache=True)
+    start(size, args=[str(data), "--tags", "b", "a"], cache=True)
+    assert calls == ["size", "size"]
+
+    # without caching
+    start(size, args=args)
+    assert calls == ["size", "size", "size"]
+
+
+def test_cache_path_stats(tmp_path: Path):
+    data = tmp_path / "data.bin"
+    data.write_bytes(b"x" * 2000)
+    assert start(size, args=[str(data)], cache=True) == 2000
+    data.write_bytes(b"x" * 3000)
+    assert start(size, args=[str(data)], cache=True) == 3000
+
+    data.write_bytes(b"x" * 4000)
+    args = [str(data)]
+    assert start(size, args=args, cache=Cache(stat_paths=False)) == 4000
+    data.write_bytes(b"x" * 5000)
+    assert start(size, args=args, cache=Cache(stat_paths=False)) == 4000
+
+
+def test_cache_iterators(capsys: CaptureFixture[str]):
+    assert list(start(words, args=["a b c"], cache=True)) == ["a", "b", "c"]
+    assert list(start(words, args=["a b c"], cache=True)) == ["a", "b", "c"]
+    start(words, args=["a b c"], cache=True, stream="lines")
+    assert capsys.readouterr().out == "a\nb\nc\n"
+    assert calls == ["words"]
+
+
+def count_up(start: int) -> Iterator[int]:
+    calls.append("count_up")
+    n = start
+    while True:  # endless, hence only ever consumed in part
+        yield n
+        n += 1
+
+
+def test_cache_iterators_lazily(tmp_path: Path):
+    from itertools import islice
+
+    for _ in range(2):
+        items = start(count_up, args=["5"], cache=True)
+        assert list(islice(items, 3)) == [5, 6, 7]
+        items.close()
+    # a partial result is never cached, nor left behind
+    assert calls == ["count_up"] * 2
+    assert not any((tmp_path / "cache" / NAMESPACE).iterdir())
+
+    # cached items are read back lazily as well
+    list(start(words, args=["a b c"], cache=True))
+    items = start(words, args=["a b c"], cache=True)
+    assert next(items) == "a"
+    assert list(items) == ["b", "c"]
+    assert calls[-2:] == ["count_up", "words"]
+
+
+def test_cache_commands():
+    commands = [report, now]
+    memo = Cache(commands={"report"})
+    assert start(commands, args=["report", "3"], cache=memo) == [0, 1, 2]
+    assert start(commands, args=["report", "3"], cache=memo) == [0, 1, 2]
+    assert start(commands, args=["now", "1"], cache=memo) == 1
+    assert start(commands, args=["now", "1"], cache=memo) == 1
+    assert calls == ["report", "now", "now"]
+
+
+def test_cache_modes():
+    start(report, args=["2"], cache=True)
+    start(report, args=["2", "--startle-cache", "off"], cache=True)
+    start(report, args=["2", "--startle-cache", "refresh"], cache=True)
+    start(report, args=["2", "--startle-cache", "on"])
+    assert calls == ["report"] * 3
+
+    with raises(UnsupportedCacheModeError, match=re.escape("Choose from `on`")):
+        start(report, args=["2", "--startle-cache", "maybe"], catch=False)
+
+
+def test_cache_uncacheable():
+    # arguments without a stable form, or unpicklable results, are not cached
+    registry = Registry()
+    registry.register(Opaque, parser=lambda s: Opaque(int(s)))
+    start(opaque, args=["1"], cache=True, registry=registry)
+    start(opaque, args=["1"], cache=True, registry=registry)
+
+    def local(n: int) -> object:
+        calls.append("local")
+        return lambda: n
+
+    start(local, args=["1"], cache=True)
+    start(local, args=["1"], cache=True)
+    assert calls == ["opaque", "opaque", "local", "local"]
+
+
+def test_cache_eviction(tmp_path: Path):
+    memo = Cache(max_bytes=10_000)
+    for n in range(5):
+        start(report, args=[str(1000 + n)], cache=memo)
+    directory = tmp_path / "cache" / NAMESPACE
+    entries = list(directory.iterdir())
+    assert 0 < len(entries) < 5
+    assert sum(e.stat().st_size for e in entries) <= 10_000
+
+    # least recently used ones are evicted first
+    calls.clear()
+    start(report, args=["1004"], cache=memo)
+    assert calls == []
+    oldest = min(entries, key=lambda e: e.stat().st_mtime_ns)
+    os.utime(oldest, ns=(0, 0))
+    start(report, args=["999"], cache=memo)
+    assert not oldest.exists()
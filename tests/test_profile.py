@@ -0,0 +1,99 @@
+import asyncio
+import pstats
+import time
+from pathlib import Path
+
+from pytest import CaptureFixture, MonkeyPatch, mark, raises
+from startle import start
+from startle.error import UnsupportedProfileModeError
+
+
+def busy(n: int = 1000) -> int:
+    """
+    Allocate and wait a bit.
+    """
+    data = [str(i) for i in range(n)]
+    time.sleep(0.05)
+    return len(data)
+
+
+async def abusy(n: int = 1000) -> int:
+    """
+    Allocate and wait a bit, asynchronously.
+    """
+    data = [str(i) for i in range(n)]
+    await asyncio.sleep(0.05)
+    return len(data)
+
+
+@mark.parametrize("func", [busy, abusy])
+def test_cpu(func: object, tmp_path: Path, capsys: CaptureFixture[str]):
+    out = tmp_path / "cpu.prof"
+    argv = ["--n", "10", "--startle-profile", "cpu", "--startle-profile-out", str(out)]
+    assert start(func, args=argv) == 10  # type: ignore
+    stats = pstats.Stats(str(out))
+    assert any(name == func.__name__ for _, _, name in stats.stats)  # type: ignore
+    assert f"Profile (cpu) written to {out}" in capsys.readouterr().err
+
+
+def test_cpu_text(tmp_path: Path):
+    out = tmp_path / "cpu.txt"
+    start(
+        [busy], args=["busy", "--startle-profile=cpu", f"--startle-profile-out={out}"]
+    )
+    assert "cumulative" in out.read_text()
+    assert "busy" in out.read_text()
+
+
+@mark.parametrize("func", [busy, abusy])
+def test_mem(func: object, tmp_path: Path):
+    out = tmp_path / "mem.txt"
+    start(func, args=["--startle-profile", "mem", "--startle-profile-out", str(out)])  # type: ignore
+    report = out.read_text()
+    assert report.startswith("Peak traced memory: ")
+    assert "allocation sites" in report
+    assert __file__ in report  # the list of strings is still alive at exit
+
+
+@mark.parametrize("func", [busy, abusy])
+def test_wall(func: object, tmp_path: Path):
+    out = tmp_path / "wall.txt"
+    start(func, args=["--startle-profile", "wall", "--startle-profile-out", str(out)])  # type: ignore
+    lines = out.read_text().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+        assert stack.split(";")[0]
+    if func is busy:
+        assert any(f"busy ({Path(__file__).name}:" in line for line in lines)
+
+
+def test_failing_command_still_reports(tmp_path: Path):
+    out = tmp_path / "cpu.prof"
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with raises(RuntimeError, match="boom"):
+        start(
+            fail, args=["--startle-profile", "cpu", "--startle-profile-out", str(out)]
+        )
+    assert out.exists()
+
+
+def test_default_path_and_off(tmp_path: Path, monkeypatch: MonkeyPatch):
+    monkeypatch.chdir(tmp_path)
+    start(busy, args=["--n", "1"])
+    assert list(tmp_path.iterdir()) == []
+    start(busy, args=["--n", "1", "--startle-profile", "wall"])
+    assert [p.name for p in tmp_path.iterdir()] == ["startle-wall.txt"]
+
+
+def test_unsupported_mode(capsys: CaptureFixture[str]):
+    with raises(UnsupportedProfileModeError, match="Unsupported profile mode `gpu`"):
+        start(busy, args=["--startle-profile", "gpu"], catch=False)
+    with raises(SystemExit) as e:
+        start(busy, args=["--startle-profile", "gpu"])
+    assert e.value.code == 1
+    assert "Choose from `cpu`, `mem`, `wall`." in capsys.readouterr().out
@@ -0,0 +1,154 @@
+import csv
+import io
+import json
+import re
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Literal, NotRequired, TypedDict
+
+from pytest import raises
+from startle import Registry, parse_records
+from startle.error import RecordsError, UnsupportedTypeError
+
+
+class Color(Enum):
+    RED = "red"
+    BLUE = "blue"
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+@dataclass
+class Item:
+    name: str
+    count: int
+    color: Color = Color.RED
+    tags: list[str] = field(default_factory=list[str])
+    kind: Literal["a", "b"] = "a"
+    fragile: bool = False
+
+
+class Row(TypedDict):
+    id: int
+    note: NotRequired[str]
+
+
+CSV = """name,count,color,tags,kind,fragile
+cup,2,blue,kitchen;glass,b,yes
+plate,3,red,,a,no
+"""
+
+
+def test_records_from_csv():
+    items = list(parse_records(Item, csv.DictReader(io.StringIO(CSV)), delimiter=";"))
+    assert items == [
+        Item("cup", 2, Color.BLUE, ["kitchen", "glass"], "b", True),
+        Item("plate", 3, Color.RED, [], "a", False),
+    ]
+
+
+def test_records_from_json_lines():
+    lines = [
+        '{"name": "cup", "count": 2, "tags": ["x", "y"], "fragile": true}',
+        '{"name": "pan", "count": "4", "color": "blue", "extra": 1}',
+        '{"name": "pot", "count": 1, "kind": null}',
+    ]
+    items = list(parse_records(Item, map(json.loads, lines)))
+    assert items == [
+        Item("cup", 2, tags=["x", "y"], fragile=True),
+        Item("pan", 4, Color.BLUE),
+        Item("pot", 1),
+    ]
+
+
+def test_records_typed_dict():
+    rows = list(parse_records(Row, [{"id": "1"}, {"id": 2, "note": "hi"}]))
+    assert rows == [{"id": 1}, {"id": 2, "note": "hi"}]
+
+
+def test_records_are_streamed():
+    consumed = 0
+
+    def records():
+        nonlocal consumed
+        for i in range(10**9):
+            consumed += 1
+            yield {"name": f"item-{i}", "count": str(i)}
+
+    stream = parse_records(Item, records())
+    assert next(stream) == Item("item-0", 0)
+    assert next(stream) == Item("item-1", 1)
+    assert consumed == 2
+
+
+def test_records_errors():
+    records = [
+        {"name": "a", "count": "1"},
+        {"name": "b", "count": "many"},
+        {"name": "c"},
+        {"name": "d", "count": "4", "color": "green"},
+        {"name": "e", "count": "5"},
+    ]
+    seen: list[Item] = []
+    with raises(RecordsError) as e:
+        seen.extend(parse_records(Item, records))
+    # the valid records are still constructed
+    assert [item.name for item in seen] == ["a", "e"]
+    assert [n for n, _ in e.value.errors] == [2, 3, 4]
+    assert str(e.value) == (
+        "Cannot convert 3 record(s) into `Item`:\n"
+        "  Record 2: Cannot parse integer from `many`!\n"
+        "  Record 3: Required option `count` is not provided!\n"
+        "  Record 4: Cannot parse enum Color from `green`!"
+    )
+
+    # stops early
+    seen.clear()
+    with raises(RecordsError, match=re.escape("Cannot convert 2 record(s)")):
+        seen.extend(parse_records(Item, records, max_errors=2))
+    assert [item.name for item in seen] == ["a"]
+
+
+@dataclass
+class Positive:
+    value: int
+
+    def __post_init__(self) -> None:
+        if self.value <= 0:
+            raise ValueError(f"{self.value} is not positive")
+
+
+def test_records_class_errors():
+    records = [{"value": "1"}, {"value": "-1"}, {"value": "x"}, {"value": 2}]
+    seen: list[Positive] = []
+    with raises(RecordsError) as e:
+        seen.extend(parse_records(Positive, records))
+    # the stream goes on after the class rejects a record
+    assert seen == [Positive(1), Positive(2)]
+    assert str(e.value) == (
+        "Cannot convert 2 record(s) into `Positive`:\n"
+        "  Record 2: ValueError: -1 is not positive\n"
+        "  Record 3: Cannot parse integer from `x`!"
+    )
+    assert isinstance(e.value.errors[0][1], ValueError)
+
+
+def test_records_registry():
+    registry = Registry()
+    registry.register(Point, parser=lambda s: Point(*map(int, s.split(":"))))
+
+    @dataclass
+    class Segment:
+        start: Point
+        end: Point
+
+    records = [{"start": "0:0", "end": "1:2"}]
+    assert list(parse_records(Segment, records, registry=registry)) == [
+        Segment(Point(0, 0), Point(1, 2))
+    ]
+    with raises(UnsupportedTypeError):
+        parse_records(Segment, records)
@@ -0,0 +1,127 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from pytest import raises
+from startle import Registry, parse, start
+from startle._inspect.make_args import make_args_from_func
+from startle._registry import current
+from startle.error import ParserConfigError
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+def norm1(p: Point) -> int:
+    return abs(p.x) + abs(p.y)
+
+
+def comma(value: str) -> Point:
+    x, y = value.split(",")
+    return Point(int(x), int(y))
+
+
+def colon(value: str) -> Point:
+    x, y = value.split(":")
+    return Point(int(x), int(y))
+
+
+def make_registry(parser, metavar: str) -> Registry:
+    registry = Registry()
+    registry.register(Point, parser=parser, metavar=metavar)
+    return registry
+
+
+def test_registry_is_scoped():
+    commas = make_registry(comma, "<x,y>")
+    colons = make_registry(colon, "<x:y>")
+
+    assert start(norm1, args=["1,-2"], registry=commas, catch=False) == 3
+    assert start(norm1, args=["3:4"], registry=colons, catch=False) == 7
+
+    # the global registry is left untouched
+    with raises(
+        ParserConfigError,
+        match=re.escape("Unsupported type `Point` for parameter `p` in `norm1()`!"),
+    ):
+        make_args_from_func(norm1)
+
+    # metavars come from the registry too
+    args = make_args_from_func(norm1, registry=commas)
+    assert args._positional_args[0].metavar == "<x,y>"
+
+
+def test_registry_falls_back_to_base():
+    commas = make_registry(comma, "<x,y>")
+
+    @dataclass
+    class Config:
+        origin: Point
+        scale: float = 1.0
+
+    config = parse(Config, args=["--origin", "1,2", "--scale", "2.5"], registry=commas)
+    assert config == Config(Point(1, 2), 2.5)
+
+    # a registry can extend another one
+    child = Registry(base=commas)
+    child.register(float, parser=lambda value: float(value) * 2)
+    config = parse(Config, args=["--origin", "1,2", "--scale", "2.5"], registry=child)
+    assert config == Config(Point(1, 2), 5.0)
+
+
+def test_registry_bind():
+    commas = make_registry(comma, "<x,y>")
+    with commas.bind() as snapshot:
+        assert current() is snapshot
+        args = make_args_from_func(norm1)
+    assert current() is not snapshot
+    args.parse(["1,2"])
+    f_args, _ = args.make_func_args()
+    assert f_args == [Point(1, 2)]
+
+    with raises(TypeError, match="snapshot"):
+        snapshot.register(int, parser=int)
+
+
+def test_registry_snapshot_at_build():
+    registry = make_registry(comma, "<x,y>")
+    args = make_args_from_func(norm1, registry=registry)
+
+    # changes after the spec is built do not affect it
+    registry.register(Point, parser=colon)
+    args.parse(["1,2"])
+    assert args.make_func_args()[0] == [Point(1, 2)]
+
+    args = make_args_from_func(norm1, registry=registry)
+    args.parse(["1:2"])
+    assert args.make_func_args()[0] == [Point(1, 2)]
+
+
+def test_registry_threads():
+    registries = [make_registry(comma, "<x,y>"), make_registry(colon, "<x:y>")]
+    sep = [",", ":"]
+
+    def run(i: int) -> int:
+        value = f"{i}{sep[i % 2]}{i}"
+        return start(norm1, args=[value], registry=registries[i % 2], catch=False)
+
+    with ThreadPoolExecutor(8) as pool:
+        assert list(pool.map(run, range(200))) == [2 * i for i in range(200)]
+
+
+def test_registry_completer():
+    registry = Registry()
+    registry.register(
+        Point, parser=comma, completer=lambda prefix: ["0,0", "1,1", "1,2"]
+    )
+    args = make_args_from_func(norm1, registry=registry)
+    arg = args._positional_args[0]
+    assert arg.completer is not None
+    assert list(arg.completer("1")) == ["0,0", "1,1", "1,2"]
+
+    with registry.bind() as snapshot:
+        assert snapshot.completer_for(Point) is arg.completer
+    assert current().completer_for(Point) is None
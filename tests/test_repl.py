@@ -0,0 +1,109 @@
+import asyncio
+from collections.abc import Iterator
+from typing import Literal
+
+from pytest import CaptureFixture, MonkeyPatch
+from startle import start
+from startle._inspect.make_args import make_args_from_func
+from startle._start import make_cmds
+
+
+def _feed(monkeypatch: MonkeyPatch, lines: list[str]) -> None:
+    it: Iterator[str] = iter(lines)
+
+    def input_(prompt: str = "") -> str:
+        try:
+            return next(it)
+        except StopIteration:
+            raise EOFError from None
+
+    monkeypatch.setattr("builtins.input", input_)
+
+
+def add(a: int, b: int) -> int:
+    """
+    Add two numbers.
+    """
+    return a + b
+
+
+loops: list[asyncio.AbstractEventLoop] = []
+
+
+async def wait(*, name: str = "x") -> None:
+    loops.append(asyncio.get_running_loop())
+    print(f"waited {name}")
+
+
+def test_repl(capsys: CaptureFixture[str], monkeypatch: MonkeyPatch):
+    _feed(
+        monkeypatch,
+        [
+            "add 1 2",
+            "",
+            "wait --name 'a b'",
+            "add 1",
+            "wait",
+            "nope",
+            "add 'unterminated",
+            "add 3 4",
+        ],
+    )
+    loops.clear()
+    start([add, wait], repl=True, name="calc")
+    out = capsys.readouterr().out
+
+    assert out.startswith("3\nwaited a b\nError: Required option `b` is not provided!")
+    assert "waited x\n" in out
+    assert "Error: Unknown command `nope`!" in out
+    assert "Error: No closing quotation" in out
+    assert out.endswith("7\n\n")
+    assert len(loops) == 2 and loops[0] is loops[1]
+
+
+def test_repl_func(capsys: CaptureFixture[str], monkeypatch: MonkeyPatch):
+    def hi(name: str, /, *, count: int = 1, **kwargs: str) -> None:
+        print(f"hi {name}" * count, kwargs)
+
+    _feed(monkeypatch, ["bob --count 2 --x 1", "alice", "carol --y 2"])
+    start(hi, repl=True)
+    assert capsys.readouterr().out == (
+        "hi bobhi bob {'x': '1'}\nhi alice {}\nhi carol {'y': '2'}\n\n"
+    )
+
+
+def test_repl_settings(capsys: CaptureFixture[str], monkeypatch: MonkeyPatch):
+    def items(names: list[str], /) -> Iterator[str]:
+        yield from names
+
+    # the options of `start()`, and the reserved options of each line, apply
+    _feed(monkeypatch, ["a b", "a b c d --startle-shard 1/2", "a --startle-shard x"])
+    start(items, repl=True, stream="lines")
+    out = capsys.readouterr().out
+    assert out.startswith("a\nb\nc\nd\nError: Invalid shard `x`!")
+
+
+def fmt(
+    kind: Literal["json", "text"],
+    *,
+    level: Literal["low", "high"] = "low",
+    verbose: bool = False,
+) -> None:
+    pass
+
+
+def test_complete():
+    args = make_args_from_func(fmt)
+    assert args.complete([], "--") == ["--help", "--kind", "--level", "--verbose"]
+    assert args.complete([], "--l") == ["--level"]
+    assert args.complete(["--level"], "") == ["low", "high"]
+    assert args.complete(["-l"], "h") == ["high"]
+    assert args.complete(["--kind"], "j") == ["json"]
+    assert args.complete(["--verbose"], "--") == ["--help", "--kind", "--level"]
+
+    cmds, _ = make_cmds({"db": {"migrate": [fmt], "seed": add}, "add": add}, "prog")
+    assert cmds.complete([], "") == ["add", "db"]
+    assert cmds.complete(["db"], "") == ["migrate", "seed"]
+    assert cmds.complete(["db", "migrate"], "f") == ["fmt"]
+    assert cmds.complete(["db", "migrate", "fmt", "--level"], "") == ["low", "high"]
+    assert cmds.complete(["nope"], "") == []
@@ -0,0 +1,187 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from pytest import CaptureFixture, raises
+from startle import Registry, Router
+from startle.error import (
+    SingleFunctionDefaultCommandError,
+    UnexpectedCommandError,
+    ValueParsingError,
+)
+from startle.router import Dispatch, DispatchError
+
+
+def deploy(svc: str, *, canary: int = 0, dry: bool = False) -> tuple[str, int, bool]:
+    """
+    Deploy a service.
+
+    Args:
+        svc: The service to deploy.
+        canary: Percentage of traffic for the canary.
+        dry: Whether to only print what would be done.
+    """
+    return svc, canary, dry
+
+
+def migrate(*, steps: int = 1) -> int:
+    return steps
+
+
+async def ping(host: str) -> str:
+    await asyncio.sleep(0)
+    return f"pong from {host}"
+
+
+def fail() -> None:
+    raise RuntimeError("boom")
+
+
+COMMANDS = {"deploy": deploy, "db": {"migrate": migrate}, "ping": ping, "fail": fail}
+
+
+def test_dispatch(capsys: CaptureFixture[str]):
+    router = Router(COMMANDS, name="bot")
+
+    assert router.dispatch("deploy svc --canary 5") == Dispatch(
+        "deploy", ("svc", 5, False)
+    )
+    assert router.dispatch("deploy 'my svc' --dry").value == ("my svc", 0, True)
+    assert router.dispatch("db migrate --steps 3") == Dispatch("db migrate", 3)
+    assert router.dispatch("ping localhost").value == "pong from localhost"
+    assert router.dispatch_argv(["deploy", "a b", "-c", "1"]).value == ("a b", 1, False)
+
+    # exceptions of the commands themselves propagate
+    with raises(RuntimeError, match="boom"):
+        router.dispatch("fail")
+
+    # never prints
+    assert capsys.readouterr() == ("", "")
+
+
+def test_dispatch_errors(capsys: CaptureFixture[str]):
+    router = Router(COMMANDS, name="bot")
+
+    result = router.dispatch("deploy svc --canary many")
+    assert not result.ok and result.command == "deploy"
+    assert result.error is not None
+    assert result.error.kind == "value"
+    assert result.error.message == "Cannot parse integer from `many`!"
+    assert isinstance(result.error.exception, ValueParsingError)
+
+    result = router.dispatch("deploy")
+    assert result.error is not None and result.error.kind == "option"
+    assert result.error.message == "Required option `svc` is not provided!"
+
+    result = router.dispatch("depoy svc")
+    assert result.command == ""
+    assert result.error is not None and result.error.kind == "option"
+    assert isinstance(result.error.exception, UnexpectedCommandError)
+
+    result = router.dispatch("deploy 'svc")
+    assert result.error is not None
+    assert result.error == DispatchError(
+        "syntax", "No closing quotation", result.error.exception
+    )
+
+    # the same router keeps working after errors
+    assert router.dispatch("deploy svc").value == ("svc", 0, False)
+    assert capsys.readouterr() == ("", "")
+
+
+def test_dispatch_help(capsys: CaptureFixture[str]):
+    router = Router(COMMANDS, name="bot")
+
+    result = router.dispatch("deploy --help")
+    assert result.command == "deploy"
+    assert result.error is not None and result.error.kind == "help"
+    assert "Deploy a service." in result.error.message
+    assert "bot deploy" in result.error.message
+    assert "--canary" in result.error.message
+
+    result = router.dispatch("-?")
+    assert result.error is not None and result.error.kind == "help"
+    assert "deploy" in result.error.message
+
+    # help-looking values are still values
+    assert router.dispatch("deploy -- --help").value == ("--help", 0, False)
+    assert capsys.readouterr() == ("", "")
+
+
+def test_dispatch_help_other_threads(capsys: CaptureFixture[str]):
+    router = Router(COMMANDS, name="bot")
+    done = threading.Event()
+
+    def chatter():
+        while not done.is_set():
+            print("chatter")
+
+    thread = threading.Thread(target=chatter)
+    thread.start()
+    try:
+        for _ in range(20):
+            result = router.dispatch("deploy --help")
+            assert result.error is not None and result.error.kind == "help"
+            assert "chatter" not in result.error.message
+    finally:
+        done.set()
+        thread.join()
+    assert "chatter" in capsys.readouterr().out
+
+
+def test_dispatch_single_function():
+    router = Router(deploy)
+    assert router.dispatch("svc -c 10").value == ("svc", 10, False)
+    assert router.dispatch("svc").command == ""
+
+    with raises(SingleFunctionDefaultCommandError):
+        Router(deploy, default="deploy")
+
+
+def test_adispatch():
+    router = Router(COMMANDS)
+
+    async def main() -> list[Dispatch]:
+        return await asyncio.gather(
+            router.adispatch("ping a"),
+            router.adispatch(["ping", "b"]),
+            router.adispatch("deploy svc"),
+            router.adispatch("ping"),
+        )
+
+    a, b, c, d = asyncio.run(main())
+    assert (a.value, b.value, c.value) == (
+        "pong from a",
+        "pong from b",
+        ("svc", 0, False),
+    )
+    assert d.error is not None and d.error.kind == "option"
+
+
+def test_dispatch_threads():
+    router = Router(COMMANDS)
+
+    def run(i: int) -> Dispatch:
+        return router.dispatch(f"deploy svc-{i % 10} --canary {i}")
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(run, range(500)))
+    assert [r.value for r in results] == [
+        (f"svc-{i % 10}", i, False) for i in range(500)
+    ]
+
+
+def test_dispatch_registry():
+    @dataclass
+    class Version:
+        major: int
+        minor: int
+
+    def release(version: Version) -> Version:
+        return version
+
+    registry = Registry()
+    registry.register(Version, parser=lambda s: Version(*map(int, s.split("."))))
+    router = Router(release, registry=registry)
+    assert router.dispatch("1.2").value == Version(1, 2)
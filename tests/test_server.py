@@ -0,0 +1,159 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from pytest import fixture, mark, raises
+from startle import start
+from startle.client import request
+from startle.error import ParserConfigError
+
+pytestmark = mark.skipif(sys.platform == "win32", reason="requires fork and AF_UNIX")
+
+SCRIPT = """
+import os
+import sys
+
+from startle import start
+
+
+def add(a: int, b: int) -> None:
+    print(a + b)
+
+
+def where() -> None:
+    print(os.getcwd(), os.environ.get("GREETING"))
+
+
+def fail(code: int) -> None:
+    raise SystemExit(code)
+
+
+def echo() -> None:
+    print(sys.stdin.read().upper(), end="")
+
+
+def crash() -> None:
+    print("ran")
+    sys.stdout.flush()
+    os._exit(0)
+
+
+def items(names: list[str], /):
+    yield from names
+
+
+start(
+    [add, where, fail, echo, crash, items],
+    server=sys.argv[1],
+    idle_timeout=float(sys.argv[2]),
+    stream="lines",
+)
+"""
+
+
+def _start_server(tmp_path: Path, idle_timeout: float = 30.0):
+    script = tmp_path / "tool.py"
+    script.write_text(SCRIPT)
+    address = f"unix:{tmp_path / 'tool.sock'}"
+    proc = subprocess.Popen(
+        [sys.executable, str(script), address, str(idle_timeout)],
+        env={**os.environ, "PYTHONPATH": str(Path(__file__).parents[1])},
+    )
+    deadline = time.monotonic() + 10
+    while not (tmp_path / "tool.sock").exists():
+        assert proc.poll() is None, "server exited prematurely"
+        assert time.monotonic() < deadline, "server did not start"
+        time.sleep(0.01)
+    return proc, address, script
+
+
+def _run(
+    address: str, argv: list[str], stdin: bytes = b"", **kwargs: object
+) -> tuple[int | None, str]:
+    in_r, in_w = os.pipe()
+    out_r, out_w = os.pipe()
+    os.write(in_w, stdin)
+    os.close(in_w)
+    try:
+        code = request(address, argv, fds=(in_r, out_w, out_w), **kwargs)  # type: ignore
+    finally:
+        os.close(in_r)
+        os.close(out_w)
+    with os.fdopen(out_r) as f:
+        return code, f.read()
+
+
+@fixture
+def server(tmp_path: Path):
+    proc, address, script = _start_server(tmp_path)
+    yield proc, address, script
+    proc.terminate()
+    proc.wait()
+
+
+def test_server(server: tuple[subprocess.Popen[bytes], str, Path], tmp_path: Path):
+    _, address, _ = server
+
+    assert _run(address, ["add", "2", "3"]) == (0, "5\n")
+    assert _run(address, ["add", "4", "5"]) == (0, "9\n")
+    assert _run(address, ["fail", "3"]) == (3, "")
+    assert _run(address, ["echo"], stdin=b"hello") == (0, "HELLO")
+
+    env = {"GREETING": "hi"}
+    assert _run(address, ["where"], env=env, cwd=str(tmp_path)) == (
+        0,
+        f"{tmp_path} hi\n",
+    )
+
+    code, out = _run(address, ["add", "2"])
+    assert code == 1
+    assert "Required option `b` is not provided!" in out
+
+    # only the owner can connect
+    assert (tmp_path / "tool.sock").stat().st_mode & 0o777 == 0o600
+
+
+def test_server_settings(server: tuple[subprocess.Popen[bytes], str, Path]):
+    _, address, _ = server
+    # the options of `start()`, and the reserved options of each request, apply
+    assert _run(address, ["items", "a", "b"]) == (0, "a\nb\n")
+    argv = ["items", "a", "b", "c", "d", "--startle-shard", "1/2"]
+    assert _run(address, argv) == (0, "c\nd\n")
+    code, out = _run(address, ["items", "a", "--startle-shard", "x"])
+    assert code == 1 and "Invalid shard `x`!" in out
+
+
+def test_server_worker_lost(server: tuple[subprocess.Popen[bytes], str, Path]):
+    _, address, _ = server
+
+    # the command was accepted and run, so it must not be run again as a fallback
+    with raises(ConnectionError, match="Command exited without an exit code!"):
+        _run(address, ["crash"])
+    assert _run(address, ["add", "2", "3"]) == (0, "5\n")
+
+
+def test_server_invalidation(server: tuple[subprocess.Popen[bytes], str, Path]):
+    proc, address, script = server
+
+    assert _run(address, ["add", "2", "3"]) == (0, "5\n")
+    stat = script.stat()
+    os.utime(script, (stat.st_atime, stat.st_mtime + 10))
+    assert _run(address, ["add", "2", "3"]) == (None, "")
+    assert proc.wait(timeout=10) == 0
+
+
+def test_server_idle_timeout(tmp_path: Path):
+    proc, address, _ = _start_server(tmp_path, idle_timeout=0.2)
+    assert proc.wait(timeout=10) == 0
+    assert not (tmp_path / "tool.sock").exists()
+    assert _run(address, ["add", "2", "3"]) == (None, "")
+
+
+def test_server_address():
+    def f() -> None:
+        pass
+
+    with raises(ParserConfigError, match="Unsupported server address `tcp:1234`!"):
+        start(f, server="tcp:1234")
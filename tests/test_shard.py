@@ -0,0 +1,140 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from pytest import CaptureFixture, MonkeyPatch, mark, raises
+from startle import start
+from startle._shard import Shard
+from startle.error import FanOutOptionError, FanOutParamError, InvalidShardError
+
+
+def process(items: list[str], /, *, tag: str = "") -> list[str]:
+    return [item + tag for item in items]
+
+
+def total(*, nums: set[int]) -> set[int]:
+    return nums
+
+
+def pair(a: int, b: int) -> int:
+    return a + b
+
+
+ITEMS = [f"item-{i}" for i in range(23)]
+
+
+@mark.parametrize("mode", ["", ":contiguous", ":hash"])
+@mark.parametrize("count", [1, 3, 7, 30])
+def test_shards_partition(mode: str, count: int):
+    parts = [
+        start(process, args=[*ITEMS, "--startle-shard", f"{i}/{count}{mode}"])
+        for i in range(count)
+    ]
+    assert sorted(item for part in parts for item in part) == sorted(ITEMS)
+    if mode != ":hash":
+        # contiguous, in order, and of (almost) equal size
+        assert [item for part in parts for item in part] == ITEMS
+        assert max(map(len, parts)) - min(map(len, parts)) <= 1
+
+
+def test_hash_shards_are_stable():
+    shard = Shard.parse("1/4:hash")
+    part = shard.select(ITEMS)
+    # an element keeps its shard, whatever the other elements
+    assert shard.select([*ITEMS, "new-1", "new-2"])[: len(part)] == part
+    assert shard.select(list(reversed(ITEMS))) == list(reversed(part))
+
+
+def test_shard_keeps_other_arguments_and_container():
+    args = [*ITEMS[:4], "--tag", "!", "--startle-shard=1/2"]
+    assert start(process, args=args) == ["item-2!", "item-3!"]
+
+    nums = [str(i) for i in range(10)]
+    part = start(total, args=["--nums", *nums, "--startle-shard", "0/2:hash"])
+    assert isinstance(part, set)
+    other = start(total, args=["--nums", *nums, "--startle-shard", "1/2:hash"])
+    assert part | other == set(range(10)) and not part & other
+
+
+def test_shard_from_env(monkeypatch: MonkeyPatch):
+    monkeypatch.setenv("STARTLE_SHARD", "2/3")
+    assert start(process, args=["a", "b", "c", "d", "e", "f"]) == ["e", "f"]
+    # the option takes precedence
+    args = ["a", "b", "c", "--startle-shard", "0/3"]
+    assert start(process, args=args) == ["a"]
+
+
+def test_shard_with_fan_out():
+    results = start(
+        total,
+        args=["--nums", "1", "2", "3", "4", "--startle-shard", "1/2"],
+        fan_out="nums",
+        workers=1,
+    )
+    assert results == [{3}, {4}]
+
+
+def test_shard_commands():
+    args = ["process", "a", "b", "c", "d", "--startle-shard", "0/2"]
+    assert start([process, pair], args=args) == ["a", "b"]
+
+
+@mark.parametrize("spec", ["1", "3/3", "-1/3", "a/b", "1/3:random", "1/0"])
+def test_invalid_shard(spec: str):
+    with raises(InvalidShardError, match=re.escape(f"Invalid shard `{spec}`!")):
+        start(process, args=["a", "--startle-shard", spec], catch=False)
+
+
+def test_shard_option_error(capsys: CaptureFixture[str]):
+    with raises(
+        FanOutOptionError,
+        match=re.escape(
+            "Cannot tell which argument of `pair()` to shard for `--startle-shard`!"
+        ),
+    ):
+        start(pair, args=["1", "2", "--startle-shard", "0/2"], catch=False)
+    with raises(SystemExit) as e:
+        start(pair, args=["1", "2", "--startle-shard", "0/2"])
+    assert e.value.code == 1
+    assert "Cannot tell which argument of `pair()`" in capsys.readouterr().out
+
+
+def test_shard_param_error():
+    with raises(FanOutParamError, match=re.escape("Cannot shard `a` of `pair()`!")):
+        start(pair, args=["1", "2", "--startle-shard", "0/2"], fan_out="a")
+
+
+def test_inherited_shard_without_nary_argument(monkeypatch: MonkeyPatch):
+    monkeypatch.setenv("STARTLE_SHARD", "1/2")
+    assert start(pair, args=["1", "2"]) == 3
+    assert start([process, pair], args=["pair", "1", "2"]) == 3
+    assert start([process, pair], args=["process", "a", "b"]) == ["b"]
+
+
+def test_set_shards_across_hash_seeds():
+    # each run has its own hash seed, hence its own iteration order of the set
+    code = (
+        "from startle import start\n"
+        "def names(items: set[str], /) -> None:\n"
+        "    print(*sorted(items))\n"
+        "start(names)\n"
+    )
+    items = [f"name-{i}" for i in range(40)]
+    parts = []
+    for i in range(4):
+        result = subprocess.run(
+            [sys.executable, "-c", code, *items, "--startle-shard", f"{i}/4"],
+            env={
+                **os.environ,
+                "PYTHONHASHSEED": str(i),
+                "PYTHONPATH": str(Path(__file__).parents[1]),
+            },
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        parts.append(result.stdout.split())
+    assert sorted(item for part in parts for item in part) == sorted(items)
+    assert [len(part) for part in parts] == [10] * 4
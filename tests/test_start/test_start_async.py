@@ -0,0 +1,61 @@
+import asyncio
+from collections.abc import Coroutine
+from typing import Any
+
+from pytest import CaptureFixture, raises
+from startle import start, start_async
+from startle.error import ParserOptionError
+
+
+async def add(a: int, b: int) -> int:
+    await asyncio.sleep(0)
+    return a + b
+
+
+def mul(a: int, b: int) -> int:
+    return a * b
+
+
+async def loop_id() -> int:
+    return id(asyncio.get_running_loop())
+
+
+def test_start_async():
+    async def main() -> list[Any]:
+        loop = id(asyncio.get_running_loop())
+        return [
+            await start_async(add, args=["1", "2"]),
+            await start_async(mul, args=["2", "3"]),
+            await start_async([add, mul], args=["add", "3", "4"]),
+            await start_async({"math": [add, mul]}, args=["math", "mul", "3", "4"]),
+            await start_async(loop_id, args=[]) == loop,
+        ]
+
+    assert asyncio.run(main()) == [3, 6, 7, 12, True]
+
+
+def test_start_async_errors(capsys: CaptureFixture[str]):
+    with raises(ParserOptionError):
+        asyncio.run(start_async(add, args=["1"], catch=False))
+
+    with raises(SystemExit):
+        asyncio.run(start_async([add, mul], args=["sub"]))
+    assert capsys.readouterr().out.startswith("Error: Unknown command `sub`!")
+
+
+def test_runner():
+    calls: list[str] = []
+    loop = asyncio.new_event_loop()
+
+    def runner(coro: Coroutine[Any, Any, Any]) -> Any:
+        calls.append(coro.__qualname__)
+        return loop.run_until_complete(coro)
+
+    try:
+        assert start(add, args=["1", "2"], runner=runner) == 3
+        assert start([add, mul], args=["add", "1", "2"], runner=runner) == 3
+        assert start([add, mul], args=["mul", "1", "2"], runner=runner) == 2
+        assert start(loop_id, args=[], runner=runner) == id(loop)
+    finally:
+        loop.close()
+    assert calls == ["add", "add", "loop_id"]
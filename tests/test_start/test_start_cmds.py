@@ -384,3 +384,90 @@ def test_recursive_commands() -> None:
             ["add", "2", "3"],
             recurse=True,
         )
+
+
+def up(*, steps: int = 1) -> None:
+    """
+    Apply migrations.
+
+    Args:
+        steps: How many migrations to apply.
+    """
+    print(f"up {steps}")
+
+
+def down(*, steps: int = 1) -> None:
+    """
+    Revert migrations.
+    """
+    print(f"down {steps}")
+
+
+def seed(name: str) -> None:
+    """
+    Seed the database.
+    """
+    print(f"seed {name}")
+
+
+def test_nested_commands(capsys: CaptureFixture[str]) -> None:
+    tree = {"db": {"migrate": [up, down], "seed": seed}, "add": add}
+
+    check(capsys, run_w_explicit_args, tree, ["add", "2", "3"], "2 + 3 = 5\n")
+    check(capsys, run_w_explicit_args, tree, ["db", "seed", "x"], "seed x\n")
+    check(capsys, run_w_explicit_args, tree, ["db", "migrate", "up"], "up 1\n")
+    check(
+        capsys,
+        run_w_explicit_args,
+        tree,
+        ["db", "migrate", "down", "--steps", "3"],
+        "down 3\n",
+    )
+
+    check_exits(
+        capsys,
+        partial(run_w_explicit_args, name="prog"),
+        tree,
+        ["db", "--help"],
+        "\nUsage:\n  prog db <command> <command-specific-args>\n\nCommands:\n"
+        "  migrate\n  seed     Seed the database.\n",
+        exit_code="0",
+    )
+    check_exits(
+        capsys,
+        partial(run_w_explicit_args, name="prog"),
+        tree,
+        ["db", "migrate", "-?"],
+        "\nUsage:\n  prog db migrate <command> <command-specific-args>\n\nCommands:\n"
+        "  up    Apply migrations.\n  down  Revert migrations.\n",
+        exit_code="0",
+    )
+    check_exits(
+        capsys,
+        partial(run_w_explicit_args, name="prog"),
+        tree,
+        ["db", "migrate", "up", "-?"],
+        "\nApply migrations.\n\nUsage:\n  prog db migrate up [--steps <int>]\n",
+        exit_code="0",
+    )
+    check_exits(
+        capsys,
+        partial(run_w_explicit_args, name="prog"),
+        tree,
+        ["db", "migrat"],
+        "Error: Unknown command `migrat`! Did you mean `migrate`?\n"
+        "\nUsage:\n  prog db <command> <command-specific-args>\n",
+    )
+
+    with raises(ParserOptionError, match="No command given!"):
+        run_w_explicit_args(tree, ["db", "migrate"], catch=False)
+
+
+def test_nested_commands_lazy() -> None:
+    def broken(help: int) -> None:
+        pass
+
+    tree = {"ok": {"up": up}, "broken": broken}
+    run_w_explicit_args(tree, ["ok", "up"])
+    with raises(ParserConfigError, match="Cannot use `help` as parameter name"):
+        run_w_explicit_args(tree, ["broken", "1"])
@@ -161,7 +161,8 @@ def test_config_err(run: Callable[..., Any], catch: bool) -> None:
     with raises(
         ParserConfigError, match=r"Cannot use `help` as parameter name in `f\(\)`!"
     ):
-        run([f, f2], [], catch=catch)
+        # Args of commands are built lazily, so the error surfaces upon selection
+        run([f, f2], ["f"], catch=catch)
 
 
 @mark.parametrize("help_cmd", ["--help", "-?", "-?b", "-b?"])
@@ -341,7 +342,8 @@ def test_config_err_async(run: Callable[..., Any], catch: bool) -> None:
     with raises(
         ParserConfigError, match=r"Cannot use `help` as parameter name in `f\(\)`!"
     ):
-        run([f, f2], [], catch=catch)
+        # Args of commands are built lazily, so the error surfaces upon selection
+        run([f, f2], ["f"], catch=catch)
 
 
 @mark.parametrize("help_cmd", ["--help", "-?", "-?b", "-b?"])
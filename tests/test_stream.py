@@ -0,0 +1,124 @@
+import asyncio
+import json
+import subprocess
+import sys
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+
+from pytest import CaptureFixture, mark, raises
+from startle import start
+from startle.error import UnsupportedStreamFormatError
+
+
+class Kind(Enum):
+    A = "a"
+
+
+@dataclass
+class Record:
+    id: int
+    kind: Kind
+    tags: tuple[str, ...]
+
+
+def records(n: int) -> Iterator[Record]:
+    for i in range(n):
+        yield Record(i, Kind.A, ("x",))
+
+
+async def arecords(n: int) -> AsyncIterator[dict[str, int]]:
+    for i in range(n):
+        await asyncio.sleep(0)
+        yield {"id": i}
+
+
+def chunks(n: int) -> Iterator[bytes | str]:
+    for i in range(n):
+        yield b"\x00\x01" if i % 2 else "é"
+
+
+def total(n: int) -> int:
+    return n * (n + 1) // 2
+
+
+def nothing() -> None:
+    pass
+
+
+def test_stream_jsonl(capsys: CaptureFixture[str]):
+    assert start(records, args=["3"], stream="jsonl") is None
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"id": i, "kind": "a", "tags": ["x"]} for i in range(3)
+    ]
+
+
+def test_stream_lines_and_async(capsys: CaptureFixture[str]):
+    start(arecords, args=["3", "--startle-stream", "lines"])
+    assert capsys.readouterr().out == "{'id': 0}\n{'id': 1}\n{'id': 2}\n"
+
+    # a single item for plain results, and nothing for None
+    start([total, nothing], args=["total", "4", "--startle-stream=lines"])
+    start([total, nothing], args=["nothing", "--startle-stream=lines"])
+    assert capsys.readouterr().out == "10\n"
+
+
+def test_stream_bytes(capfdbinary: CaptureFixture[bytes]):
+    start(chunks, args=["3"], stream="bytes")
+    assert capfdbinary.readouterr().out == "é".encode() + b"\x00\x01" + "é".encode()
+
+
+def test_stream_is_buffered_and_ordered(capsys: CaptureFixture[str]):
+    print("before")
+    start(records, args=["20000"], stream="jsonl")
+    out = capsys.readouterr().out.splitlines()
+    assert out[0] == "before" and len(out) == 20001
+    assert json.loads(out[-1])["id"] == 19999
+
+
+def test_stream_failure_keeps_output(capsys: CaptureFixture[str]):
+    def fail() -> Iterator[int]:
+        yield 1
+        raise RuntimeError("boom")
+
+    with raises(RuntimeError, match="boom"):
+        start(fail, args=[], stream="lines")
+    assert capsys.readouterr().out == "1\n"
+
+
+def test_stream_format_error():
+    with raises(UnsupportedStreamFormatError, match="Choose from `lines`"):
+        start(records, args=["1", "--startle-stream", "xml"], catch=False)
+
+
+@mark.skipif(sys.platform == "win32", reason="POSIX pipes")
+def test_stream_broken_pipe(tmp_path: Path):
+    script = tmp_path / "emit.py"
+    script.write_text(
+        "import sys\n"
+        "from startle import start\n"
+        "def emit():\n"
+        "    try:\n"
+        "        i = 0\n"
+        "        while True:\n"
+        "            yield i\n"
+        "            i += 1\n"
+        "    finally:\n"
+        "        print('closed', file=sys.stderr)\n"
+        "start(emit, stream='lines')\n"
+    )
+    root = Path(__file__).parent.parent
+    proc = subprocess.Popen(
+        [sys.executable, str(script)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env={"PYTHONPATH": str(root), "STARTLE_CACHE_DIR": ""},
+    )
+    assert proc.stdout is not None and proc.stderr is not None
+    assert proc.stdout.readline() == b"0\n"
+    proc.stdout.close()  # as `| head -1` would
+    _, err = proc.communicate(timeout=30)
+    assert proc.returncode == 0
+    assert err == b"closed\n"
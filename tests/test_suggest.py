@@ -0,0 +1,142 @@
+import re
+from dataclasses import dataclass, replace
+
+from pytest import CaptureFixture, mark, raises
+from startle import start
+from startle._inspect.make_args import make_args_from_func
+from startle._start import make_cmds
+from startle._suggest import NameIndex, _distance
+from startle.error import UnexpectedCommandError, UnexpectedOptionError
+
+from .test_start._utils import check_exits
+
+
+def test_name_index():
+    index = NameIndex(["name", "count", "verbose", "version", "lastname"])
+
+    assert index.suggest("nmae") == ["name"]
+    assert index.suggest("cuont") == ["count"]
+    assert index.suggest("versoin") == ["version"]
+    assert index.suggest("verbos") == ["verbose"]
+    assert index.suggest("lastnme") == ["lastname"]
+    assert index.suggest("xyz") == []
+    assert index.suggest("") == []
+
+    # closest first
+    index = NameIndex(["abcd", "abce", "abxy"])
+    assert index.suggest("abcd") == ["abcd", "abce"]
+    assert index.suggest("abcd", limit=1) == ["abcd"]
+
+
+@mark.parametrize(
+    "a, b, distance",
+    [
+        ("name", "name", 0),
+        ("name", "nmae", 1),
+        ("name", "names", 1),
+        ("name", "nam", 1),
+        ("name", "nane", 1),
+        ("name", "anme", 1),
+        ("name", "amen", 2),
+        ("name", "xnamex", 2),
+        ("", "ab", 2),
+        ("name", "other", 3),
+        ("ca", "abc", 3),  # no edits of a transposed pair
+    ],
+)
+def test_distance(a: str, b: str, distance: int):
+    assert _distance(a, b, 2) == min(distance, 3)
+    assert _distance(b, a, 2) == min(distance, 3)
+    assert _distance(a, b, 0) == min(distance, 1)
+
+
+def test_name_index_large():
+    names = [f"group-{i}-option-{j}" for i in range(100) for j in range(100)]
+    index = NameIndex(names)
+
+    assert index.suggest("group-42-otpion-17") == ["group-42-option-17"]
+    assert index.suggest("group-42-option-17x")[0] == "group-42-option-17"
+    assert index.suggest("gruop-5-option-5") == ["group-5-option-5"]
+    assert index.suggest("grop-7-option-3") == ["group-7-option-3"]
+    assert index.suggest("group-4-option-1x") == [
+        "group-4-option-10",
+        "group-4-option-11",
+        "group-4-option-12",
+    ]
+    assert index.suggest("something-else-entirely") == []
+
+
+def hi(name: str, *, count: int = 1, verbose: bool = False) -> None:
+    print(f"hi {name}" * count)
+
+
+def test_option_suggestion():
+    with raises(UnexpectedOptionError) as excinfo:
+        make_args_from_func(hi).parse(["--cuont", "3"])
+    assert excinfo.value.name == "cuont"
+    assert excinfo.value.suggestions == ["--count"]
+    assert str(excinfo.value) == "Unexpected option `cuont`! Did you mean `--count`?"
+
+    with raises(UnexpectedOptionError, match=re.escape("Did you mean `--verbose`?")):
+        make_args_from_func(hi).parse(["--verbos"])
+    with raises(UnexpectedOptionError, match=re.escape("Did you mean `--count`?")):
+        make_args_from_func(hi).parse(["--cuont=3"])
+    with raises(UnexpectedOptionError, match=re.escape("Did you mean `--count`?")):
+        make_args_from_func(hi).parse(["--cout"])
+
+    with raises(UnexpectedOptionError) as excinfo:
+        make_args_from_func(hi).parse(["--unknown"])
+    assert excinfo.value.suggestions == []
+    assert str(excinfo.value) == "Unexpected option `unknown`!"
+
+
+@dataclass
+class Inner:
+    learning_rate: float = 0.1
+    momentum: float = 0.9
+
+
+def train(inner: Inner, *, epochs: int = 1) -> None:
+    pass
+
+
+def test_option_suggestion_recursive():
+    args = make_args_from_func(train, recurse=True)
+    with raises(UnexpectedOptionError, match=re.escape("`--learning-rate`")):
+        args.parse(["--learning-rat", "0.1"])
+
+    args = make_args_from_func(train, recurse=True, naming="nested")
+    with raises(UnexpectedOptionError, match=re.escape("`--inner.momentum`")):
+        args.parse(["--inner.momentun", "0.1"])
+
+
+def add(a: int, b: int) -> None:
+    print(a + b)
+
+
+def sub(a: int, b: int) -> None:
+    print(a - b)
+
+
+def test_command_suggestion(capsys: CaptureFixture[str]):
+    with raises(UnexpectedCommandError) as excinfo:
+        start([add, sub], args=["sbu", "1", "2"], catch=False)
+    assert excinfo.value.cmd == "sbu"
+    assert excinfo.value.suggestions == ["sub"]
+
+    check_exits(
+        capsys,
+        lambda f, a: start(f, args=a),  # type: ignore
+        [add, sub],
+        ["ad", "1", "2"],
+        "Error: Unknown command `ad`! Did you mean `add`?\n",
+    )
+
+
+def test_name_index_not_in_spec():
+    cmds, _ = make_cmds([add, sub], "prog")
+    same = replace(cmds, cmd_parsers=dict(cmds.cmd_parsers))
+    with raises(UnexpectedCommandError):
+        cmds.select(["sbu"])
+    assert cmds == same
+    assert repr(cmds) == repr(same)
@@ -0,0 +1,222 @@
+import io
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+from pytest import MonkeyPatch, mark, raises
+from startle import start
+from startle._telemetry import argv_shape
+from startle.error import UnsupportedTypeError
+from startle.replay import read_log, replay
+
+
+def add(a: int, b: int = 2, *, verbose: bool = False) -> int:
+    """
+    Add two numbers.
+    """
+    return a + b
+
+
+def sub(a: int, b: int) -> int:
+    """
+    Subtract two numbers.
+    """
+    return a - b
+
+
+def bad(x: list[str] | None) -> None:
+    pass
+
+
+def _records(path: Path) -> list[dict[str, Any]]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@mark.parametrize(
+    "argv, shape",
+    [
+        ([], {"options": {}, "positionals": 0}),
+        (["1", "--b", "2", "-v"], {"options": {"--b": 1, "-v": 1}, "positionals": 2}),
+        (["--x=1", "--x", "2", "-5"], {"options": {"--x": 2}, "positionals": 2}),
+        (["--", "--a", "b"], {"options": {}, "positionals": 2}),
+    ],
+)
+def test_argv_shape(argv: list[str], shape: dict[str, Any]):
+    assert argv_shape(argv) == shape
+
+
+def test_off_by_default(tmp_path: Path, monkeypatch: MonkeyPatch):
+    monkeypatch.delenv("STARTLE_TELEMETRY", raising=False)
+    monkeypatch.chdir(tmp_path)
+    assert start(add, args=["1"]) == 3
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_record_func(tmp_path: Path, monkeypatch: MonkeyPatch):
+    log = tmp_path / "log.jsonl"
+    monkeypatch.setenv("STARTLE_TELEMETRY", str(log))
+    monkeypatch.delenv("STARTLE_TELEMETRY_VALUES", raising=False)
+    assert start(add, name="calc", args=["1", "--b", "5", "--verbose"]) == 6
+
+    [record] = _records(log)
+    assert record["program"] == "calc"
+    assert record["target"] == f"{__name__}:add"
+    assert record["command"] is None
+    assert record["argv"] == {"options": {"--b": 1, "--verbose": 1}, "positionals": 2}
+    assert "args" not in record  # no values unless allowed
+    assert list(record["phases"]) == ["build", "parse", "bind", "call"]
+    assert all(t >= 0 for t in record["phases"].values())
+    assert record["status"] == 0
+    if sys.platform != "win32":
+        assert record["peak_rss_kb"] > 0
+
+
+def test_record_values_and_errors(tmp_path: Path, monkeypatch: MonkeyPatch):
+    log = tmp_path / "log.jsonl"
+    monkeypatch.setenv("STARTLE_TELEMETRY", str(log))
+    monkeypatch.setenv("STARTLE_TELEMETRY_VALUES", "1")
+    with raises(SystemExit):
+        start([add, sub], name="calc", args=["sub", "1", "x"])
+    with raises(ZeroDivisionError):
+        start(lambda: 1 / 0, args=[])
+
+    parse_error, call_error = _records(log)
+    assert parse_error["args"] == ["sub", "1", "x"]
+    assert parse_error["command"] == "sub"
+    assert parse_error["target"] == {"add": f"{__name__}:add", "sub": f"{__name__}:sub"}
+    assert list(parse_error["phases"]) == ["build", "select", "parse", "error"]
+    assert parse_error["status"] == 1
+    assert call_error["status"] == 1
+    assert call_error["error"] == "ZeroDivisionError"
+    assert "call" in call_error["phases"]
+
+
+def test_replay(tmp_path: Path, monkeypatch: MonkeyPatch):
+    log = tmp_path / "log.jsonl"
+    monkeypatch.setenv("STARTLE_TELEMETRY", str(log))
+    monkeypatch.setenv("STARTLE_TELEMETRY_VALUES", "1")
+    start([add, sub], name="calc", args=["add", "1", "--b", "2"])
+    with raises(SystemExit):
+        start([add, sub], name="calc", args=["sub", "1", "x"])
+    monkeypatch.delenv("STARTLE_TELEMETRY_VALUES")
+    start([add, sub], name="calc", args=["add", "3"])
+    monkeypatch.delenv("STARTLE_TELEMETRY")
+
+    out = io.StringIO()
+    assert replay(read_log(log.read_text().splitlines()), repeat=2, out=out) == 0
+    report = out.getvalue()
+    assert "calc add: 1 parses" in report
+    assert "calc sub: 1 parses" in report
+    assert "2 replayed, 1 skipped." in report
+
+    # a parse that used to fail, but now succeeds (or vice versa) is a regression
+    records = read_log(log.read_text().splitlines())
+    records[0]["args"] = ["add", "one"]
+    out = io.StringIO()
+    assert replay(records, out=out) == 1
+    assert "changed: ['add', 'one']: ok -> error" in out.getvalue()
+
+    # unresolvable targets are skipped
+    records[0]["target"] = {"add": "no_such_module:add"}
+    out = io.StringIO()
+    replay(records[:1], out=out)
+    assert "0 replayed, 1 skipped." in out.getvalue()
+
+
+def test_replay_config_error(tmp_path: Path, monkeypatch: MonkeyPatch):
+    log = tmp_path / "log.jsonl"
+    monkeypatch.setenv("STARTLE_TELEMETRY", str(log))
+    monkeypatch.setenv("STARTLE_TELEMETRY_VALUES", "1")
+    with raises(UnsupportedTypeError):
+        start([add, bad], name="calc", args=["bad", "x"])
+    monkeypatch.delenv("STARTLE_TELEMETRY")
+
+    # subcommands are built lazily, so the error is only raised upon selection
+    records = read_log(log.read_text().splitlines())
+    out = io.StringIO()
+    assert replay(records, out=out) == 0
+    assert "1 replayed, 0 skipped." in out.getvalue()
+
+    records[0]["args"] = ["add", "1"]
+    out = io.StringIO()
+    assert replay(records, out=out) == 1
+    assert "changed: ['add', '1']: config-error -> ok" in out.getvalue()
+
+
+def test_replay_script(tmp_path: Path):
+    script = tmp_path / "prog.py"
+    script.write_text(
+        "from startle import start\n\n"
+        "def hello(name: str, *, times: int = 1):\n"
+        "    print(name * times)\n\n"
+        "if __name__ == '__main__':\n"
+        "    start(hello)\n"
+    )
+    log = tmp_path / "log.jsonl"
+    env = {
+        **os.environ,
+        "STARTLE_TELEMETRY": str(log),
+        "STARTLE_TELEMETRY_VALUES": "1",
+        "PYTHONPATH": str(Path(__file__).parents[1]),
+    }
+    for argv in (["x", "--times", "2"], ["--help"]):
+        subprocess.run(
+            [sys.executable, str(script), *argv],
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+    assert [r["target"] for r in _records(log)] == ["__main__:hello"] * 2
+
+    del env["STARTLE_TELEMETRY"]
+    result = subprocess.run(
+        [sys.executable, "-m", "startle.replay", str(log)],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "prog.py: 2 parses" in result.stdout
+    assert "2 replayed, 0 skipped." in result.stdout
+
+
+@mark.parametrize("as_module", [False, True])
+def test_replay_never_runs_commands(tmp_path: Path, as_module: bool):
+    script = tmp_path / "touch_it.py"
+    script.write_text(
+        "from pathlib import Path\n"
+        "from startle import start\n\n"
+        "def touch(path: Path):\n"
+        "    path.touch()\n\n"
+        "start(touch)\n"  # not guarded by `__name__ == "__main__"`
+    )
+    log = tmp_path / "log.jsonl"
+    env = {
+        **os.environ,
+        "STARTLE_TELEMETRY": str(log),
+        "STARTLE_TELEMETRY_VALUES": "1",
+        "PYTHONPATH": os.pathsep.join([str(Path(__file__).parents[1]), str(tmp_path)]),
+    }
+    touched = tmp_path / "touched"
+    prog = ["-m", "touch_it"] if as_module else [str(script)]
+    subprocess.run(
+        [sys.executable, *prog, str(touched)], env=env, check=True, cwd=tmp_path
+    )
+    assert touched.exists()
+    touched.unlink()
+    target = "touch_it:touch" if as_module else "__main__:touch"
+    assert [r["target"] for r in _records(log)] == [target]
+
+    del env["STARTLE_TELEMETRY"]
+    result = subprocess.run(
+        [sys.executable, "-m", "startle.replay", str(log)],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "0 replayed, 1 skipped." in result.stdout
+    assert not touched.exists()
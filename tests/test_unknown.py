@@ -2,6 +2,7 @@ from collections.abc import Callable
 from typing import Any
 
 from pytest import mark, raises
+from startle._inspect.make_args import make_args_from_func
 from startle.error import ParserOptionError, ParserValueError
 
 from ._utils import check_args
@@ -294,3 +295,38 @@ def test_var_args_kwargs_typed():
             [],
             {},
         )
+
+
+def hi_w_set_kwargs(msg: str, **kwargs: frozenset[int]) -> None:
+    pass
+
+
+def test_var_kwargs_compact():
+    args = make_args_from_func(hi_w_kwargs_typed)
+    named = list(args._named_args)  # type: ignore
+
+    cli_args = ["hello", "3", *(f"--flag-{i}={i}" for i in range(10_000))]
+    f_args, f_kwargs = args.parse(cli_args).make_func_args()
+    assert f_args == ["hello", 3]
+    assert f_kwargs == {f"flag_{i}": float(i) for i in range(10_000)}
+    # unknown options are not turned into Args
+    assert args._named_args == named  # type: ignore
+
+    # and are forgotten by the next parse
+    assert args.parse(["hello", "3", "--b=1"]).make_func_args()[1] == {"b": 1.0}
+
+    with raises(ParserOptionError, match="Option `arg-a` is multiply given!"):
+        args.parse(["hello", "3", "--arg-a=1", "--arg_a", "2"])
+    with raises(ParserOptionError, match="Option `arg-a` is missing argument!"):
+        args.parse(["hello", "3", "--arg-a"])
+
+
+def test_var_kwargs_container():
+    check_args(
+        hi_w_set_kwargs,
+        ["hello", "--a", "1", "2", "--a=2", "--b=3"],
+        ["hello"],
+        {"a": frozenset({1, 2}), "b": frozenset({3})},
+    )
+    with raises(ParserOptionError, match="Option `a` is missing argument!"):
+        check_args(hi_w_set_kwargs, ["hello", "--a", "--b=3"], [], {})